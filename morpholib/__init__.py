@@ -1,7 +1,7 @@
 from morpholib.base import *
 from morpholib.figure import *
 from morpholib.anim import Layer, Animation, Frame, SpaceFrame, \
-    Skit, SpaceSkit, SkitParameters, SpaceLayer, MultiFigure, SpaceMultiFigure, \
+    Skit, SpaceSkit, SkitParameters, SkitMemoize, SpaceLayer, MultiFigure, SpaceMultiFigure, \
     Camera, SpaceCamera
 import morpholib.color as color
 from morpholib.matrix import array
@@ -31,6 +31,7 @@ import pyperclip
 from warnings import warn
 from tempfile import TemporaryDirectory
 from collections.abc import Iterable
+from collections import OrderedDict
 
 # # Get location of the Morpho directory.
 # # pwd = os.sep.join(sys.argv[0].split(os.sep)[:-1])
@@ -842,11 +843,13 @@ class Frame(BoundingBoxFigure):
         figlist = sorted(self.figures, key=lambda fig: fig.zdepth)
 
         with self._pushTranslation(camera, ctx):
+            drawlist = []
             for fig in figlist:
                 if fig.visible:
                     fig = applyFigureModifier(fig)
                     if fig.visible:
-                        fig.draw(camera, ctx, *args, **kwargs)
+                        drawlist.append(fig)
+            _drawFigures(drawlist, camera, ctx, *args, **kwargs)
 
     # Copies the frame. Supplying False to the optional arg "deep"
     # means the resulting frame copy will not make copies of the
@@ -871,14 +874,16 @@ class Frame(BoundingBoxFigure):
     # Perform an fimage on all non-static figures that possess
     # a method with the name "fimage".
     # Returns a new frame object that is the result.
-    def fimage(self, func):
+    # Any keyword arguments (e.g. vectorized=True) are passed on
+    # to each figure's fimage() method.
+    def fimage(self, func, **kwargs):
         S = self
         f = func
         fS = S.copy()
         for i in range(len(fS.figures)):
             fig = fS.figures[i]
             if not fig.static:
-                fS.figures[i] = fig.fimage(func)
+                fS.figures[i] = fig.fimage(func, **kwargs)
         return fS
 
     ### TWEEN METHODS ###
@@ -1556,6 +1561,102 @@ class StateStruct(object):
 
 
 
+# Mainly for internal use by Frame and Layer.
+# Draws the given figures in order. Runs of consecutive figures that
+# can all be stroked the same way (see Path._strokeBatchKey()) are
+# combined into a single cairo path and drawn with one stroke,
+# which saves many cairo calls when drawing things like grids.
+def _drawFigures(figlist, camera, ctx, *args, **kwargs):
+    # Compute batch keys, looking up the method on the class to skip
+    # the slow Figure.__getattr__() fallback for non-paths.
+    keys = []
+    for fig in figlist:
+        batchKey = getattr(type(fig), "_strokeBatchKey", None)
+        keys.append(None if batchKey is None else batchKey(fig))
+
+    n = 0
+    while n < len(figlist):
+        fig = figlist[n]
+        key = keys[n]
+        m = n + 1
+        if key is not None:
+            while m < len(figlist) and keys[m] == key:
+                m += 1
+        if m - n > 1:
+            type(fig)._drawStrokeBatch(figlist[n:m], camera, ctx)
+        else:
+            fig.draw(camera, ctx, *args, **kwargs)
+        n = m
+
+# Mainly for internal use by SpaceFrame and SpaceLayer.
+# Returns a list of all the primitives of the figures in the
+# given list that have a primitives() method, in order.
+#
+# Figures whose primitives() method supports it (see
+# morpho.projectedPrimitives()) have their 3D points gathered
+# into a single buffer which is projected by the camera all at
+# once, and the projected points are then handed back to each
+# figure to build its primitives.
+#
+# If optional kwarg `returnDepths` is set to True, a numpy
+# array of the zdepths of the primitives (in the same order)
+# is also returned.
+def _poolPrimitives(figlist, camera, *, returnDepths=False):
+    # Each entry is either a list of primitives or a tuple
+    # (fig, start, stop) marking the figure's rows in the buffer.
+    entries = []
+    buffers = []
+    rowCount = 0
+    for fig in figlist:
+        if not object_hasattr(fig, "primitives"):
+            continue
+        if getattr(type(fig).primitives, "projectable", False):
+            array = fig._spaceVertices()
+            if array is not None:
+                entries.append((fig, rowCount, rowCount+len(array)))
+                buffers.append(array)
+                rowCount += len(array)
+                continue
+        entries.append(fig.primitives(camera))
+
+    if len(buffers) > 0:
+        projected = camera.project(np.concatenate(buffers, axis=0))
+
+    primlist = []  # This list "pools" together all primitives across all figures
+    for entry in entries:
+        if isinstance(entry, tuple):
+            fig, start, stop = entry
+            primlist.extend(fig._projectedPrimitives(camera, projected[start:stop]))
+        else:
+            primlist.extend(entry)
+
+    if returnDepths:
+        # Read the zdepth tweenables directly from the state dicts to
+        # avoid going thru Figure.__getattr__() for every primitive.
+        zdepths = np.fromiter(
+            (prim._state["zdepth"].value for prim in primlist),
+            dtype=float, count=len(primlist)
+            )
+        return primlist, zdepths
+    return primlist
+
+# Mainly for internal use by SpaceLayer.
+# Draws the given list of primitives in order of their zdepths
+# (given as a parallel numpy array). Equivalent to drawing
+# Frame(primlist), but without constructing the frame and with
+# the ordering computed by a single argsort.
+def _drawPrimitives(primlist, zdepths, camera, ctx):
+    order = np.argsort(zdepths, kind="stable").tolist()
+    with morpho.SavePoint(ctx):
+        drawlist = []
+        for n in order:
+            fig = primlist[n]
+            if fig.visible:
+                fig = applyFigureModifier(fig)
+                if fig.visible:
+                    drawlist.append(fig)
+        _drawFigures(drawlist, camera, ctx)
+
 # 3D version of Frame which supports the primitives() method.
 # This version should usually be used when making Frames containing
 # space figures. However, there could be exceptions. See below.
@@ -1601,14 +1702,14 @@ class SpaceFrame(Frame):
     # Calls the primitives() method on all figures and merges all of
     # the lists into one big list of primitives and returns it.
     def primitives(self, camera): # orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
-        primlist = []
+        figlist = []
         for fig in self.figures:
             if fig.visible:
                 fig = applyFigureModifier(fig)
                 if fig.visible:
-                    primlist.extend(fig.primitives(camera))
+                    figlist.append(fig)
 
-        return primlist
+        return _poolPrimitives(figlist, camera)
 
 # THIS CLASS MAY BE BROKEN! USE AT YOUR OWN RISK!
 # 3D version of the MultiFigure class. See "MultiFigure" for more info.
@@ -1643,13 +1744,48 @@ SpaceMultifigure = Spacemultifigure = SpaceMultiFigure
 #
 # pendulum = morpho.Actor(Pendulum())
 # pendulum.newkey(90).t = final_t_value
+#
+# MEMOIZATION
+# If makeFrame() depends only on the skit's tweenables and
+# nontweenables, drawing can reuse frames generated earlier for
+# the same tweenable and nontweenable values
+# (e.g. during holds or replays) instead of calling makeFrame()
+# again. This is opt-in, either by setting the class attribute
+# `memoize` to True on a Skit subclass, or with the SkitMemoize()
+# decorator. Don't enable it for skits that read anything else,
+# such as plain attributes or other actors via now().
+#
+# CLASS ATTRIBUTES
+# memoize = Boolean indicating whether to reuse frames. Default: False
+# memoizeSize = Maximum number of frames remembered. The least
+#               recently used frames are discarded first. Default: 32
+# memoizeQuantum = Optional resolution at which tweenable values are
+#                  compared. Either a single number applying to all
+#                  numeric tweenables or a dict mapping tweenable names
+#                  to numbers. Values within the same multiple of the
+#                  quantum reuse the same frame. Default: None (exact)
 class Skit(morpho.Figure):
 
+    memoize = False
+    memoizeSize = 32
+    memoizeQuantum = None
+
     def __init__(self, *, t=0):
         super().__init__()
 
         self.Tweenable("t", t, tags=["scalar"])
 
+        # Frames already generated by makeFrame() keyed by the
+        # tweenable and nontweenable values they were generated for.
+        # Shared with the skit's tweens so that they can reuse them.
+        self._frameCache = OrderedDict()
+
+    def tween(self, other, t, *args, **kwargs):
+        new = super().tween(other, t, *args, **kwargs)
+        if isinstance(new, Skit):
+            new._frameCache = self._frameCache
+        return new
+
     # Return a frame figure based on the t-value of the skit.
     # Generic skit just returns an empty frame.
     # Subclasses of Skit should define it however is necessary.
@@ -1659,9 +1795,34 @@ class Skit(morpho.Figure):
     def makeFrame(self):
         return Frame()
 
+    # Mainly for internal use by draw() and primitives().
+    # Returns the result of makeFrame(), reusing a previously
+    # generated frame for the same tweenable and nontweenable
+    # values if memoization
+    # is enabled. The returned frame may be shared, so it should
+    # not be modified.
+    def _memoFrame(self):
+        if not self.memoize:
+            return self.makeFrame()
+
+        key = _skitMemoKey(self)
+        if key is None:
+            return self.makeFrame()
+
+        cache = self._frameCache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        frame = self.makeFrame()
+        cache[key] = frame
+        while len(cache) > self.memoizeSize:
+            cache.popitem(last=False)
+        return frame
+
     # Generate the frame and draw it.
     def draw(self, camera, ctx, *args, **kwargs):
-        self.makeFrame().draw(camera, ctx, *args, **kwargs)
+        self._memoFrame().draw(camera, ctx, *args, **kwargs)
 
 
 # 3D version of the Skit class which supports the primitives() method.
@@ -1685,7 +1846,45 @@ class SpaceSkit(Skit):
     # Only for use when the skit returns a space figure
     # possessing a primitives() method.
     def primitives(self, camera): # orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
-        return self.makeFrame().primitives(camera)
+        return self._memoFrame().primitives(camera)
+
+
+# Mainly for internal use by Skit._memoFrame().
+# Returns a hashable key built from the tweenable values of the
+# given skit, rounded according to its `memoizeQuantum` setting,
+# together with its (unrounded) nontweenable values, or None if
+# some value can't be made hashable.
+def _skitMemoKey(skit):
+    quantum = skit.memoizeQuantum
+
+    # Recursively converts a tweenable value into a hashable one
+    def hashable(value, q):
+        if isinstance(value, np.ndarray):
+            if q is not None and np.issubdtype(value.dtype, np.number):
+                value = np.round(value/q)
+            return (value.shape, value.dtype.str, value.tobytes())
+        elif isinstance(value, (list, tuple)):
+            return tuple(hashable(item, q) for item in value)
+        elif q is not None and isinstance(value, complex):
+            return complex(round(value.real/q), round(value.imag/q))
+        elif q is not None and isinstance(value, (int, float)) \
+            and not isinstance(value, bool):
+            return round(value/q)
+        return value
+
+    key = []
+    for name, tweenable in skit._state.items():
+        q = quantum.get(name, None) if isinstance(quantum, dict) else quantum
+        key.append((name, hashable(tweenable.value, q)))
+    for name in sorted(skit._nontweenables):
+        key.append((name, hashable(getattr(skit, name), None)))
+    key = tuple(key)
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
 
 
 # This is a decorator-maker that lets you change the skit parameter
@@ -1752,6 +1951,31 @@ def SkitParameters(params=None, /, **kwargs):
 
     return decorator
 
+# This is a decorator-maker that turns on memoization of the frames
+# a skit generates. See the Skit class for details.
+#
+# Usage:
+# @morpho.SkitMemoize()
+# class Pendulum(morpho.Skit):
+#     etc...
+#
+# Optionally specify the maximum number of frames remembered
+# and the quantum at which tweenable values are compared:
+# @morpho.SkitMemoize(size=100, quantum=0.001)
+# class Pendulum(morpho.Skit):
+#     etc...
+def SkitMemoize(size=32, quantum=None):
+    if size < 1:
+        raise ValueError("Memoization size must be at least 1.")
+
+    def decorator(subSkit):
+        subSkit.memoize = True
+        subSkit.memoizeSize = size
+        subSkit.memoizeQuantum = quantum
+        return subSkit
+
+    return decorator
+
 
 # Non-drawable figure whose purpose is to record information about the current
 # view of the complex plane that the Layer class should use to draw its actors.
@@ -2207,6 +2431,18 @@ class SpaceCamera(Camera):
     def focus(self, value):
         self._focus = morpho.matrix.array(value)
 
+    # Applies the camera's orient and focus to an (N x 3) array
+    # of 3D points (one point per row) and returns the resulting
+    # array of projected points. The first two columns are the
+    # 2D screen coordinates and the last column is the depth.
+    def project(self, array):
+        orient = self.orient
+        focus = self.focus.reshape(-1)
+        if np.allclose(focus, 0):
+            return array @ orient.T
+        else:
+            return (array - focus) @ orient.T + focus
+
 
     ### TWEEN METHODS ###
 
@@ -3013,7 +3249,8 @@ class Layer(object):
         for actor in self.actors:
             if not actor.visible: continue
 
-            fig = actor.time(f, keepOwner=True, _skipTrivialTweens=True)
+            fig = actor.time(f, keepOwner=True, _skipTrivialTweens=True,
+                _useTweenCache=True)
             if fig is None: continue
 
             if fig.visible:
@@ -3029,15 +3266,13 @@ class Layer(object):
         if self.mask is None or not self.mask.visible or not self.mask.viewtime(f, returnCamera=True, _skipTrivialTweens=True).visible:
             # Draw all figures
             with cam._pushRotation(ctx):  # Apply camera rotation
-                for fig in figlist:
-                    fig.draw(cam, ctx)
+                _drawFigures(figlist, cam, ctx)
         else:  # Layer has a mask, so draw with masking
             self._setupInternalSubcontexts(ctx)
 
             with cam._pushRotation(self._ctx1):  # Apply camera rotation
                 # Draw all figures to this intermediate surface:
-                for fig in figlist:
-                    fig.draw(cam, self._ctx1)
+                _drawFigures(figlist, cam, self._ctx1)
 
             # Draw the mask layer on the secondary subcontext
             self.mask.draw(f+self.timeOffset-self.mask.timeOffset, self._ctx2)
@@ -3163,7 +3398,8 @@ class SpaceLayer(Layer):
         for actor in self.actors:
             if not actor.visible: continue
 
-            fig = actor.time(f, keepOwner=True, _skipTrivialTweens=True)
+            fig = actor.time(f, keepOwner=True, _skipTrivialTweens=True,
+                _useTweenCache=True)
             if fig is None: continue
 
             if fig.visible:
@@ -3175,12 +3411,8 @@ class SpaceLayer(Layer):
         figlist.sort(key=lambda fig: fig.zdepth) #, reverse=True)
 
         if self.poolPrimitives:
-            primlist = []  # This list "pools" together all primitives across all figures
-            for fig in figlist[:]:
-                # if "primitives" in dir(fig):
-                if object_hasattr(fig, "primitives"):
-                    primlist.extend(fig.primitives(cam))
-                    figlist.remove(fig)
+            primlist, zdepths = _poolPrimitives(figlist, cam, returnDepths=True)
+            figlist = [fig for fig in figlist if not object_hasattr(fig, "primitives")]
 
         # NOTE: The "start" and "end" parameters of the masklayer are ignored
         # when drawing with masking!
@@ -3191,8 +3423,7 @@ class SpaceLayer(Layer):
                     fig.draw(cam, ctx)
                 # Draw all primitive 2D figures
                 if self.poolPrimitives:
-                    frame = Frame(primlist)
-                    frame.draw(cam, ctx)
+                    _drawPrimitives(primlist, zdepths, cam, ctx)
         else:  # There is a mask, so draw with masking!
             self._setupInternalSubcontexts(ctx)
 
@@ -3204,8 +3435,7 @@ class SpaceLayer(Layer):
                     fig.draw(cam, self._ctx1)
                 # Draw all primitive 2D figures
                 if self.poolPrimitives:
-                    frame = Frame(primlist)
-                    frame.draw(cam, self._ctx1)
+                    _drawPrimitives(primlist, zdepths, cam, self._ctx1)
 
             # Draw the mask layer on the secondary subcontext
             self.mask.draw(f+self.timeOffset-self.mask.timeOffset, self._ctx2)
@@ -3382,6 +3612,10 @@ class Animation(object):
         self.window = None
         self.renderData = None
         self.renderTexture = None
+        # True only during interactive playback via play(), where
+        # frames can be revisited (e.g. replays and scrubbing), as
+        # opposed to exporting, where each frame is drawn once.
+        self._playing = False
         self.update = None
         self.paused = False
         self.delay = 0
@@ -4357,6 +4591,7 @@ class Animation(object):
         for layer in self.layers:
             for actor in layer.actors:
                 actor.timeCache.clear()
+                actor.clearTweenCache()
 
     # Export animation to file.
     # Can either be MP4, GIF, WEBP animation, or PNG/JPG sequence depending
@@ -4715,6 +4950,7 @@ class Animation(object):
 
         self.active = True
         self.running = True
+        self._playing = True
         self.window.switch_to()  # Focus on this window for rendering.
 
         # Setup context for rendering to a pyglet window
@@ -4934,6 +5170,7 @@ class Animation(object):
         # Reset active animation attributes
         self.active = False
         self.running = False
+        self._playing = False
         self.window = None
         self.context = None
         self.renderData = None
@@ -57,6 +57,27 @@ def derivative(func, x, dx=1.0e-6):
 
 diff = derivative  # Alias
 
+# Mainly for internal use.
+# Evaluates a function of 3D (or 2D) vectors on every row of the
+# (N x dim) array `points` and returns the outputs as an (N x 3) array.
+# If vectorized, the function is called once on the (dim x N) array
+# whose rows are the coordinates of the points (so functions written
+# like `lambda v: mo.array([v[0], v[1], v[0]*v[1]])` work unchanged),
+# and it should return a (3 x N) array.
+def _sampleVectorFunction(func, points, vectorized):
+    if vectorized:
+        values = np.asarray(func(points.T), dtype=float)
+        return np.array(np.broadcast_to(values.T, (len(points), 3)))
+    return np.array([func(v) for v in points], dtype=float)
+
+# Mainly for internal use.
+# Evaluates a real function on every entry of the 1D array `inputs`
+# and returns the outputs as an array.
+def _sampleRealFunction(func, inputs, vectorized):
+    if vectorized:
+        return np.broadcast_to(np.asarray(func(inputs), dtype=float), inputs.shape)
+    return np.array([func(x) for x in inputs.tolist()], dtype=float)
+
 
 class IntegralArea(morpho.Figure):
 
@@ -127,7 +148,7 @@ class DoubleIntegralVolume(morpho.SpaceFigure):
         inmin=0, inmax=1, outmin=0, outmax=1,
         width=0, color=(0,0,0), alphaEdge=1,
         fill=(1,0,0), alphaFill=1, alpha=1,
-        steps=24, origin=morpho.array([0,0,0])
+        steps=24, origin=morpho.array([0,0,0]), vectorized=False
         ):
 
         # Construct default figure
@@ -170,6 +191,12 @@ class DoubleIntegralVolume(morpho.SpaceFigure):
         # Non-tweenable attributes
         self.mode = mode
         self.shading = True
+        # If True, func, inmin, and inmax are each called once on whole
+        # arrays of inputs instead of once per input.
+        self.vectorized = vectorized
+
+        # Cache of the wall vertex arrays. See wallArrays().
+        self._wallCache = None
 
     @property
     def inmin(self):
@@ -198,6 +225,7 @@ class DoubleIntegralVolume(morpho.SpaceFigure):
         new = super().copy()
         new.mode = self.mode
         new.shading = self.shading
+        new.vectorized = self.vectorized
         return new
 
     @property
@@ -209,153 +237,75 @@ class DoubleIntegralVolume(morpho.SpaceFigure):
         self._origin = morpho.array(value)
 
     # Returns a dict mapping a cardinal direction ("north", "east", etc.)
-    # to a quadmesh representing that wall.
-    def makeWalls(self):
+    # to the vertex array of the quadmesh representing that wall.
+    # The arrays only depend on the functions and bounds, so they are
+    # computed once and reused until one of those changes.
+    def wallArrays(self):
+        funcs = (self.func, self.inmin, self.inmax)
+        params = (self.outmin, self.outmax, self.steps, self.mode, self.vectorized)
+        cache = self._wallCache
+        if cache is not None and cache[1] == params \
+            and all(f is g for f, g in zip(cache[0], funcs)):
+            return cache[2]
+
         a,b = self.outmin, self.outmax
-        xLen = b-a
         cfunc, dfunc = self.inmin, self.inmax
         dr = 1/self.steps
         swap = (self.mode.lower()=="dxdy")
+        vectorized = self.vectorized
 
-        westWall = morpho.grid.quadgrid(
-            view=[0,1,0,1],
-            dx=1, dy=dr,
-            width=self.width, color=self.color, alphaEdge=self.alphaEdge,
-            fill=self.fill, alphaFill=self.alphaFill, alpha=self.alpha
-            )
-        westWall.shading = self.shading
-        westWall = westWall.fimage(lambda v: rot270y @ v)
-        westc,westd = cfunc(a), dfunc(a)
-        westYlen = westd-westc
-        def stretchWest(v):
-            x,y,z = v
-            X = a
-            Y = y*westYlen + westc
-            Z = z
-
-            return morpho.array([X,Y,Z])
-
-        westWall = westWall.fimage(stretchWest)
-        if swap:
-            westWall = westWall.fimage(lambda v: swapxy @ v)
-        def curveWest(v):
-            x,y,z = v
-            X,Y = x,y
-            Z = z*self.func(v)[2]
-
-            return morpho.array([X,Y,Z])
+        # Parameter values along the base of each wall, matching
+        # the vertices of quadgrid(view=[0,1,0,1], dy=dr).
+        s = np.arange(1 + int((1+1.0e-6) // dr))*dr
 
-        westWall = westWall.fimage(curveWest)
-
-
-        eastWall = morpho.grid.quadgrid(
-            view=[0,1,0,1],
-            dx=1, dy=dr,
-            width=self.width, color=self.color, alphaEdge=self.alphaEdge,
-            fill=self.fill, alphaFill=self.alphaFill, alpha=self.alpha
-            )
-        eastWall.shading = self.shading
-        eastWall = eastWall.fimage(lambda v: rot270y @ v)
+        # The west and east walls are indexed by (height, s) whereas
+        # the south and north walls are indexed by (s, height).
+        westc,westd = cfunc(a), dfunc(a)
         eastc,eastd = cfunc(b), dfunc(b)
-        eastYlen = eastd-eastc
-        def stretchEast(v):
-            x,y,z = v
-            X = b
-            Y = y*eastYlen + eastc
-            Z = z
-
-            return morpho.array([X,Y,Z])
+        X = (b-a)*s + a
+        bases = {
+            "west": (np.full(s.shape, a, dtype=float), s*(westd-westc) + westc, False),
+            "east": (np.full(s.shape, b, dtype=float), s*(eastd-eastc) + eastc, False),
+            "south": (X, _sampleRealFunction(cfunc, X, vectorized), True),
+            "north": (X, _sampleRealFunction(dfunc, X, vectorized), True)
+            }
+
+        # Build every wall's vertices at heights 0 and 1 and then
+        # evaluate func on all of them at once.
+        arrays = {}
+        for direction, (baseX, baseY, transpose) in bases.items():
+            if swap:
+                baseX, baseY = baseY, baseX
+            array = np.empty((2, len(s), 3))
+            array[:,:,0] = baseX
+            array[:,:,1] = baseY
+            array[:,:,2] = [[0], [1]]
+            if transpose:
+                array = np.ascontiguousarray(array.transpose(1,0,2))
+            arrays[direction] = array
+        points = np.concatenate([array.reshape(-1,3) for array in arrays.values()])
+        heights = points[:,2] * _sampleVectorFunction(self.func, points, vectorized)[:,2]
+        n = 0
+        for array in arrays.values():
+            array = array.reshape(-1,3)  # View into the (contiguous) wall array
+            array[:,2] = heights[n:n+len(array)]
+            n += len(array)
+
+        self._wallCache = (funcs, params, arrays)
+        return arrays
 
-        eastWall = eastWall.fimage(stretchEast)
-        if swap:
-            eastWall = eastWall.fimage(lambda v: swapxy @ v)
-        def curveEast(v):
-            x,y,z = v
-            X,Y = x,y
-            Z = z*self.func(v)[2]
-
-            return morpho.array([X,Y,Z])
-
-        eastWall = eastWall.fimage(curveEast)
-
-
-        southWall = morpho.grid.quadgrid(
-            view=[0,1,0,1],
-            dx=dr, dy=1,
-            width=self.width, color=self.color, alphaEdge=self.alphaEdge,
-            fill=self.fill, alphaFill=self.alphaFill, alpha=self.alpha
-            )
-        southWall.shading = self.shading
-        southWall = southWall.fimage(lambda v: rot90x @ v)
-        def stretchSouth(v):
-            x,y,z = v
-            X = xLen*x + a
-            Y = cfunc(X)
-            Z = z
-
-            return morpho.array([X,Y,Z])
-
-        southWall = southWall.fimage(stretchSouth)
-        if swap:
-            southWall = southWall.fimage(lambda v: swapxy @ v)
-        def southTop(v):
-            x,y,z = v
-            X,Y = x,y
-            Z = z*self.func(v)[2]
-
-            return morpho.array([X,Y,Z])
-        southWall = southWall.fimage(southTop)
-
-
-        northWall = morpho.grid.quadgrid(
-            view=[0,1,0,1],
-            dx=dr, dy=1,
-            width=self.width, color=self.color, alphaEdge=self.alphaEdge,
-            fill=self.fill, alphaFill=self.alphaFill, alpha=self.alpha
-            )
-        northWall.shading = self.shading
-        northWall = northWall.fimage(lambda v: rot90x @ v)
-        def stretchNorth(v):
-            x,y,z = v
-            X = xLen*x + a
-            Y = dfunc(X)
-            Z = z
-
-            return morpho.array([X,Y,Z])
-
-        northWall = northWall.fimage(stretchNorth)
-        if swap:
-            northWall = northWall.fimage(lambda v: swapxy @ v)
-        def northTop(v):
-            x,y,z = v
-            X,Y = x,y
-            Z = z*self.func(v)[2]
-
-            return morpho.array([X,Y,Z])
-        northWall = northWall.fimage(northTop)
-
-        # if self.strokeWeight > 0 and self.alphaEdge > 0:
-        #     # Construct edges at the four corners
-        #     SWedge = morpho.grid.SpacePath([[a,westc,0],[a,westc,self.func(mo.array([a,westc,0]))[2]] ])
-        #     SEedge = morpho.grid.SpacePath([[b,eastc,0],[b,eastc,self.func(mo.array([b,eastc,0]))[2]] ])
-        #     NEedge = morpho.grid.SpacePath([[b,eastd,0],[b,eastd,self.func(mo.array([b,eastd,0]))[2]] ])
-        #     NWedge = morpho.grid.SpacePath([[a,westd,0],[a,westd,self.func(mo.array([a,westd,0]))[2]] ])
-
-        #     # Assign common style parameters
-        #     edges = [SWedge, SEedge, NEedge, NWedge]
-        #     for fig in edges:
-        #         fig.color = self.color
-        #         fig.width = self.strokeWeight
-        #         fig.alpha = self.alphaEdge*self.alpha
-        # else:
-        #     edges = []
-
-        return {
-            "west": westWall,
-            "east": eastWall,
-            "south": southWall,
-            "north": northWall
-        }
+    # Returns a dict mapping a cardinal direction ("north", "east", etc.)
+    # to a quadmesh representing that wall.
+    def makeWalls(self):
+        walls = {}
+        for direction, array in self.wallArrays().items():
+            wall = morpho.grid.Quadmesh(array.copy(),
+                width=self.width, color=self.color, alphaEdge=self.alphaEdge,
+                fill=self.fill, alphaFill=self.alphaFill, alpha=self.alpha
+                )
+            wall.shading = self.shading
+            walls[direction] = wall
+        return walls
 
 
     def primitives(self, camera):
@@ -373,7 +323,7 @@ class Wall(morpho.SpaceFigure):
     def __init__(
         self, func=lambda v: v, start=morpho.array([0,0]), end=morpho.array([1,0]),
         strokeWeight=3, color=(0,0,0), alphaEdge=1, fill=(1,0,0), alphaFill=1, alpha=1,
-        steps=50, origin=morpho.array([0,0,0])):
+        steps=50, origin=morpho.array([0,0,0]), vectorized=False):
 
         # Construct default figure
         super().__init__()
@@ -394,6 +344,19 @@ class Wall(morpho.SpaceFigure):
         self.update([func, _start, _end, strokeWeight, color, fill,
             alpha, alphaEdge, alphaFill, steps, _origin])
 
+        # Non-tweenable attributes
+        # If True, func is called once on the whole array of
+        # points along the wall instead of once per point.
+        self.vectorized = vectorized
+
+        # Cache of the top edge of the wall. See makePolygon().
+        self._topCache = None
+
+    def copy(self):
+        new = super().copy()
+        new.vectorized = self.vectorized
+        return new
+
     @property
     def start(self):
         return self._start
@@ -423,7 +386,6 @@ class Wall(morpho.SpaceFigure):
         # v1 = np.pad(self.end, (0,1))
         v0 = self.start
         v1 = self.end
-        top = morpho.grid.spaceline(v0, v1, steps=self.steps)
 
         # def f(v):
         #     x,y,z = v
@@ -433,13 +395,24 @@ class Wall(morpho.SpaceFigure):
 
         #     return morpho.array([X,Y,Z])
 
-        top = top.fimage(self.func)
-        vertices = top.seq + [v1, v0]
+        # The top edge only depends on func and the endpoints, so it is
+        # computed once and reused until one of those changes.
+        params = (v0.tolist(), v1.tolist(), self.steps, self.vectorized)
+        cache = self._topCache
+        if cache is not None and cache[0] is self.func and cache[1] == params:
+            top = cache[2]
+        else:
+            steps = int(self.steps)
+            points = v0 + np.arange(steps+1, dtype=float).reshape(-1,1)*((v1-v0)/steps)
+            top = _sampleVectorFunction(self.func, points, self.vectorized)
+            self._topCache = (self.func, params, top)
+
+        vertices = list(top) + [v1, v0]
         wall = morpho.grid.SpacePolygon(vertices, width=self.strokeWeight,
             color=self.color, alphaEdge=self.alphaEdge, fill=self.fill,
             alphaFill=self.alphaFill, alpha=self.alpha)
         if not np.allclose(self.origin, (0,0,0)):
-            wall = wall.fimage(lambda v: v + self.origin)
+            wall.vertices = [v + self.origin for v in wall.vertices]
 
         return wall
 
@@ -594,22 +567,27 @@ class RiemannDisk(morpho.Figure):
 # align = -1 => left-hand rects
 # align = 1 => right-hand rects
 # align = 0 => midpoints
+#
+# Set vectorized=True to evaluate func on all sample points at once.
 def RiemannSum(func, interval, rectCount, align=-1,
     color=(0,0,0), fill=(1, 0.3, 0.3), strokeWeight=3,
     transition=None,
-    *, alphaFill=1):
+    *, alphaFill=1, vectorized=False):
 
     if transition is None:
         transition = morpho.transitions.default
 
     a,b = interval
     dx = (b-a)/rectCount
+    xs = a + (np.arange(rectCount) + (align+1)/2)*dx
+    heights = _sampleRealFunction(func, xs, vectorized).tolist()
+    xs = xs.tolist()
 
     frame = morpho.anim.Frame()
     for i in range(rectCount):
-        x = a + (i + (align+1)/2)*dx
+        x = xs[i]
         rect = RiemannRect(
-            width=dx, height=func(x), pos=x,
+            width=dx, height=heights[i], pos=x,
             color=list(color), fill=list(fill),
             align=align, strokeWeight=strokeWeight,
             alphaFill=alphaFill
@@ -681,22 +659,27 @@ def RiemannSumApproach(
 
     return mation
 
+# Constructs the Riemann disks for a given function over a given
+# interval. See RiemannSum() for more info.
 def RiemannDiskSum(func, interval, diskCount, align=-1, tilt=0.3,
     outlineColor=(0,0,0), faceFill=(0.25,0.25,0.5), edgeFill=(0.5, 0.5, 1),
     strokeWeight=3,
-    transition=None):
+    transition=None, *, vectorized=False):
 
     if transition is None:
         transition = morpho.transitions.default
 
     a,b = interval
     dx = (b-a)/diskCount
+    xs = a + (np.arange(diskCount) + (align+1)/2)*dx
+    radii = _sampleRealFunction(func, xs, vectorized).tolist()
+    xs = xs.tolist()
 
     frame = morpho.anim.Frame()
     for i in range(diskCount):
-        x = a + (i + (align+1)/2)*dx
+        x = xs[i]
         disk = RiemannDisk(
-            thickness=dx, radius=func(x), tilt=tilt, pos=x,
+            thickness=dx, radius=radii[i], tilt=tilt, pos=x,
             outlineColor=outlineColor, faceFill=faceFill, edgeFill=edgeFill,
             align=align, strokeWeight=3
             )
@@ -763,6 +746,17 @@ def RiemannDiskSumApproach(
 
     return mation
 
+# Mainly for internal use.
+# Revolves an array of complex positions by the given angle(s)
+# about the horizontal line at height axisOffset, as seen from a
+# viewpoint tilted by the given amount. The positions and angles
+# are broadcast against each other.
+def _revolveArray(z, theta, axisOffset=0, tilt=0.1):
+    z = np.asarray(z, dtype=complex)
+    C0 = z.real + axisOffset*1j  # Centers of rotation
+    w = (z - C0)*np.exp(1j*np.asarray(theta, dtype=float))
+    return tilt*w.real + 1j*w.imag + C0
+
 # Revolves a copy of the given point by the specified angle.
 def revolvePoint(point, theta, axis="x", axisOffset=0, stretch=0.2):
     point = point.copy()
@@ -781,14 +775,7 @@ def revolvePoint(point, theta, axis="x", axisOffset=0, stretch=0.2):
 def revolvePath(path, theta, axis="x", axisOffset=0, tilt=0.1):
     path = path.copy()
     if axis.lower() == "x":
-        for n in range(len(path.seq)):
-            z = path.seq[n]
-            C0 = z.real + axisOffset*1j  # Center of rotation
-            z = (z - C0)*exp(theta*1j)
-            z = tilt*z.real + z.imag*1j
-            z += C0
-
-            path.seq[n] = z
+        path.seq = _revolveArray(path.seq, theta, axisOffset, tilt).tolist()
     elif axis.lower() == "y":
         pass
     else:
@@ -807,28 +794,22 @@ def revolvePathSolid(path, theta,
 
         pathFinal = revolvePath(path, min(theta, pi), axis, axisOffset, tilt)
 
-        # Make first-pass righthand boundary vertices
-        rverts1 = []
-        pt = morpho.grid.Point(path.seq[-1])
-        for n in range(1, int(min(theta, pi)//dtheta)):
-            rverts1.append(revolvePoint(pt, n*dtheta, axis, axisOffset, tilt).pos)
+        # Angles at which the boundary vertices are placed
+        angles1 = dtheta*np.arange(1, int(min(theta, pi)//dtheta))
         if theta >= pi:
-            rverts1.append(revolvePoint(pt, pi, axis, axisOffset, tilt).pos)
+            angles1 = np.append(angles1, pi)
+        angles2 = pi + dtheta*np.arange(1, int((theta-pi)//dtheta))
+
+        # Make first-pass righthand boundary vertices
+        rverts1 = _revolveArray(path.seq[-1], angles1, axisOffset, tilt).tolist()
 
         # Make second-pass righthand boundary vertices
-        rverts2 = []
-        for n in range(1, int((theta-pi)//dtheta)):
-            rverts2.append(revolvePoint(pt, pi+n*dtheta, axis, axisOffset, tilt).pos)
+        rverts2 = _revolveArray(path.seq[-1], angles2, axisOffset, tilt).tolist()
         if theta == tau:
-            rverts2.append(pt.pos)
+            rverts2.append(path.seq[-1])
 
         # Make lefthand boundary vertices
-        lverts = []
-        pt = morpho.grid.Point(path.seq[0])
-        for n in range(1, int(min(theta, pi)//dtheta)):
-            lverts.append(revolvePoint(pt, n*dtheta, axis, axisOffset, tilt).pos)
-        if theta >= pi:
-            lverts.append(revolvePoint(pt, pi, axis, axisOffset, tilt).pos)
+        lverts = _revolveArray(path.seq[0], angles1, axisOffset, tilt).tolist()
 
         # Define main polygon
         mainpoly = morpho.grid.Polygon(
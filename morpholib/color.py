@@ -240,6 +240,18 @@ class Gradient(morpho.Figure):
         # For now this is not implemented and does nothing.
         self.cycle = False
 
+        # Number of entries in an optional lookup table used to
+        # evaluate the gradient. If set to a positive integer
+        # (e.g. 1024), value() returns the nearest of that many
+        # evenly spaced precomputed samples instead of interpolating
+        # exactly, making every lookup O(1).
+        # Default: 0 (disabled)
+        self.lutSize = 0
+
+        # Sorted keys/values (and lookup table) of the data dict
+        # cached by _compile(). Rebuilt whenever the data changes.
+        self._compiled = None
+
 
     def copy(self):
         # Copy according to superclass first
@@ -254,6 +266,7 @@ class Gradient(morpho.Figure):
 
         # Copy the non-tweenable attributes manually
         new.cycle = self.cycle
+        new.lutSize = self.lutSize
 
         return new
 
@@ -277,6 +290,7 @@ class Gradient(morpho.Figure):
 
     def __setitem__(self, key, value):
         self.data[key] = value
+        self._compiled = None
 
     def __iter__(self):
         return iter(self.data)
@@ -284,6 +298,66 @@ class Gradient(morpho.Figure):
     def __len__(self):
         return len(self.data)
 
+    # Mainly for internal use by value().
+    # Returns a tuple (snapshot, lutSize, keys, values, arrays, lut)
+    # where `keys` and `values` are lists of the data dict's keys and
+    # values sorted by key. The tuple is cached and only rebuilt if
+    # the contents of `data` (or `lutSize`) have changed since the
+    # last call, so the data dict can still be freely modified.
+    #
+    # `arrays` is initially None and is filled in by _arrays() the
+    # first time the gradient is evaluated on a numpy array.
+    # `lut` is the tuple (lutList, lutArray) of lookup table entries
+    # or None if lutSize is 0 or the gradient has only one key.
+    def _compile(self):
+        items = tuple(self.data.items())
+        compiled = self._compiled
+        if compiled is not None and compiled[1] == self.lutSize:
+            try:
+                if compiled[0] == items:
+                    return compiled
+            except ValueError:  # Values that can't be compared (e.g. numpy arrays)
+                pass
+
+        pairs = sorted(items, key=lambda item: item[0])
+        keys = [key for key, value in pairs]
+        values = [value for key, value in pairs]
+
+        # Record copies of the values so that in-place modifications
+        # of list values also trigger a rebuild.
+        snapshot = tuple((key, list(value) if isinstance(value, list) else value)
+            for key, value in items)
+
+        compiled = [snapshot, self.lutSize, keys, values, None, None]
+        self._compiled = compiled
+        if self.lutSize > 0 and len(keys) > 1:
+            keyArray, valueArray = self._arrays()
+            lutArray = morpho.matrix.interpVectors(
+                np.linspace(keys[0], keys[-1], self.lutSize), keyArray, valueArray
+                )
+            if isinstance(values[0], list) or isinstance(values[0], tuple):
+                lutList = [type(values[0])(row) for row in lutArray.tolist()]
+            else:
+                lutList = lutArray.tolist()
+            compiled[5] = (lutList, lutArray)
+        return compiled
+
+    # Mainly for internal use.
+    # Returns the sorted keys and values of the gradient as numpy
+    # arrays suitable for morpho.matrix.interpVectors().
+    def _arrays(self):
+        compiled = self._compile()
+        if compiled[4] is None:
+            compiled[4] = (np.array(compiled[2], dtype=float), np.array(compiled[3]))
+        return compiled[4]
+
+    # Mainly for internal use.
+    # Returns the lookup table indices corresponding to the
+    # given x value(s).
+    @staticmethod
+    def _lutIndex(x, keys, lutSize):
+        return (x - keys[0]) * ((lutSize-1)/(keys[-1]-keys[0])) + 0.5
+
     # Returns the interpolated gradient value at the specified x in [0,1]
     # x can optionally be a 1D numpy array in which case the gradient is
     # evaluated on each x element-wise and the result is returned as a
@@ -295,39 +369,45 @@ class Gradient(morpho.Figure):
         if isinstance(x, np.ndarray):
             return self._valueArray(x)
 
-        keylist = sorted(list(self.data.keys()))
+        _, _, keylist, values, _, lut = self._compile()
 
         x = float(x)  # Convert to python float
 
-        # If the given parameter is a key in the dict, just return the value
-        if x in keylist:
-            return self.data[x]
+        # Read off the nearest lookup table entry if enabled
+        if lut is not None:
+            lutList = lut[0]
+            n = int(self._lutIndex(x, keylist, len(lutList)))
+            return lutList[min(max(n, 0), len(lutList)-1)]
 
         # Compute the latest key
         k = listfloor(keylist, x)
-        if k == -1: return self.data[keylist[0]]
+        if k == -1: return values[0]
         key = keylist[k]
 
         # Grab latest value
-        keyval = self.data[key]
+        keyval = values[k]
 
-        if key == keylist[-1]:
+        # If the given parameter is a key in the dict, just return the value
+        if key == x or k == len(keylist)-1:
             return keyval
         else:
             key2 = keylist[k+1]
-            keyval2 = self.data[key2]
+            keyval2 = values[k+1]
             if isinstance(keyval, list) or isinstance(keyval, tuple):
                 return type(keyval)(map(morpho.numTween, keyval, keyval2, ((x-key)/(key2-key),)*len(keyval)))
             else:
                 return morpho.numTween(keyval, keyval2, x, start=key, end=key2)
 
     def _valueArray(self, x):
-        # Extract the keypoints and unzip them into two separate lists
-        # of the keys and values
-        pairs = list(self.data.items())
-        pairs.sort()
-        xp, fp = zip(*pairs)
-
+        compiled = self._compile()
+        lut = compiled[5]
+        if lut is not None:
+            lutArray = lut[1]
+            index = self._lutIndex(x, compiled[2], len(lutArray))
+            index = np.clip(index, 0, len(lutArray)-1).astype(int)
+            return lutArray[index]
+
+        xp, fp = self._arrays()
         return morpho.matrix.interpVectors(x, xp, fp)
 
 
@@ -496,6 +576,7 @@ class Gradient(morpho.Figure):
         # Construct tweened Gradient figure
         tw = type(self)(data)  # Using type(self) instead of explicit Gradient() for sake of possible inheritance
         tw.cycle = self.cycle
+        tw.lutSize = self.lutSize
 
         return tw
 
@@ -21,6 +21,7 @@ from morpholib.tools.basics import *
 
 import math, cmath
 import numpy as np
+from collections import OrderedDict
 
 # Alias for `set` because the name gets overridden
 # in the Figure class
@@ -29,6 +30,12 @@ pyset = set
 # Set of all Figure metasetting names
 METASETTINGS = {"transition", "visible", "static", "delay", "_static_acute"}
 
+# Maximum number of elements passed to a vectorized function in
+# a single call by fimage(). Evaluating in chunks bounds the memory
+# used by intermediate arrays. Set to None to always pass every
+# element in one call.
+fimageChunkSize = 2**18
+
 
 ### CLASSES ###
 
@@ -122,6 +129,8 @@ class Figure(object):
 
         # A function that modifies (a copy of) the figure before
         # its draw() method is called in an animation.
+        # See modifiesOnly() for how to make this cheaper on
+        # complex figures.
         self.modifier = None
 
 
@@ -336,6 +345,51 @@ class Figure(object):
 
         return new
 
+    # Mainly for internal use by applyFigureModifier().
+    # Returns a shallow copy of the figure in which only the
+    # attributes named in the collection `names` are deep copied.
+    # All other tweenable values, nontweenables, and plain
+    # attributes are shared with the original figure, so they can
+    # be safely reassigned on the copy, but should NOT be mutated
+    # in place.
+    # A name can also refer to a property backed by a private
+    # tweenable (e.g. "transform" for "_transform"), and naming a
+    # tweenable with the "figures" tag copies its subfigures too.
+    def _copyOnWrite(self, names):
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+
+        # Each tweenable needs its own Tweenable object so that
+        # reassigning its value on the copy leaves the original
+        # alone, but only the named ones get their values copied.
+        deepnames = pyset(names)
+        deepnames.update("_"+name for name in names)
+        new.__dict__["_state"] = {
+            name: tweenable.copy(deep=(name in deepnames))
+            for name, tweenable in self._state.items()
+            }
+        new.__dict__["_nontweenables"] = self._nontweenables.copy()
+
+        # Copy the subfigures of any named figure lists
+        for name in deepnames:
+            tweenable = new._state.get(name, None)
+            if tweenable is not None and "figures" in tweenable.tags:
+                subfigs = tweenable.value
+                for i, subfig in enumerate(subfigs):
+                    subfigs[i] = subfig.copy()
+
+        # Copy any named nontweenables or plain attributes
+        for name in names:
+            if name in self._state or name not in new.__dict__:
+                continue
+            value = new.__dict__[name]
+            try:
+                new.__dict__[name] = value.copy()
+            except Exception:  # Upon failure, just keep the shared value.
+                pass
+
+        return new
+
     # Like copy, but the returned figure has default metasettings,
     # i.e. settings like `visible`, `static`, `tweenMethod`,
     # `transition`, `modifier`, `delay` will all be set to their
@@ -537,7 +591,12 @@ class Figure(object):
     # Function image. Returns a new figure whose tweenables that contain
     # the tags "complex" or "fimage" become the result of evaluating the
     # given func.
-    def fimage(self, func):
+    #
+    # If `vectorized` is set to True, func is called on whole arrays
+    # of list elements at once instead of once per element. See
+    # vectorizedImage() for details. Optionally specify `chunksize` to
+    # override the module-level default `fimageChunkSize`.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
         newfig = self.copy()
 
         for tweenable in self._state.values():
@@ -547,6 +606,11 @@ class Figure(object):
             if "complex" in tweenable.tags or "fimage" in tweenable.tags:
                 if "list" in tweenable.tags:
                     A = tweenable.value
+                    if vectorized and len(A) > 0:
+                        image = vectorizedImage(func, A, chunksize)
+                        newfig._state[tweenable.name].value[:] = \
+                            image.tolist() if image.ndim == 1 else list(image)
+                        continue
                     for i in range(len(A)):
                         newfig._state[tweenable.name].value[i] = func(tweenable.value[i])
                 else:
@@ -1368,6 +1432,74 @@ class SpaceFigure(Figure):
         # prim.draw(camera, ctx)
 
 
+# Decorator generator returns a primitives() method for space
+# figures whose primitives can be built from a single array of
+# projected 3D points. Such figures must implement two methods:
+#
+# _spaceVertices() returns an (N x 3) array of the 3D points
+#       (one per row) that need to be projected by the camera.
+#       It may return an empty array if there is nothing to draw.
+#       It may also return None if the figure can't currently be
+#       handled this way, in which case the given fallback
+#       primitives() function is called instead.
+# _projectedPrimitives(camera, array) takes the (N x 3) array of
+#       projected points and returns the list of 2D primitives.
+#
+# This lets SpaceLayer gather the points of all such figures into
+# one buffer and project them all with a single matrix product.
+# Since the returned method is marked with the attribute
+# `projectable`, subclasses that override primitives() normally
+# are never batched by SpaceLayer.
+#
+# Example usage:
+#   primitives = morpho.projectedPrimitives()
+# or with a fallback:
+#   @morpho.projectedPrimitives
+#   def primitives(self, camera):
+#       etc.
+def projectedPrimitives(fallback=None):
+    def primitives(self, camera):
+        array = self._spaceVertices()
+        if array is None:
+            return fallback(self, camera)
+        return self._projectedPrimitives(camera, camera.project(array))
+    primitives.projectable = True
+    return primitives
+
+# Evaluates a vectorized function on an array of values (or a list
+# of numbers or vectors) and returns the array of outputs. Mainly
+# used by fimage() methods when called with vectorized=True.
+#
+# A 1D array of N numbers (e.g. complex positions) is passed to func
+# as is. An (N x d) array of N vectors is passed to func transposed
+# as a (d x N) array whose columns are the vectors (so a function
+# written like `lambda v: mo.array([v[0], v[1], v[0]*v[1]])` works
+# unchanged), and func should return an array of the same form.
+# The outputs are returned in the same layout as the input.
+#
+# The values are passed to func in chunks of at most `chunksize`
+# elements (defaults to the module-level `fimageChunkSize`).
+# Outputs that don't depend on the input (e.g. a constant) are
+# broadcast to every element.
+def vectorizedImage(func, values, chunksize=None):
+    values = np.asarray(values)
+    if chunksize is None:
+        chunksize = len(values) if fimageChunkSize is None else fimageChunkSize
+    chunksize = max(1, chunksize)
+    vector = (values.ndim > 1)
+
+    images = []
+    for start in range(0, len(values), chunksize):
+        chunk = values[start:start+chunksize]
+        image = np.asarray(func(chunk.T if vector else chunk))
+        if vector:
+            image = image.T
+        if image.ndim < chunk.ndim:
+            image = np.broadcast_to(image, (len(chunk),) + image.shape)
+        images.append(image)
+    return np.concatenate(images) if len(images) > 1 else np.array(images[0])
+
+
 ### OTHER RELATED FUNCTIONS ###
 
 # Decorator generator returns a decorator that can be used on
@@ -1404,6 +1536,106 @@ def pivotTweenMethod(methodGenerator, angle, *args, **kwargs):
         return pivotTween
     return decorator
 
+# Decorator generator that declares which attributes of a figure
+# a modifier function touches. When a modifier is declared this
+# way, the figure no longer needs to be fully copied before the
+# modifier is applied during playback. Only the named attributes
+# are copied and everything else is shared with the keyfigure,
+# which can save a lot of time for complex figures like
+# LaTeX MultiSplines.
+#
+# Example usage:
+#   @morpho.modifiesOnly("pos", "color")
+#   def nudge(fig):
+#       fig.pos = fig.pos + 0.1j
+#       fig.color = [1, 0, 0]
+#   mytext.last().modifier = nudge
+#
+# The modifier is free to reassign ANY attribute of the figure,
+# but it must only mutate in place (e.g. `fig.pos[0] = 0` or
+# `fig.figures[1].color = ...`) the attributes it names.
+# Mutating an undeclared attribute in place will end up
+# modifying the keyfigure itself. Naming a list of subfigures
+# (e.g. "figures" for a Frame or MultiFigure) copies each
+# subfigure in full.
+def modifiesOnly(*names):
+    def decorator(modifier):
+        modifier.modifiedAttributes = frozenset(names)
+        return modifier
+    return decorator
+
+
+### TWEEN CACHE ###
+
+# Byte budget shared by the tween caches of all actors.
+# While an animation is playing, tweened figures computed by
+# Actor.time() for drawing layers are remembered per actor (keyed by the latest keyID
+# and the frame index) so that replays and repeated lookups of the
+# same frame don't need to tween again. Once the estimated size of
+# all the cached figures exceeds this budget, the least recently
+# used ones are evicted. Set to 0 to disable tween caching.
+tweenCacheBudget = 256*2**20  # 256 MB
+
+# Mainly for internal use.
+# Global LRU bookkeeping of the actor tween caches. Maps
+# (actor, keyID, f) to the estimated size of the cached figure in
+# bytes, ordered from least to most recently used.
+_tweenCacheLRU = OrderedDict()
+_tweenCacheStats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+# Returns a dict of statistics about the actor tween caches:
+# hits, misses, evictions, the current number of entries,
+# and their estimated total size in bytes.
+def tweenCacheStats():
+    stats = _tweenCacheStats.copy()
+    stats["entries"] = len(_tweenCacheLRU)
+    return stats
+
+# Empties the tween caches of every actor.
+# Set optional keyword `resetStats` to True to also reset the
+# counters reported by tweenCacheStats().
+def clearTweenCache(*, resetStats=False):
+    for actor, keyID, f in _tweenCacheLRU:
+        actor._tweenCache.pop((keyID, f), None)
+    _tweenCacheLRU.clear()
+    _tweenCacheStats["bytes"] = 0
+    if resetStats:
+        _tweenCacheStats.update(hits=0, misses=0, evictions=0)
+
+# Mainly for internal use.
+# Returns a rough estimate of the memory used by the given figure
+# in bytes, counting the buffers of np.array tweenables and
+# recursing into subfigures.
+def _figureNbytes(fig):
+    total = 512  # Approximate overhead of the figure and its state
+    for tweenable in fig._state.values():
+        value = tweenable.value
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+        elif isinstance(value, Figure):
+            total += _figureNbytes(value)
+        elif isinstance(value, (list, tuple, pyset)):
+            for item in value:
+                if isinstance(item, Figure):
+                    total += _figureNbytes(item)
+                elif isinstance(item, np.ndarray):
+                    total += item.nbytes
+                else:
+                    total += 32
+        else:
+            total += 32
+    return total
+
+# Mainly for internal use.
+# Evicts least recently used tween cache entries until the
+# total estimated size is within the budget.
+def _enforceTweenCacheBudget():
+    while _tweenCacheStats["bytes"] > tweenCacheBudget and len(_tweenCacheLRU) > 0:
+        (actor, keyID, f), nbytes = _tweenCacheLRU.popitem(last=False)
+        actor._tweenCache.pop((keyID, f), None)
+        _tweenCacheStats["bytes"] -= nbytes
+        _tweenCacheStats["evictions"] += 1
+
 
 # A higher-level structure that collects figures of a common type and
 # places them into a timeline.
@@ -1442,6 +1674,10 @@ class Actor(object):
         # the update() method afterward so that self.keyIDs is updated.
         self.timeline = {}
         self.keyIDs = []  # A sorted list of the timeline's keyindices.
+        # Dict mapping (keyID, f) to tweened figures. Mainly used
+        # by time() while an animation is running.
+        # See `tweenCacheBudget`.
+        self._tweenCache = dict()
 
         # If supplied an actual figure, initialize the Actor by
         # assigning the given figure to index zero.
@@ -1471,6 +1707,53 @@ class Actor(object):
         self.keyIDs = list(self.timeline.keys())
         self.keyIDs.sort()
         self._updateOwnerships()
+        self.clearTweenCache()
+
+    # Empties the cache of tweened figures of this actor.
+    # This happens automatically whenever the timeline changes
+    # or an animation begins playing or exporting, but should be
+    # called manually if keyfigures are modified in place while an
+    # animation is running.
+    def clearTweenCache(self):
+        for keyID, f in self._tweenCache:
+            nbytes = _tweenCacheLRU.pop((self, keyID, f), 0)
+            _tweenCacheStats["bytes"] -= nbytes
+        self._tweenCache.clear()
+
+    # Mainly for internal use by time().
+    # Returns the tween of the given keyfigures at the frame index f,
+    # reusing a previously computed one if possible while the
+    # actor's animation is playing. The returned figure has the
+    # same owner as `keyfig`, and since it may be shared with
+    # later calls, it must NOT be modified by the caller.
+    def _cachedTween(self, keyfig, keyfig2, keyID, nextKeyID, f, T):
+        # Only cache during interactive playback. When exporting,
+        # every frame is drawn once, so the cache would never hit.
+        try:
+            playing = self.owner.owner._playing
+        except AttributeError:
+            playing = False
+        if not playing or tweenCacheBudget <= 0:
+            return keyfig.tween(keyfig2, T).set(owner=keyfig.owner)
+
+        entry = self._tweenCache.get((keyID, f), None)
+        # Make sure the keyfigures weren't replaced since caching
+        if entry is not None and entry[0] is keyfig and entry[1] is keyfig2 \
+            and entry[2] == nextKeyID and entry[3].owner is keyfig.owner:
+
+            _tweenCacheLRU.move_to_end((self, keyID, f))
+            _tweenCacheStats["hits"] += 1
+            return entry[3]
+
+        _tweenCacheStats["misses"] += 1
+        fig = keyfig.tween(keyfig2, T).set(owner=keyfig.owner)
+        nbytes = _figureNbytes(fig)
+        if nbytes <= tweenCacheBudget:
+            self._tweenCache[(keyID, f)] = (keyfig, keyfig2, nextKeyID, fig)
+            _tweenCacheStats["bytes"] += nbytes - _tweenCacheLRU.pop((self, keyID, f), 0)
+            _tweenCacheLRU[(self, keyID, f)] = nbytes
+            _enforceTweenCacheBudget()
+        return fig
 
     # Assigns this actor to the `owner` attribute of all
     # component figures.
@@ -2224,9 +2507,16 @@ class Actor(object):
     # If `keepOwner` is set to True, the returned figure will
     # be guaranteed to possess the same owner as its principle
     # keyfigure. This is mainly for internal use.
+    #
+    # `_useTweenCache` is a hidden keyword-only argument mainly
+    # for internal use by Layer.draw() which allows a tweened
+    # figure to be taken from the actor's tween cache while the
+    # animation is playing. It is only honored together with
+    # `keepOwner=True` and `copykeys=False`, and the caller
+    # promises not to modify the returned figure.
     def time(self, f, keyID=None, *,
             copykeys=False, _skipTrivialTweens=False,
-            keepOwner=False):
+            keepOwner=False, _useTweenCache=False):
         # If f is a float, but it's really an int, make it an int.
         # This is so searching the timeline dict is done correctly
         # because all the keys in the dict are ints.
@@ -2275,7 +2565,10 @@ class Actor(object):
                 end=self.keyIDs[k+1]
                 )
             # assert 0 <= T <= 1  # Temporary for testing purposes
-            return keyfig.tween(keyfig2, T).set(owner=(keyfig.owner if keepOwner else None))
+            if _useTweenCache and keepOwner and not copykeys:
+                return self._cachedTween(keyfig, keyfig2, keyID, self.keyIDs[k+1], f, T)
+            fig = keyfig.tween(keyfig2, T)
+            return fig.set(owner=(keyfig.owner if keepOwner else None))
 
     # Alternate name for the time method.
     # frame = time
@@ -2499,7 +2792,8 @@ class _KeyIDContainer(object):
 # exists and returns the modified figure.
 # By default, if the figure has no modifier, it is returned
 # without being copied. Otherwise, a copy is created,
-# modified, and returned.
+# modified, and returned. If the modifier was declared with
+# modifiesOnly(), the copy only copies the declared attributes.
 # But if optional keyword `forceOrig=True`, then a copy will
 # not be made, and the original figure will be modified.
 def applyFigureModifier(fig, *, forceOrig=False):
@@ -2516,7 +2810,11 @@ def applyFigureModifier(fig, *, forceOrig=False):
         # copying complex figures like LaTeX MultiSplines
         # can be slow.
         fig_orig = fig
-        fig = fig.copy()
+        names = getattr(fig.modifier, "modifiedAttributes", None)
+        if names is None:
+            fig = fig.copy()
+        else:
+            fig = fig._copyOnWrite(names)
         # Assign copy's owner to be the original figure's owner.
         # This is technically a lie, but it's important to make
         # things like Text.box() work. I think it's okay to lie
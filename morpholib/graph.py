@@ -8,6 +8,8 @@ import morpholib.transitions
 import pyglet as pg
 pyglet = pg
 from cmath import exp
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 
@@ -88,6 +90,19 @@ def flowStreamer(p0, vfield, tstart=0, tend=1, *,
     rtol=1e-5, atol=1e-6, steps=50,
     _3dmode=False, **kwargs):
 
+    PathType = morpho.grid.SpacePath if _3dmode else morpho.grid.Path
+    path = PathType(_solveStreamer(p0, vfield, tstart, tend, rtol, atol, steps, _3dmode).tolist())
+    path.set(**kwargs)
+    return path
+
+def flowStreamer3d(*args, **kwargs):
+    return flowStreamer(*args, _3dmode=True, **kwargs)
+
+# Mainly for internal use.
+# Solves for the flow of a single point using scipy's solve_ivp()
+# and returns the positions at the steps+1 evenly spaced times
+# as an array (complex in 2D, (steps+1) x 3 in 3D).
+def _solveStreamer(p0, vfield, tstart, tend, rtol, atol, steps, _3dmode):
     try:
         from scipy.integrate import solve_ivp
     except ModuleNotFoundError:
@@ -99,14 +114,196 @@ def flowStreamer(p0, vfield, tstart=0, tend=1, *,
         t_eval=np.linspace(tstart, tend, steps+1),
         rtol=rtol, atol=atol
         )
+    return sol.y.T.squeeze()
+
+# Mainly for internal use by integrateFlow().
+# Solves for the flows of a list of points one at a time.
+# Defined at module level so it can be sent to worker processes.
+def _solveStreamers(points, vfield, tstart, tend, rtol, atol, steps, _3dmode):
+    return [_solveStreamer(p0, vfield, tstart, tend, rtol, atol, steps, _3dmode) for p0 in points]
+
+# Coefficients of the Dormand-Prince 5(4) method. The nodes and
+# Butcher tableau rows are for the stages after the first; the
+# final row of weights gives the error estimate of a step, which
+# also uses the derivative at the new point.
+_DOPRI_C = [1/5, 3/10, 4/5, 8/9, 1]
+_DOPRI_A = [
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]
+    ]
+_DOPRI_B = [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]
+_DOPRI_E = [71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40]
+
+# Mainly for internal use by _integrateBatch().
+# Performs one Dormand-Prince step of size h from (t,y) given the
+# derivative k1 = F(t,y). Returns the new state, its local error
+# estimate, and the derivative at the new state.
+def _dopriStep(F, t, y, h, k1):
+    ks = [k1]
+    for c, a in zip(_DOPRI_C, _DOPRI_A):
+        ks.append(F(t + c*h, y + h*sum(coef*k for coef, k in zip(a, ks))))
+    ynew = y + h*sum(b*k for b, k in zip(_DOPRI_B, ks))
+    ks.append(F(t + h, ynew))
+    error = h*sum(e*k for e, k in zip(_DOPRI_E, ks))
+    return ynew, error, ks[-1]
+
+# Mainly for internal use by _integrateBatch().
+# Performs one classical Runge-Kutta step of size h from (t,y).
+def _rk4Step(F, t, y, h):
+    k1 = F(t, y)
+    k2 = F(t + h/2, y + h/2*k1)
+    k3 = F(t + h/2, y + h/2*k2)
+    k4 = F(t + h, y + h*k3)
+    return y + h/6*(k1 + 2*k2 + 2*k3 + k4)
+
+# Mainly for internal use by integrateFlow().
+# Advances the state array y0 (holding every seed at once) along the
+# vectorized derivative function F(t,y) and returns the list of states
+# at each of the given times.
+#
+# "RK4" takes `substeps` fixed steps between consecutive times.
+# "RK45" is the adaptive Dormand-Prince method, where all seeds share
+# a common step size chosen so that the worst seed meets the error
+# tolerance. Seeds whose positions blow up to inf or nan are ignored
+# when choosing the step size.
+def _integrateBatch(F, y0, times, method, rtol, atol, substeps):
+    y = y0
+    states = [y]
+
+    if method == "RK4":
+        for t0, t1 in zip(times[:-1], times[1:]):
+            h = (t1 - t0)/substeps
+            for m in range(substeps):
+                y = _rk4Step(F, t0 + m*h, y, h)
+            states.append(y)
+        return states
+    elif method != "RK45":
+        raise ValueError(f'Unrecognized integration method "{method}"')
+
+    span = times[-1] - times[0]
+    if span == 0:
+        return states*len(times)
+    direction = 1 if span > 0 else -1
+    minStep = 1e-10*abs(span)
+
+    t = times[0]
+    h = abs(span)/(len(times) - 1)
+    k1 = F(t, y)
+    for t1 in times[1:]:
+        while abs(t1 - t) > minStep:
+            step = direction*min(h, abs(t1 - t))
+            ynew, error, k7 = _dopriStep(F, t, y, step, k1)
+            with np.errstate(invalid="ignore", over="ignore"):
+                ratio = np.abs(error)/(atol + rtol*np.maximum(np.abs(y), np.abs(ynew)))
+            ratio = ratio[np.isfinite(ratio)]
+            err = ratio.max().tolist() if ratio.size > 0 else 0
+
+            if err <= 1 or abs(step) <= minStep:
+                t = t + step
+                y, k1 = ynew, k7
+            # Standard step size control with a safety factor
+            factor = 10 if err == 0 else min(10, max(0.2, 0.9*err**(-1/5)))
+            h = abs(step)*factor
+        t = t1
+        states.append(y)
+    return states
+
+# Computes the flows of many points along a velocity field at once.
+# Returns a sequence of N arrays where the nth array is the path
+# traced out by the nth point: an array of complex positions in 2D,
+# or an array of shape (M, 3) in 3D.
+# When vectorized, the paths all have steps+1 positions and are
+# returned as the rows of a single array. Otherwise, a list of
+# arrays is returned, since solve_ivp() may stop early for some
+# points (e.g. if the flow blows up), making their paths shorter.
+#
+# INPUTS
+# points = List of N initial points (complex numbers, or 3-vectors in 3D)
+# vfield = Velocity field. See flowStreamer() for details.
+# tstart = Initial time value. Default: 0
+# tend = Final time value. Default: 1
+#
+# KEYWORD ONLY INPUTS
+# rtol, atol, steps = Same as for flowStreamer()
+# vectorized = Boolean indicating whether vfield can act on every point
+#       at once. If True, all points are integrated together, with
+#       vfield(t,z) taking an array of N complex numbers in 2D, or
+#       a (3 x N) array whose columns are the points in 3D (the same
+#       convention as scipy's solve_ivp()), and returning an array of
+#       velocities of the same shape. Default: False
+# method = Integration method used when vectorized. Either "RK45"
+#          (adaptive Dormand-Prince obeying rtol and atol) or "RK4"
+#          (fixed step Runge-Kutta). Default: "RK45"
+# substeps = Number of RK4 steps taken per output step. Default: 4
+# processes = Number of worker processes used to integrate the points
+#       individually with solve_ivp() when not vectorized. Set to None
+#       to use every CPU. Note that vfield must then be picklable
+#       (i.e. defined at the top level of a module). Default: 1
+def integrateFlow(points, vfield, tstart=0, tend=1, *,
+    rtol=1e-5, atol=1e-6, steps=50, vectorized=False,
+    method="RK45", substeps=4, processes=1, _3dmode=False):
+
+    dtype = float if _3dmode else complex
+    if vectorized:
+        if _3dmode:
+            y0 = np.array(points, dtype=float).reshape(-1,3).T
+        else:
+            y0 = np.array(points, dtype=complex).reshape(-1)
+
+        def F(t, y):
+            return np.broadcast_to(np.asarray(vfield(t, y), dtype=dtype), y.shape)
+
+        states = _integrateBatch(F, y0, np.linspace(tstart, tend, steps+1).tolist(),
+            method, rtol, atol, substeps)
+        states = np.array(states)
+        # Reorder axes so each row is one point's path
+        return states.transpose(2,0,1) if _3dmode else states.T
+
+    points = list(points)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    options = (vfield, tstart, tend, rtol, atol, steps, _3dmode)
+    if processes > 1 and len(points) > 1:
+        chunksize = -(-len(points) // (4*processes))
+        with ProcessPoolExecutor(processes) as executor:
+            futures = [
+                executor.submit(_solveStreamers, points[n:n+chunksize], *options)
+                for n in range(0, len(points), chunksize)
+                ]
+            solutions = [sol for future in futures for sol in future.result()]
+    else:
+        solutions = _solveStreamers(points, *options)
+    return [np.asarray(sol, dtype=dtype) for sol in solutions]
+
+# Same as flowStreamer(), but takes a list of initial points and
+# returns a list of streamer paths, one for each point. The flows
+# are computed using integrateFlow(), so it also accepts the keyword
+# inputs `vectorized`, `method`, `substeps`, and `processes`.
+# Any additional keyword arguments are set as attributes of each
+# returned path.
+def flowStreamers(points, vfield, tstart=0, tend=1, *,
+    rtol=1e-5, atol=1e-6, steps=50, vectorized=False,
+    method="RK45", substeps=4, processes=1,
+    _3dmode=False, **kwargs):
+
+    flows = integrateFlow(points, vfield, tstart, tend,
+        rtol=rtol, atol=atol, steps=steps, vectorized=vectorized,
+        method=method, substeps=substeps, processes=processes,
+        _3dmode=_3dmode)
 
     PathType = morpho.grid.SpacePath if _3dmode else morpho.grid.Path
-    path = PathType(sol.y.T.squeeze().tolist())
-    path.set(**kwargs)
-    return path
+    paths = []
+    for flow in flows:
+        path = PathType(flow.tolist())
+        path.set(**kwargs)
+        paths.append(path)
+    return paths
 
-def flowStreamer3d(*args, **kwargs):
-    return flowStreamer(*args, _3dmode=True, **kwargs)
+def flowStreamers3d(*args, **kwargs):
+    return flowStreamers(*args, _3dmode=True, **kwargs)
 
 
 # Mainly for internal use.
@@ -148,8 +345,10 @@ class SpaceFlowFrame(FlowFrameBase, morpho.SpaceFrame):
 #              moment. Default: 0.5 (display half a cycle)
 # transition = Transition function to use for each streamer.
 #              Default: Uniform transition
-# Any additional inputs will be passed to flowStreamer() for the
-# construction of each individual streamer.
+# Any additional inputs will be passed to flowStreamers() for the
+# construction of the streamers. In particular, passing
+# vectorized=True integrates every streamer at once, which is much
+# faster for dense fields. See integrateFlow() for details.
 class FlowField(morpho.Layer):
     _frameType = FlowFrame
 
@@ -175,12 +374,15 @@ class FlowField(morpho.Layer):
         elif not isinstance(offset, (list, tuple)):
             offset = [offset]
 
-        makeStreamer = flowStreamer3d if _3dmode else flowStreamer
+        # Every offset shares the same paths, so each point's
+        # flow only needs to be computed once.
+        makeStreamers = flowStreamers3d if _3dmode else flowStreamers
+        paths = makeStreamers(points, *args, **kwargs)
         streamers = []
 
         for shift in offset:
-            for n,z in enumerate(points):
-                streamer = makeStreamer(z, *args, **kwargs)
+            for n,path in enumerate(paths):
+                streamer = path.copy()
                 streamer.start = n*stagger + shift
                 streamer.end = streamer.start + sectorSize
                 streamer.transition = transition
@@ -13,9 +13,213 @@ import cairo
 cr = cairo
 
 import numpy as np
+import os, hashlib, inspect
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 I2 = np.identity(2)
 
+### IMAGE SURFACE POOL ###
+
+# Image files loaded by Image figures are decoded into cairo
+# surfaces which are kept in a process-wide pool shared by all
+# Image figures, so multiple figures (or multiple frames of an
+# animation) pointing to the same image file only decode it once.
+# Surfaces are keyed by (filepath, modification time, frame index)
+# so that edits to an image file are picked up.
+
+# Maximum total size in bytes of the decoded surfaces kept in
+# the pool. Least recently used surfaces are discarded first.
+# Default: 512 MiB
+surfacePoolSize = 512*2**20
+
+_surfacePool = OrderedDict()
+_surfacePoolBytes = 0
+
+# Dict mapping (filepath, mtime) to (frameCount, width, height)
+# so that image file headers only need to be read once.
+_imageInfoCache = dict()
+
+# Empties the image surface pool.
+def clearSurfacePool():
+    global _surfacePoolBytes
+    _surfacePool.clear()
+    _imageInfoCache.clear()
+    _surfacePoolBytes = 0
+
+# Mainly for internal use.
+# Converts the currently selected frame of a PIL image into a
+# cairo ARGB32 ImageSurface by writing premultiplied pixel data
+# directly into the surface's memory.
+def _surfaceFromPIL(img):
+    rgba = np.asarray(img.convert("RGBA"), dtype="uint32")
+    height, width = rgba.shape[:2]
+    alpha = rgba[:,:,3]
+    # Premultiply by alpha (rounding to nearest)
+    rgb = (rgba[:,:,:3]*alpha[:,:,None] + 127) // 255
+    argb = (alpha << 24) | (rgb[:,:,0] << 16) | (rgb[:,:,1] << 8) | rgb[:,:,2]
+
+    surface = cr.ImageSurface(cr.FORMAT_ARGB32, width, height)
+    surface.flush()
+    stride = surface.get_stride()
+    buffer = np.ndarray(shape=(height, stride//4), dtype="uint32",
+        buffer=surface.get_data())
+    buffer[:,:width] = argb
+    surface.mark_dirty()
+    return surface
+
+# Mainly for internal use.
+# Returns the tuple (frameCount, width, height) for the given
+# image file, reading only the file's header.
+def _imageInfo(path, mtime):
+    key = (path, mtime)
+    try:
+        return _imageInfoCache[key]
+    except KeyError:
+        pass
+
+    from PIL import Image as PIL_Image
+    with PIL_Image.open(path) as img:
+        info = (getattr(img, "n_frames", 1), img.width, img.height)
+    _imageInfoCache[key] = info
+    return info
+
+# Mainly for internal use.
+# Returns the decoded surface of the given frame of the given
+# image file, decoding it and adding it to the pool if it's not
+# already there.
+def _pooledSurface(path, mtime, index):
+    global _surfacePoolBytes
+    key = (path, mtime, index)
+    try:
+        surface = _surfacePool[key]
+    except KeyError:
+        pass
+    else:
+        _surfacePool.move_to_end(key)
+        return surface
+
+    if path.lower().endswith("png"):
+        surface = cr.ImageSurface.create_from_png(path)
+    else:
+        from PIL import Image as PIL_Image
+        with PIL_Image.open(path) as img:
+            img.seek(index)
+            surface = _surfaceFromPIL(img)
+
+    _surfacePool[key] = surface
+    _surfacePoolBytes += surface.get_stride()*surface.get_height()
+    # Evict least recently used surfaces (but always keep the
+    # newest one even if it's bigger than the pool).
+    while _surfacePoolBytes > surfacePoolSize and len(_surfacePool) > 1:
+        _, oldSurface = _surfacePool.popitem(last=False)
+        _surfacePoolBytes -= oldSurface.get_stride()*oldSurface.get_height()
+    return surface
+
+# Placeholder for a frame of an image file that has not been
+# decoded yet. Image figures store it in place of an actual
+# cairo surface and only decode it (via the surface pool) the
+# first time the surface is actually needed, which is usually
+# the first time the figure is drawn.
+class _LazySurface(object):
+    __slots__ = ("key", "width", "height")
+
+    def __init__(self, path, mtime, index, width, height):
+        self.key = (path, mtime, index)
+        self.width = width
+        self.height = height
+
+    def resolve(self):
+        return _pooledSurface(*self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, _LazySurface):
+            return self.key == other.key
+        return other is not None and _surfacePool.get(self.key, None) is other
+
+    def __hash__(self):
+        return hash(self.key)
+
+# Mainly for internal use.
+# Given the filepath for an image file and a selector of frame
+# indices, returns a list of _LazySurface objects corresponding
+# to the selected frames. Nothing is decoded.
+#
+# PNG files are always treated as single-frame images.
+def _lazySurfacesFromFile(source, frame=0):
+    path = os.path.abspath(source)
+    mtime = os.path.getmtime(path)
+    frameCount, width, height = _imageInfo(path, mtime)
+    if path.lower().endswith("png"):
+        selection = [0]
+    else:
+        selection = listselect(range(frameCount), frame).values()
+    return [_LazySurface(path, mtime, index, width, height) for index in selection]
+
+### MIPMAPS ###
+
+# Mainly for internal use.
+# Returns a new ARGB32 surface half the width and height of the
+# given one (rounded up), where every pixel is the average of the
+# corresponding 2x2 block of pixels in the original surface.
+# Odd dimensions are handled by repeating the final row/column.
+def _halfSurface(surface):
+    surface.flush()
+    width = surface.get_width()
+    height = surface.get_height()
+    data = np.ndarray(shape=(height, surface.get_stride()), dtype="uint8",
+        buffer=surface.get_data())
+    data = data[:, :4*width].reshape(height, width, 4).astype("uint16")
+    if height % 2 == 1:
+        data = np.concatenate((data, data[-1:]), axis=0)
+    if width % 2 == 1:
+        data = np.concatenate((data, data[:,-1:]), axis=1)
+
+    # Averaging works channel-wise regardless of byte order since
+    # the pixel data is premultiplied.
+    half = (data[0::2, 0::2] + data[1::2, 0::2] + data[0::2, 1::2] + data[1::2, 1::2] + 2) // 4
+
+    newHeight, newWidth = half.shape[:2]
+    newSurface = cr.ImageSurface(cr.FORMAT_ARGB32, newWidth, newHeight)
+    newSurface.flush()
+    buffer = np.ndarray(shape=(newHeight, newSurface.get_stride()), dtype="uint8",
+        buffer=newSurface.get_data())
+    buffer[:, :4*newWidth] = half.reshape(newHeight, -1)
+    newSurface.mark_dirty()
+    return newSurface
+
+# Mainly for internal use by Image.
+# Holds a lazily built pyramid of successively halved copies of
+# an image surface. The same pyramid is shared by an Image figure
+# and all of its copies, so it only has to be built once no matter
+# how many tweened frames draw the image.
+class _MipmapPyramid(object):
+    def __init__(self):
+        self.source = None  # Identifies the surface the levels were built from
+        self.levels = []  # levels[n] is 2^(n+1) times smaller than the source
+
+    # Returns the surface at the given level (level 1 is half size,
+    # level 2 is quarter size, etc.), building it if needed.
+    # The level is clamped so that the surface is never smaller
+    # than a single pixel.
+    #
+    # `source` is the object the image stores as its surface
+    # (possibly a _LazySurface) which is used to detect when the
+    # pyramid needs to be rebuilt, and `surface` is the actual
+    # decoded surface.
+    def level(self, source, surface, k):
+        if not(self.source is source or self.source == source):
+            self.source = source
+            self.levels = []
+
+        while len(self.levels) < k:
+            prev = self.levels[-1] if len(self.levels) > 0 else surface
+            if prev.get_width() == 1 and prev.get_height() == 1:
+                break
+            self.levels.append(_halfSurface(prev))
+
+        return self.levels[min(k, len(self.levels))-1] if len(self.levels) > 0 else surface
+
 ### CLASSES ###
 
 # Draws an image on the screen.
@@ -64,7 +268,14 @@ class Image(PreAlignableFigure):
         # morpho.Figure.__init__(self)
         super().__init__()
 
-        self.NonTweenable("imageSurface", None)
+        # Either a cairo ImageSurface, a _LazySurface placeholder
+        # for an image file frame not yet decoded, or None.
+        # Use the `imageSurface` property to access the surface.
+        self.NonTweenable("_imageSurface", None)
+        # Pyramid of downsampled copies of the image surface used
+        # when the image is drawn much smaller than its native size.
+        # It is shared (not copied) between copies of the figure.
+        self.NonTweenable("_mipmaps", None)
 
         self.newSource(source, frame)
 
@@ -115,6 +326,20 @@ class Image(PreAlignableFigure):
     def origin(self, value):
         self.pos = value
 
+    # The cairo ImageSurface of the image. If the image was loaded
+    # from a file, the file is decoded the first time this
+    # property is accessed.
+    @property
+    def imageSurface(self):
+        surface = self._imageSurface
+        if isinstance(surface, _LazySurface):
+            return surface.resolve()
+        return surface
+
+    @imageSurface.setter
+    def imageSurface(self, value):
+        self._imageSurface = value
+
     # The "width" and "height" attrs are set up as properties,
     # because we may need to dynamically modify one in response
     # to a change in the other based on the "linked" attr.
@@ -214,23 +439,43 @@ class Image(PreAlignableFigure):
     # Given the filepath for an image file and a selector of
     # frame indices, returns a list of cairo ImageSurface objects
     # corresponding to the selected frames.
+    # The surfaces are taken from the shared surface pool.
     @staticmethod
     def _createSurfacesFromFile(source, frame=0):
-        # This is based on user Marwan Alsabbagh's code on StackOverflow.
-        # https://stackoverflow.com/a/13457584
-        from PIL import Image as PIL_Image
-        from io import BytesIO
-        with PIL_Image.open(source) as img:
-            # Get list of selected indices using `frame` as the selector
-            selection = listselect(range(getattr(img, "n_frames", 1)), frame).values()
-            surfaces = []
-            for index in selection:
-                img.seek(index)
-                with BytesIO() as buffer:
-                    img.save(buffer, format="PNG")
-                    buffer.seek(0)
-                    surfaces.append(cr.ImageSurface.create_from_png(buffer))
-        return surfaces
+        return [surface.resolve() for surface in _lazySurfacesFromFile(source, frame)]
+
+    # Class attribute that controls whether images that appear
+    # on screen at less than half their native resolution are
+    # drawn using a downsampled copy of the image. This is much
+    # faster for high resolution images drawn at small sizes and
+    # also reduces aliasing.
+    mipmapping = True
+
+    # Mainly for internal use by draw().
+    # Given a cairo context whose CTM maps image pixel coordinates
+    # to the screen, returns the most appropriate surface in the
+    # mipmap pyramid to draw, and rescales the CTM to match the
+    # returned surface's dimensions.
+    def _mipmapSurface(self, ctx):
+        surface = self.imageSurface
+        if not self.mipmapping or self._mipmaps is None:
+            return surface
+
+        # Compute how many screen pixels a single image pixel spans
+        # along the most stretched direction (this is the largest
+        # singular value of the linear part of the CTM).
+        dx = ctx.user_to_device_distance(1, 0)
+        dy = ctx.user_to_device_distance(0, 1)
+        pixelScale = np.linalg.norm(np.array([dx, dy], dtype=float).T, 2)
+        if not(0 < pixelScale < 0.5):
+            return surface
+
+        k = int(math.floor(math.log2(1/pixelScale)))
+        level = self._mipmaps.level(self._imageSurface, surface, k)
+        if level is not surface:
+            ctx.scale(surface.get_width()/level.get_width(),
+                surface.get_height()/level.get_height())
+        return level
 
     # Supply a new source to the image figure.
     # Aspect ratio and width and height will NOT be changed!
@@ -248,28 +493,36 @@ class Image(PreAlignableFigure):
             raise TypeError("`frame` must be an integer.")
 
         if source is None:
-            self.imageSurface = None
+            self._imageSurface = None
         elif isinstance(source, str):
-            source = source.strip()
-            if source.lower().endswith("png"):
-                self.imageSurface = cr.ImageSurface.create_from_png(source)
-            else:
-                surfaces = self._createSurfacesFromFile(source, frame)
-                self.imageSurface = surfaces[0] if len(surfaces) > 0 else None
-        elif isinstance(source, Image) or isinstance(source, MultiImageBase):
-            self.imageSurface = source.imageSurface
-        elif isinstance(source, cairo.ImageSurface):
-            self.imageSurface = source
+            # Image files are decoded lazily (see _LazySurface)
+            surfaces = _lazySurfacesFromFile(source.strip(), frame)
+            self._imageSurface = surfaces[0] if len(surfaces) > 0 else None
+        elif isinstance(source, Image):
+            # Reuse the source's surface without decoding it
+            self._imageSurface = source._imageSurface
+            self._mipmaps = source._mipmaps
+        elif isinstance(source, MultiImageBase):
+            self._imageSurface = source.imageSurface
+        elif isinstance(source, (cairo.ImageSurface, _LazySurface)):
+            self._imageSurface = source
         else:
             raise TypeError("Unrecognized source for image!")
 
+        if not isinstance(source, Image):
+            self._mipmaps = _MipmapPyramid()
+
         # Save pixel width and height of the input image.
-        if self.imageSurface is None:  # Dummy values if source is None
+        surface = self._imageSurface
+        if surface is None:  # Dummy values if source is None
             self.imageWidth = 1
             self.imageHeight = 1
+        elif isinstance(surface, _LazySurface):
+            self.imageWidth = surface.width
+            self.imageHeight = surface.height
         else:
-            self.imageWidth = self.imageSurface.get_width()
-            self.imageHeight = self.imageSurface.get_height()
+            self.imageWidth = surface.get_width()
+            self.imageHeight = surface.get_height()
 
         return self
 
@@ -386,7 +639,7 @@ class Image(PreAlignableFigure):
 
 
     def draw(self, camera, ctx):
-        if self.imageSurface is None: return
+        if self._imageSurface is None: return
 
         view = camera.view
 
@@ -556,7 +809,8 @@ class Image(PreAlignableFigure):
         # ctx.scale(scale_x, scale_y)
         # ctx.translate(x-self.origin[0]*scale_x, y-self.origin[1]*scale_y)
         # ctx.translate(x,y)
-        ctx.set_source_surface(self.imageSurface)
+        # Use a downsampled surface if the image is drawn small
+        ctx.set_source_surface(self._mipmapSurface(ctx))
         ctx.paint_with_alpha(self.alpha)
         ctx.restore()
 
@@ -675,18 +929,19 @@ class SpaceImage(Image):
         self.center
 
 
-    def primitives(self, camera): # orient=np.identity(3), focus=np.zeros(3)):
+    # Returns the 3D position that needs to be projected.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
         if self.alpha == 0:
+            return np.empty((0,3))
+        return self.pos.reshape(1,3)
+
+    def _projectedPrimitives(self, camera, array):
+        if len(array) == 0:
             return []
 
         orient = camera.orient
-        focus = camera.focus
-
-        if np.allclose(focus, 0):
-            pos3d = orient @ self.pos
-        else:
-            pos3d = orient @ (self.pos - focus) + focus
-        pos3d = pos3d.tolist()
+        pos3d = array[0].tolist()
 
         img = Image(self)
         img.pos = pos3d[0] + 1j*pos3d[1]
@@ -714,6 +969,8 @@ class SpaceImage(Image):
 
         return [img]
 
+    primitives = morpho.projectedPrimitives()
+
 
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.zeros(3)):
         primlist = self.primitives(camera)
@@ -780,7 +1037,8 @@ def Multi(imageMethod, mainMethod=morpho.Figure.tweenLinear, *, reverseMethod=No
             otherimg = other.images[n]
 
             # If both underlying images are the same, don't do anything fancy.
-            if selfimg.imageSurface == otherimg.imageSurface:
+            # (Compared without decoding the surfaces)
+            if selfimg._imageSurface == otherimg._imageSurface:
                 new = imageMethod(selfimg, otherimg, t, *args, **kwargs)
                 images.append(new)
             # Fade out self and fade in other
@@ -854,7 +1112,8 @@ class MultiImageBase(morpho.MultiFigure):
         images = []
         for item in source:
             if isinstance(item, str):  # item is a filepath. Use frame.
-                surfaces = Image._createSurfacesFromFile(item, frame)
+                # Frames are only decoded once they're drawn.
+                surfaces = _lazySurfacesFromFile(item.strip(), frame)
                 images.extend(Image(surface, *args, **kwargs) for surface in surfaces)
             elif isinstance(item, Image):
                 images.append(item)
@@ -999,6 +1258,19 @@ class RasterMap(BackgroundBoxFigure):
         self.Tweenable("view", view, tags=["scalar", "list"])
         self.Tweenable("alpha", alpha, tags=["scalar"])
 
+        # Tuple (array, data, surface, mipmaps) caching the
+        # premultiplied ARGB32 pixel data and cairo surface built
+        # from `_array`. Rebuilt whenever `_array` is reassigned.
+        # See _cachedSurface().
+        self._surfaceCache = None
+        # If this figure is the result of a linear tween, this is
+        # the tuple (start, end, t, array) so that draw() can blend
+        # the keyfigures' cached pixel data directly.
+        self._tweenSource = None
+        # Reusable buffers for blending pixel data when this figure
+        # is the starting keyfigure of a tween. See _blendSurface().
+        self._tweenBuffers = None
+
 
     @property
     def array(self):
@@ -1007,17 +1279,88 @@ class RasterMap(BackgroundBoxFigure):
     @array.setter
     def array(self, value):
         self._array = morpho.array(value)
-        # self._updateSurface()
-
-    def _createSurface(self):
-        colorLength = self._array.shape[2]
+        self._invalidateSurface()
+
+    # Discards any cached pixel data so that it is rebuilt from
+    # `_array` on the next draw. Reassigning `array` or `_array`
+    # does this automatically, so this only needs to be called
+    # manually if the array was modified in place.
+    def _invalidateSurface(self):
+        self._surfaceCache = None
+        self._tweenSource = None
+        self._tweenBuffers = None
+
+    # Returns the premultiplied ARGB32 pixel data of `_array`
+    # as a 2D uint32 array.
+    def _pixelData(self):
+        height, width, colorLength = self._array.shape
         data = morpho.color.ARGB32(self._array.reshape(-1, colorLength))
-        data.shape = self._array.shape[:2] + (-1,)
+        return data.reshape(height, width)
 
+    def _createSurface(self):
+        data = self._pixelData()
         return cairo.ImageSurface.create_for_data(
             data, cairo.FORMAT_ARGB32, data.shape[1], data.shape[0]
             )
 
+    # Mainly for internal use.
+    # Returns the cache tuple (array, data, surface, mipmaps)
+    # for the current `_array`, building it only if `_array`
+    # has changed since the last call. This way a RasterMap
+    # that is not changing costs only a single blit per draw.
+    def _cachedSurface(self):
+        cache = self._surfaceCache
+        if cache is None or cache[0] is not self._array:
+            data = self._pixelData()
+            surface = cairo.ImageSurface.create_for_data(
+                data, cairo.FORMAT_ARGB32, data.shape[1], data.shape[0]
+                )
+            cache = self._surfaceCache = (self._array, data, surface, _MipmapPyramid())
+        return cache
+
+    # Mainly for internal use by draw().
+    # Blends the cached pixel data of self and the given RasterMap
+    # at parameter t into a reusable premultiplied buffer owned by
+    # self and returns a surface for it. The surface is only valid
+    # until the next call, so it should be drawn immediately.
+    #
+    # Returns None if blending premultiplied pixels would not match
+    # interpolating the arrays themselves, i.e. if t is outside
+    # [0,1] or the two arrays have different alpha channels.
+    def _blendSurface(self, other, t):
+        if not(0 <= t <= 1):
+            return None
+        dataA = self._cachedSurface()[1]
+        dataB = other._cachedSurface()[1]
+        if dataA.shape != dataB.shape:
+            return None
+
+        buffers = self._tweenBuffers
+        if buffers is None or buffers[0] is not dataA or buffers[1] is not dataB:
+            alphaA = self._array[:,:,3] if self._array.shape[2] > 3 else 1
+            alphaB = other._array[:,:,3] if other._array.shape[2] > 3 else 1
+            exact = bool(np.all(alphaA == alphaB))
+            scratch = np.empty(dataA.shape[:1] + (4*dataA.shape[1],), dtype="uint16")
+            buffers = self._tweenBuffers = (dataA, dataB, exact,
+                scratch, np.empty_like(scratch), np.empty_like(dataA))
+        dataA, dataB, exact, scratch, scratch2, out = buffers
+        if not exact:
+            return None
+
+        # Blend bytes in 8-bit fixed point:
+        # out = (A*(256-w) + B*w + 128) >> 8
+        w = int(round(256*t))
+        np.multiply(dataA.view("uint8"), 256-w, out=scratch, dtype="uint16")
+        np.multiply(dataB.view("uint8"), w, out=scratch2, dtype="uint16")
+        scratch += scratch2
+        scratch += 128
+        scratch >>= 8
+        np.copyto(out.view("uint8"), scratch, casting="unsafe")
+
+        return cairo.ImageSurface.create_for_data(
+            out, cairo.FORMAT_ARGB32, out.shape[1], out.shape[0]
+            )
+
     # Mainly for internal use by draw().
     # Creates a corresponding Image figure for the RasterMap
     # ready for drawing.
@@ -1027,9 +1370,21 @@ class RasterMap(BackgroundBoxFigure):
     # This is mainly for use in making the Image more usable
     # outside of merely immediately drawing it, and is used
     # mainly by the toImage() method.
-    def _createImage(self, *, _forceZeroing=False):
-        surface = self._createSurface()
-        img = Image(surface)
+    #
+    # If optional kwarg _shareBuffer=False, the Image figure
+    # is guaranteed not to use the reusable tween buffer, so it
+    # remains valid after subsequent draws.
+    def _createImage(self, *, _forceZeroing=False, _shareBuffer=True):
+        src = self._tweenSource
+        surface = None
+        if _shareBuffer and src is not None and src[3] is self._array:
+            surface = src[0]._blendSurface(src[1], src[2])
+        if surface is None:
+            _, _, surface, mipmaps = self._cachedSurface()
+            img = Image(surface)
+            img._mipmaps = mipmaps
+        else:
+            img = Image(surface)
         img.unlink()
         img.align = [-1,-1]
         # center = mean([self.view[0]+self.view[2]*1j, self.view[1]+self.view[3]*1j])
@@ -1060,7 +1415,7 @@ class RasterMap(BackgroundBoxFigure):
     # The Image figure will be aligned such that its position
     # is at 0.
     def toImage(self):
-        img = self._createImage(_forceZeroing=True)
+        img = self._createImage(_forceZeroing=True, _shareBuffer=False)
         img._updateFrom(self, common=True)
         return img
 
@@ -1073,12 +1428,16 @@ class RasterMap(BackgroundBoxFigure):
         img = self._createImage()
         img.draw(camera, ctx)
 
-    # ### TWEEN METHODS ###
+    ### TWEEN METHODS ###
 
-    # def tweenLinear(self, other, t, *args, **kwargs):
-    #     tw = super().tweenLinear(other, t, *args, **kwargs)
-    #     tw._updateSurface()
-    #     return tw
+    @morpho.tweenMethod
+    def tweenLinear(self, other, t, *args, **kwargs):
+        tw = super().tweenLinear(other, t, *args, **kwargs)
+        # Record the endpoints so draw() can blend their cached
+        # pixel data instead of repacking the tweened array.
+        if isinstance(other, RasterMap):
+            tw._tweenSource = (self, other, t, tw._array)
+        return tw
 
     # def tweenSpiral(self, other, t, *args, **kwargs):
     #     tw = super().tweenSpiral(other, t, *args, **kwargs)
@@ -1094,6 +1453,140 @@ class RasterMap(BackgroundBoxFigure):
     #         return tw
     #     return pivot
 
+### COLOR PATTERN EVALUATION ###
+
+# Maximum number of positions passed to a vectorized function
+# in a single call by colorPattern() and heatmap(). Evaluating
+# in chunks bounds the memory used by intermediate arrays.
+# Set to None to always pass every position in one call.
+patternChunkSize = 2**18
+
+# Directory in which colorPattern() and heatmap() cache computed
+# arrays when called with cache=True. None by default.
+patternCacheDir = None
+
+# Mainly for internal use by _evaluatePattern().
+# Evaluates a non-vectorized function on a list of positions.
+# Defined at module level so it can be sent to worker processes.
+def _evaluateTile(func, zlist):
+    return np.array([func(z) for z in zlist], dtype=float)
+
+# Mainly for internal use by _evaluatePattern().
+# Returns a function that takes the number of positions evaluated
+# so far and reports it according to the `progress` option.
+def _progressReporter(progress, total):
+    if not progress:
+        return lambda done: None
+    elif callable(progress):
+        return lambda done: progress(done/total)
+    else:
+        def report(done):
+            print(f"\rEvaluating pattern: {round(100*done/total)}%",
+                end=("" if done < total else "\n"), flush=True)
+        return report
+
+# Mainly for internal use by _evaluatePattern().
+# Returns the filepath where the pattern array for the given
+# function and key parts should be cached, or None if caching
+# is disabled. The function is identified by its source code
+# (or its qualified name if the source is unavailable), so
+# changes to values the function merely references (e.g. globals
+# or closure variables) are NOT detected.
+def _patternCachePath(func, cache, keyparts):
+    if cache is False or cache is None:
+        return None
+    directory = patternCacheDir if cache is True else cache
+    if directory is None:
+        raise ValueError("cache=True requires graphics.patternCacheDir to be set.")
+
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, "__module__", "") + "." + getattr(func, "__qualname__", repr(func))
+
+    sha = hashlib.sha256()
+    for part in [source] + [repr(part) for part in keyparts]:
+        sha.update(hashlib.sha256(bytes(part, "utf-8")).digest())
+    return os.path.join(directory, sha.hexdigest()[:32] + ".npy")
+
+# Mainly for internal use by colorPattern() and heatmap().
+# Evaluates `func` on the grid of positions covering `domain` at
+# the given resolution and returns the results as a float array
+# of shape (yres, xres, ...) oriented the same way as RasterMap
+# arrays. See colorPattern() for a description of the options.
+def _evaluatePattern(func, domain, res, *, vectorized, processes,
+    chunksize, progress, cache, keyparts=()):
+
+    path = _patternCachePath(func, cache,
+        [tuple(float(x) for x in domain), tuple(res), vectorized] + list(keyparts))
+    if path is not None and os.path.isfile(path):
+        return np.load(path)
+
+    # Create position array
+    zarray = morpho.matrix.positionArray(domain, res)
+
+    # Reorient the array because otherwise x- and y-directions
+    # will be swapped and the top and bottom will be swapped.
+    zarray = np.flip(zarray.T, axis=0)
+    zlist = zarray.reshape(-1)
+    total = len(zlist)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunksize is None:
+        if vectorized:
+            chunksize = total if patternChunkSize is None else patternChunkSize
+        else:
+            # Split into enough tiles to balance the workers
+            # and to report progress regularly.
+            chunksize = -(-total // max(8*processes, 100))
+    chunksize = max(1, chunksize)
+    tiles = [(n, min(n+chunksize, total)) for n in range(0, total, chunksize)]
+
+    report = _progressReporter(progress, total)
+    report(0)
+    values = None
+    done = 0
+    def store(start, stop, result):
+        nonlocal values, done
+        result = np.asarray(result, dtype=float)
+        if values is None:
+            values = np.empty((total,) + result.shape[1:], dtype=float)
+        values[start:stop] = result
+        done += stop - start
+        report(done)
+
+    if not vectorized and processes > 1 and len(tiles) > 1:
+        # Scalar functions are evaluated tile by tile in worker
+        # processes, so `func` must be picklable (i.e. defined at
+        # the top level of a module).
+        with ProcessPoolExecutor(processes) as executor:
+            futures = {
+                executor.submit(_evaluateTile, func, zlist[start:stop].tolist()): (start, stop)
+                for start, stop in tiles
+                }
+            for future in as_completed(futures):
+                store(*futures[future], future.result())
+    else:
+        for start, stop in tiles:
+            if vectorized:
+                result = func(zlist[start:stop])
+            else:
+                result = _evaluateTile(func, zlist[start:stop].tolist())
+            store(start, stop, result)
+
+    values = values.reshape(zarray.shape + values.shape[1:])
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so that an interrupted
+        # write never leaves a corrupt cache file behind.
+        temppath = path + f".{os.getpid()}.tmp.npy"
+        np.save(temppath, values)
+        os.replace(temppath, path)
+
+    return values
+
 # Creates a RasterMap figure (i.e. box of color) via a
 # color function that maps positions in the complex plane
 # to RGB[A] colors.
@@ -1115,40 +1608,44 @@ class RasterMap(BackgroundBoxFigure):
 #        By default, it's the same as the `domain` box.
 # vectorized = Boolean indicating whether `colorfunc` should be
 #       treated as vectorized. By default it's False, but if set to
-#       True, it will input all of the complex number positions into
-#       the color function all at once as one big complex-valued numpy
-#       vector and will expect an output array of shape (N x (3 or 4))
-#       where N is the element count of the massive input vector.
-#       Using this option can potentially speed up creating the
-#       color pattern.
+#       True, it will input the complex number positions into the
+#       color function as complex-valued numpy vectors (in chunks of
+#       at most `chunksize` positions) and will expect an output
+#       array of shape (N x (3 or 4)) where N is the length of the
+#       input vector. Using this option can potentially speed up
+#       creating the color pattern.
+# processes = Number of worker processes to evaluate a non-vectorized
+#       `colorfunc` with. The grid is split into tiles which are
+#       evaluated in parallel. For this to work, `colorfunc` must be
+#       picklable (i.e. defined at the top level of a module, not a
+#       lambda or nested function). If None, uses all CPUs.
+#       Default: 1 (evaluate in the current process)
+# chunksize = Number of positions per chunk/tile. By default, it's
+#       `patternChunkSize` for vectorized functions and is chosen
+#       automatically for non-vectorized functions.
+# progress = Boolean indicating whether to print the percentage of
+#       positions evaluated so far. Can also be a function which will
+#       be called with the fraction (0 to 1) completed.
+#       Default: False
+# cache = Boolean indicating whether to cache the computed color
+#       array in the directory `patternCacheDir` so that future calls
+#       (even across runs) with the same function source code, domain,
+#       and resolution can load it instead. Can also be a directory
+#       path to use instead of `patternCacheDir`. Note that changes to
+#       anything the function merely references (e.g. global
+#       variables) are not detected. Default: False
 def colorPattern(colorfunc, domain, res=(100,100), alpha=1,
-    *, view=None, vectorized=False):
+    *, view=None, vectorized=False, processes=1, chunksize=None,
+    progress=False, cache=False):
 
     domain = inferBox(domain)
 
     if view is None:
         view = domain[:]
 
-    # Create position array
-    zarray = morpho.matrix.positionArray(domain, res)
-    # print(zarray.shape)
-    # assert zarray.shape == res
-
-    # Reorient the array because otherwise x- and y-directions
-    # will be swapped and the top and bottom will be swapped.
-    zarray = np.flip(zarray.T, axis=0)
-
-    if vectorized:
-        colorArray = colorfunc(zarray.reshape(-1))
-        colorArray.shape = zarray.shape + (-1,)
-    else:
-        zlist = zarray.reshape(-1).tolist()
-        colorDim = len(colorfunc(zlist[0]))
-        # Initialize colorArray
-        colorArray = np.zeros((len(zlist), colorDim))
-        for n,z in enumerate(zlist):
-            colorArray[n] = colorfunc(z)
-        colorArray.shape = zarray.shape + (colorDim,)
+    colorArray = _evaluatePattern(colorfunc, domain, res,
+        vectorized=vectorized, processes=processes, chunksize=chunksize,
+        progress=progress, cache=cache, keyparts=["colorPattern"])
 
     # Create RasterMap
     raster = RasterMap(colorArray, view, alpha)
@@ -1173,25 +1670,35 @@ def colorPattern(colorfunc, domain, res=(100,100), alpha=1,
 #        By default, it's the same as the `domain` box.
 # vectorized = Boolean indicating whether `heatfunc` should be
 #       treated as vectorized. By default it's False, but if set to
-#       True, it will input all of the complex number positions into
-#       the heatmap all at once as one big complex-valued numpy
-#       vector and will expect an output vector of the same length.
-#       Using this option can potentially speed up creating the
-#       heatmap.
+#       True, it will input the complex number positions into the
+#       heatmap as complex-valued numpy vectors and will expect an
+#       output vector of the same length. Using this option can
+#       potentially speed up creating the heatmap.
+# processes, chunksize, progress, cache = Same as for colorPattern().
+#       Only the values of `heatfunc` are cached, so the same cache
+#       entry is reused if only `interval` or `gradient` change.
 def heatmap(heatfunc, domain, interval, gradient=None, res=(100,100), alpha=1,
-    *, view=None, vectorized=False):
+    *, view=None, vectorized=False, processes=1, chunksize=None,
+    progress=False, cache=False):
 
     if gradient is None:
         gradient = morpho.color.heatmap()
 
+    domain = inferBox(domain)
+
+    if view is None:
+        view = domain[:]
+
     low, high = interval
 
-    if vectorized:
-        def colorfunc(zlist):
-            return gradient.value(morpho.lerp0(0, 1, heatfunc(zlist), start=low, end=high))
-    else:
-        def colorfunc(z):
-            return gradient.value(morpho.lerp(0, 1, heatfunc(z), start=low, end=high))
-    return colorPattern(colorfunc, domain, res, alpha, view=view, vectorized=vectorized)
+    heat = _evaluatePattern(heatfunc, domain, res,
+        vectorized=vectorized, processes=processes, chunksize=chunksize,
+        progress=progress, cache=cache, keyparts=["heatmap"])
+
+    # Color all the heat values at once
+    colorArray = gradient.value(morpho.lerp0(0, 1, heat.reshape(-1), start=low, end=high))
+    colorArray = np.asarray(colorArray, dtype=float).reshape(heat.shape[:2] + (-1,))
+
+    return RasterMap(colorArray, view, alpha)
 
 
@@ -171,6 +171,442 @@ def pulse(point, duration=30, atFrame=None, *, scale=2, **kwargs):
     point1.set(**kwargs)
     point2 = point.newkey(atFrame + duration, point0.copy())
 
+# Collection of many points stored as parallel arrays so that
+# a whole particle system can be animated as a single figure.
+# Every attribute can be given either as a single value shared by
+# all the points, or as an array with one entry per point, and all
+# of them are tweened with array arithmetic.
+#
+# TWEENABLES
+# pos = Positions (complex np.array). Default: empty
+# size = Diameters of the points visually (pixels). Default: 15
+# strokeWeight = Thicknesses of the outer edges (pixels). Default: 1
+# color = Edge colors. Either an RGB triple or an N x 3 array.
+#         Default: [0,0,0] (black)
+# fill = Interior fill colors. Either an RGB triple or an N x 3 array.
+#        Default: [1,0,0] (red)
+# alpha = Overall opacities. Default: 1 (opaque)
+# alphaEdge = Outer edge opacities. Default 1 (opaque)
+# alphaFill = Interior opacities. Default: 1 (opaque)
+# dash = Dash pattern shared by all the edges. See Point. Default: []
+# dashOffset = Where along the dash pattern it will start. Default: 0
+#
+# Points are drawn in order, but consecutive points sharing the
+# same style are drawn together as a single cairo path with one
+# fill and one stroke. Stroked points are only batched this way
+# while they don't overlap each other, so a later point still
+# covers the outline of an earlier one. However, overlapping
+# semi-transparent unstroked points of the same style do not
+# stack their opacities the way separate Point figures would.
+#
+# Note that tweening two point clouds requires their per-point
+# arrays to have matching lengths.
+class PointCloud(morpho.Figure):
+    def __init__(self, pos=None, size=15, strokeWeight=1, color=(0,0,0), fill=(1,0,0),
+        alpha=1):
+
+        super().__init__()
+
+        if pos is None:
+            pos = []
+        pos = np.asarray(pos)
+        # Convert to complex if given as an N x 2 array of coordinates
+        if pos.ndim == 2:
+            pos = pos[:,0] + 1j*pos[:,1]
+        pos = np.array(pos, dtype=complex).reshape(-1)
+
+        self.Tweenable("pos", pos, tags=["complex", "nparray", "position"])
+        self.Tweenable("strokeWeight", np.array(strokeWeight, dtype=float), tags=["scalar", "nparray", "pixel"])
+        self.Tweenable("color", np.array(color, dtype=float), tags=["color", "nparray"])
+        self.Tweenable("fill", np.array(fill, dtype=float), tags=["color", "nparray"])
+        self.Tweenable("alphaEdge", np.array(1, dtype=float), tags=["scalar", "nparray"])
+        self.Tweenable("alphaFill", np.array(1, dtype=float), tags=["scalar", "nparray"])
+        self.Tweenable("alpha", np.array(alpha, dtype=float), tags=["scalar", "nparray"])
+        self.Tweenable("size", np.array(size, dtype=float), tags=["size", "nparray", "pixel"])
+        self.Tweenable("dash", [], tags=["scalar", "list", "pixel"])
+        self.Tweenable("dashOffset", 0, tags=["scalar", "pixel"])
+
+    # Number of points in the cloud.
+    def __len__(self):
+        return np.size(self.pos)
+
+    # Returns the named attribute broadcast to one entry per point
+    # (one row per point for colors).
+    # Mainly for internal use.
+    def _perPoint(self, name, N):
+        value = np.asarray(getattr(self, name), dtype=float)
+        return np.broadcast_to(value, (N, 3) if name in ("color", "fill") else (N,))
+
+    # Draws all of the points on the given cairo context.
+    def draw(self, camera, ctx):
+        pos = np.atleast_1d(np.asarray(self.pos, dtype=complex))
+        N = len(pos)
+        if N == 0:
+            return
+
+        alpha = self._perPoint("alpha", N)
+        size = self._perPoint("size", N)
+        strokeWeight = self._perPoint("strokeWeight", N)
+
+        # Skip invisible or zero-size points.
+        visible = np.flatnonzero((alpha > 0) & (size > 0))
+        if len(visible) == 0:
+            return
+        pos = pos[visible]
+        alpha = alpha[visible]
+        strokeWeight = strokeWeight[visible]
+        stroked = (strokeWeight >= 0.5)  # Don't stroke if strokeWeight is too small
+
+        # Each row is the complete style of a point:
+        # fill RGBA, edge RGBA, strokeWeight.
+        # Unstroked points get a zero edge so they group together.
+        style = np.zeros((len(visible), 9))
+        style[:,:3] = self._perPoint("fill", N)[visible]
+        style[:,3] = alpha*self._perPoint("alphaFill", N)[visible]
+        style[stroked,4:7] = self._perPoint("color", N)[visible][stroked]
+        style[stroked,7] = alpha[stroked]*self._perPoint("alphaEdge", N)[visible][stroked]
+        style[stroked,8] = strokeWeight[stroked]
+
+        # Locate runs of consecutive points that share a style
+        breaks = np.flatnonzero(np.any(style[1:] != style[:-1], axis=1)) + 1
+        starts = [0] + breaks.tolist()
+        ends = breaks.tolist() + [len(style)]
+
+        X,Y = morpho.anim.screenCoords(pos, camera.view, ctx)
+        X = X.tolist()
+        Y = Y.tolist()
+        R = (size[visible]/2).tolist()
+
+        for start, end in zip(starts, ends):
+            fillR, fillG, fillB, fillA, edgeR, edgeG, edgeB, edgeA, width = style[start].tolist()
+
+            # Split stroked runs into batches of non-overlapping points
+            if width == 0:
+                batchStarts = [start]
+            else:
+                batchStarts = self._overlapBreaks(X, Y, R, width, start, end)
+
+            for batchStart, batchEnd in zip(batchStarts, batchStarts[1:] + [end]):
+                # Add every circle in the batch to one path
+                for i in range(batchStart, batchEnd):
+                    x, y, r = X[i], Y[i], R[i]
+                    ctx.move_to(x+r, y)
+                    ctx.arc(x, y, r, 0, tau)
+                    ctx.close_path()
+
+                ctx.set_source_rgba(fillR, fillG, fillB, fillA)
+                ctx.fill_preserve()
+
+                if width == 0:
+                    ctx.new_path()
+                else:
+                    ctx.set_source_rgba(edgeR, edgeG, edgeB, edgeA)
+                    ctx.set_line_width(width)
+                    ctx.set_dash(self.dash, self.dashOffset)
+                    ctx.stroke()
+                    ctx.set_dash([])
+
+    # Mainly for internal use by draw().
+    # Splits the run of points with indices start <= i < end into
+    # consecutive batches in which no two stroked circles overlap, so
+    # that filling and then stroking a whole batch looks the same as
+    # drawing its points one at a time. Returns the list of the
+    # starting indices of the batches.
+    #
+    # Overlaps are found with a grid of square cells at least as wide
+    # as the largest stroked circle, so each point only needs to be
+    # compared with points in its own and neighboring cells.
+    @staticmethod
+    def _overlapBreaks(X, Y, R, width, start, end):
+        pad = width/2
+        cell = 2*(max(R[start:end]) + pad)
+        batchStarts = [start]
+        cells = {}
+        for i in range(start, end):
+            x, y, r = X[i], Y[i], R[i] + pad
+            cx, cy = math.floor(x/cell), math.floor(y/cell)
+            overlaps = any(
+                (X[j]-x)**2 + (Y[j]-y)**2 < (R[j] + pad + r)**2
+                for gx in (cx-1, cx, cx+1) for gy in (cy-1, cy, cy+1)
+                for j in cells.get((gx, gy), ())
+                )
+            if overlaps:
+                batchStarts.append(i)
+                cells = {}
+            cells.setdefault((cx, cy), []).append(i)
+        return batchStarts
+
+    # Set vectorized=True to evaluate func on all the positions at
+    # once. See morpho.vectorizedImage() for details.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
+        newfig = self.copy()
+        pos = np.atleast_1d(np.asarray(self.pos, dtype=complex))
+
+        if vectorized and len(pos) > 0:
+            newfig.pos = np.array(morpho.vectorizedImage(func, pos, chunksize), dtype=complex)
+        else:
+            newfig.pos = np.array([func(z) for z in pos.tolist()], dtype=complex)
+        return newfig
+
+
+# Draws many copies ("instances") of a single template figure,
+# each under its own transformation, so that hundreds of identical
+# arrowheads, tick marks, glyphs, etc. can be animated as one
+# figure instead of one figure per copy.
+#
+# Each instance maps the template by
+#   z --> origin + transform * rotation * (template's own mapping)(z)
+# which is the same order the template's own origin, rotation, and
+# transform are applied in. The number of instances is the length
+# of `origin`; every other per-instance tweenable can also be given
+# as a single value shared by all the instances.
+#
+# If the template is a plain Polygon or Path (solid colors, no
+# arrow tips, outline, or background box, and full start/end),
+# its cairo path is built once per draw and replayed under each
+# instance's transformation. Any other template that possesses the
+# attributes `origin`, `rotation`, and `transform` is supported by
+# drawing it once per instance.
+#
+# TWEENABLES
+# origin = Instance positions (complex np.array). Default: empty
+# rotation = Instance rotations (radians). Default: 0
+# transform = Instance 2x2 transformation matrices. Either a single
+#             2x2 matrix or an N x 2 x 2 array. Default: identity
+# alpha = Instance opacities. Multiplies the template's opacity.
+#         Default: 1 (opaque)
+# tint = Instance color tints. Multiplies the template's edge and
+#        fill colors. Either an RGB triple or an N x 3 array.
+#        Default: [1,1,1] (no tint)
+#
+# OTHER ATTRIBUTES
+# figure = Template figure. Its own tweenables are not tweened
+#          between keyfigures; to change the template, assign a
+#          new one.
+class Instanced(morpho.Figure):
+    def __init__(self, figure, origin=None, rotation=0, transform=None, alpha=1, tint=(1,1,1)):
+        if not all(object_hasattr(figure, name) for name in ("origin", "rotation", "transform")):
+            raise TypeError(f"Template figure `{type(figure).__name__}` must possess `origin`, `rotation`, and `transform` attributes.")
+
+        super().__init__()
+
+        if origin is None:
+            origin = []
+        origin = np.array(origin, dtype=complex).reshape(-1)
+        if transform is None:
+            transform = I2
+
+        self.Tweenable("origin", origin, tags=["complex", "nparray", "nofimage"])
+        self.Tweenable("rotation", np.array(rotation, dtype=float), tags=["scalar", "nparray"])
+        self.Tweenable("_transform", np.array(transform, dtype=float), tags=["nparray"])
+        self.Tweenable("alpha", np.array(alpha, dtype=float), tags=["scalar", "nparray"])
+        self.Tweenable("tint", np.array(tint, dtype=float), tags=["color", "nparray"])
+
+        self.NonTweenable("figure", figure)
+
+    @property
+    def transform(self):
+        return self._transform
+
+    @transform.setter
+    def transform(self, value):
+        self._transform = np.array(value, dtype=float)
+
+    # Number of instances.
+    def __len__(self):
+        return np.size(self.origin)
+
+    # Returns the affine maps of every instance as a pair
+    # (M, b) where M is an N x 2 x 2 array of linear parts and
+    # b is a complex array of translations, both already composed
+    # with the template's own origin, rotation, and transform.
+    def affineMaps(self):
+        origin = np.atleast_1d(np.asarray(self.origin, dtype=complex))
+        N = len(origin)
+        rotation = np.broadcast_to(np.asarray(self.rotation, dtype=float), (N,))
+        transform = np.broadcast_to(np.asarray(self.transform, dtype=float), (N,2,2))
+
+        cos = np.cos(rotation)
+        sin = np.sin(rotation)
+        rot = np.empty((N,2,2))
+        rot[:,0,0] = cos
+        rot[:,0,1] = -sin
+        rot[:,1,0] = sin
+        rot[:,1,1] = cos
+        instanceMat = transform @ rot
+
+        template = self.figure
+        theta = template.rotation
+        templateMat = np.array(template.transform, dtype=float) @ np.array(
+            [[math.cos(theta), -math.sin(theta)], [math.sin(theta), math.cos(theta)]]
+            )
+
+        t0 = complex(template.origin)
+        shift = instanceMat @ np.array([t0.real, t0.imag])
+        b = origin + shift[:,0] + 1j*shift[:,1]
+        return instanceMat @ templateMat, b
+
+    # Mainly for internal use by draw().
+    # Returns True if the template can be drawn by replaying a
+    # single cairo path with solid colors.
+    def _replayable(self):
+        fig = self.figure
+        if isinstance(fig, Polygon):
+            return type(fig).draw is Polygon.draw \
+                and len(fig.vertices) >= 2 and fig.backAlpha == 0 \
+                and not fig._strokeGradient \
+                and not isinstance(fig.fill, morpho.color.GradientFill)
+        elif isinstance(fig, Path):
+            return type(fig).draw is Path.draw \
+                and len(fig.seq) >= 2 and fig.backAlpha == 0 \
+                and fig.start == 0 and fig.end == 1 \
+                and fig.headSize == 0 and fig.tailSize == 0 \
+                and not (fig.outlineWidth > 0 and fig.outlineAlpha > 0) \
+                and not isinstance(fig.color, morpho.color.Gradient) \
+                and not isinstance(fig.fill, morpho.color.GradientFill)
+        return False
+
+    # Mainly for internal use by draw().
+    # Traces the template's nodes in its local coordinates onto
+    # the context and returns the resulting cairo path.
+    #
+    # Cairo stores path coordinates in device space rounded to 1/256
+    # of a unit, so the template is traced under a large power of two
+    # scale factor to keep small templates (like arrowheads and tick
+    # marks) precise. copy_path() returns user space coordinates, so
+    # the scale doesn't need to be undone when replaying the path.
+    def _templatePath(self, ctx):
+        fig = self.figure
+        Z = np.array(fig.vertices if isinstance(fig, Polygon) else fig.seq, dtype=complex)
+        Z = Z[np.isfinite(Z)]
+        R = np.abs(Z).max().tolist() if Z.size > 0 else 0
+        scale = 2.0**math.floor(math.log2(2**20/R)) if R > 0 else 1
+
+        ctx.save()
+        ctx.identity_matrix()
+        ctx.scale(scale, scale)
+        ctx.new_path()
+        if isinstance(fig, Polygon):
+            zprev = fig.vertices[0]
+            ctx.move_to(zprev.real, zprev.imag)
+            for z in fig.vertices[1:]:
+                if isbadnum(z) or isbadnum(zprev):
+                    ctx.move_to(z.real, z.imag)
+                else:
+                    ctx.line_to(z.real, z.imag)
+                zprev = z
+            ctx.close_path()
+        else:
+            bounds = fig._fullRange()
+            if bounds is not None:
+                fig._traceSegments(ctx, *bounds, True)
+        path = ctx.copy_path()
+        ctx.new_path()
+        ctx.restore()
+        return path
+
+    # Draws all of the instances on the given cairo context.
+    def draw(self, camera, ctx):
+        fig = self.figure
+        origin = np.atleast_1d(self.origin)
+        N = len(origin)
+        if N == 0 or fig.alpha == 0:
+            return
+
+        alpha = np.broadcast_to(np.asarray(self.alpha, dtype=float), (N,))
+        tint = np.broadcast_to(np.asarray(self.tint, dtype=float), (N,3))
+        M, b = self.affineMaps()
+
+        # Skip invisible instances and ones whose transformation
+        # is too distorted to draw.
+        det = np.abs(M[:,0,0]*M[:,1,1] - M[:,0,1]*M[:,1,0])
+        norm = np.maximum(np.hypot(M[:,0,0], M[:,1,0]), np.hypot(M[:,0,1], M[:,1,1]))
+        thin = det <= 1e-6*norm**2
+        visible = np.flatnonzero((alpha > 0) & ~thin)
+        if len(visible) == 0:
+            return
+
+        if self._replayable():
+            self._drawReplay(camera, ctx, visible, M, b, alpha, tint)
+            return
+
+        # Draw a single working copy of the template once per instance
+        inst = fig.copy()
+        color = list(fig.color) if object_hasattr(fig, "color") and isinstance(fig.color, (list, tuple)) else None
+        fill = list(fig.fill) if object_hasattr(fig, "fill") and isinstance(fig.fill, (list, tuple)) else None
+        for i in visible.tolist():
+            inst.origin = complex(b[i])
+            inst.rotation = 0
+            inst.transform = M[i].copy()
+            inst.alpha = fig.alpha*alpha[i]
+            if color is not None:
+                inst.color = (np.array(color)*tint[i]).tolist()
+            if fill is not None:
+                inst.fill = (np.array(fill)*tint[i]).tolist()
+            inst.draw(camera, ctx)
+
+    # Mainly for internal use by draw().
+    # Draws the visible instances by replaying the template's
+    # cairo path under each instance's affine map.
+    def _drawReplay(self, camera, ctx, visible, M, b, alpha, tint):
+        fig = self.figure
+        view = camera.view
+
+        path = self._templatePath(ctx)
+
+        color = np.array(fig.color, dtype=float)
+        fill = np.array(fig.fill, dtype=float)
+        width = fig.width
+        # Paths with negative width are stroked before being filled,
+        # whereas polygons with negative width are not stroked.
+        strokeFirst = isinstance(fig, Path) and width < 0
+        if isinstance(fig, Path):
+            width = abs(width)
+        stroke = width >= 0.5 and fig.alphaEdge > 0
+        doFill = fig.alphaFill > 0
+
+        xx, yx, xy, yy = M[:,0,0].tolist(), M[:,1,0].tolist(), M[:,0,1].tolist(), M[:,1,1].tolist()
+        x0, y0 = b.real.tolist(), b.imag.tolist()
+        for i in visible.tolist():
+            A = fig.alpha*alpha[i]
+
+            morpho.pushPhysicalCoords(view, ctx)  # Contains a ctx.save()
+            ctx.transform(cairo.Matrix(xx[i], yx[i], xy[i], yy[i], x0[i], y0[i]))
+            ctx.new_path()
+            ctx.append_path(path)
+            ctx.restore()
+
+            if strokeFirst and stroke:
+                self._strokeInstance(ctx, color*tint[i], A)
+            if doFill:
+                ctx.set_source_rgba(*(fill*tint[i]).tolist(), fig.alphaFill*A)
+                ctx.fill_preserve()
+            if not strokeFirst and stroke:
+                self._strokeInstance(ctx, color*tint[i], A)
+            ctx.new_path()
+
+    # Mainly for internal use by _drawReplay().
+    def _strokeInstance(self, ctx, color, alpha):
+        fig = self.figure
+        ctx.set_line_width(abs(fig.width))
+        ctx.set_source_rgba(*color.tolist(), fig.alphaEdge*alpha)
+        ctx.set_dash(fig.dash, fig.dashOffset)
+        ctx.stroke_preserve()
+        ctx.set_dash([])
+
+    # Set vectorized=True to evaluate func on all the instance
+    # origins at once. See morpho.vectorizedImage() for details.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
+        newfig = self.copy()
+        origin = np.atleast_1d(np.asarray(self.origin, dtype=complex))
+
+        if vectorized and len(origin) > 0:
+            newfig.origin = np.array(morpho.vectorizedImage(func, origin, chunksize), dtype=complex)
+        else:
+            newfig.origin = np.array([func(z) for z in origin.tolist()], dtype=complex)
+        return newfig
+
+
 # DEPRECATED!
 # Polar Point class. Identical to the Point class except it adds
 # an attribute called "wind" which represents winding number about
@@ -226,18 +662,17 @@ class SpacePoint(Point):
         self._pos = morpho.matrix.array(value)
 
 
-    def primitives(self, camera): # orient=np.identity(3), focus=np.zeros(3)):
+    # Returns the 3D point that needs to be projected.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
         if self.alpha == 0:
-            return []
-
-        orient = camera.orient
-        focus = camera.focus
+            return np.empty((0,3))
+        return self.pos.reshape(1,3)
 
-        if np.allclose(focus, 0):
-            pos3d = orient @ self.pos
-        else:
-            pos3d = orient @ (self.pos - focus) + focus
-        pos3d = pos3d.tolist()
+    def _projectedPrimitives(self, camera, array):
+        if len(array) == 0:
+            return []
+        pos3d = array[0].tolist()
 
         pt = Point()
         pt.pos = pos3d[0] + 1j*pos3d[1]
@@ -251,6 +686,8 @@ class SpacePoint(Point):
 
         return [pt]
 
+    primitives = morpho.projectedPrimitives()
+
 
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.zeros(3)):
         primlist = self.primitives(camera)
@@ -612,6 +1049,16 @@ class Path(BackgroundBoxFigure, AlignableFigure):
         # arrow outlines using the "cap" outline method.
         self.NonTweenable("_tipExpand", 0)
 
+        # Cache of the cairo path and mesh pattern used to draw
+        # the path when its color is a gradient. See _gradientMesh().
+        self._meshCache = None
+
+        # Cache of the cumulative arclength table. See _arclengthTable().
+        self._arcCache = None
+
+        # Cache of the cairo path traced by _traceSegments().
+        self._pathCache = None
+
     # Setting `tipSize` property sets both `headSize` and `tailSize
     # to the same value.
     @property
@@ -963,63 +1410,54 @@ class Path(BackgroundBoxFigure, AlignableFigure):
         raise TypeError("Paths are not iterable")
 
 
+    # Mainly for internal use.
+    # Returns the pair (T, cum) of np.arrays where cum[n] is the
+    # arclength of the path up to node n, and T[n] is the index
+    # parameter (between 0 and 1) of node n. The table is computed
+    # lazily and reused until the nodes of the path change.
+    # NOTE: ignores deadends and pretends all nodes are connected!
+    def _arclengthTable(self):
+        cache = self._arcCache
+        if cache is not None and cache[0] == self.seq:
+            return cache[1], cache[2]
+
+        Z = np.array(self.seq, dtype=complex)
+        T, cum = _arclengthArrays(np.abs(np.diff(Z)))
+        self._arcCache = (self.seq[:], T, cum)
+        return T, cum
+
     # Returns the physical length of the path
     # NOTE: ignores deadends and pretends all nodes are connected!
     # Also ignores the transform attribute.
     def arclength(self):
-        return sum(abs(self.seq[n+1]-self.seq[n]) for n in range(len(self.seq)-1))
+        return self._arclengthTable()[1][-1].tolist()
 
 
     # Returns the arclength so-far, where t is an index parameter between [0,1]
     # More precisely, it returns the length of the path with start=0 and end=t.
+    # t can also be an np.array of index parameters.
     # NOTE: ignores deadends and pretends all nodes are connected!
     def s(self, t):
-        if not(0 <= t <= 1):
-            raise ValueError("Index parameter must be in the interval [0,1]")
-        T = t*(len(self.seq)-1)
-        index = int(T)
-
-        L = sum(abs(self.seq[n+1]-self.seq[n]) for n in range(index))
-        if index == len(self.seq)-1:
-            return L
-
-        # L += abs(self.seq[index] - morpho.numTween(self.seq[index], self.seq[index+1], T-index))
-        L += (T-index)*abs(self.seq[index] - self.seq[index+1])
-        return L
+        return _arclengthAt(*self._arclengthTable(), t)
 
     # The inverse of the so-far arclength function.
     # Takes an arclength s as input and returns the index parameter t
-    # that corresponds to that length.
+    # that corresponds to that length. s can also be an np.array
+    # of lengths.
     # NOTE: ignores deadends and pretends all nodes are connected!
     def s_inv(self, s):
-        if s < 0:
-            raise ValueError("Given length must be nonnegative!")
-        if s == 0:
-            return 0
-
-        ell = 0
-        n = 0
-        while ell < s and n < len(self.seq)-1:
-            n += 1
-            ell += abs(self.seq[n] - self.seq[n-1])
-
-        if ell < s:
-            raise ValueError("Given length is longer than the path length!")
-        # if n == len(self.seq) - 1:
-        #     return 1
-
-        # Segment that is split
-        segment = abs(self.seq[n] - self.seq[n-1])
-        T = n + (s-ell)/segment
-        return T/(len(self.seq)-1)
+        return _arclengthInverse(*self._arclengthTable(), s)
 
 
     # Returns a transition function such that
     # tweening from start=0, end=0 to start=0, end=1
     # results in a constant speed drawing of the path.
+    # The arclength table is captured when this method is called,
+    # so each evaluation of the transition is a binary search.
     def constantSpeedTransition(self):
-        L = self.arclength()
-        return lambda t: self.s_inv(L*t)
+        T, cum = self._arclengthTable()
+        L = cum[-1]
+        return lambda t: _arclengthInverse(T, cum, L*t)
 
     # Returns the center of mass of all nodes in the Path
     # ignoring transformation attributes.
@@ -1495,9 +1933,6 @@ class Path(BackgroundBoxFigure, AlignableFigure):
 
         ### BEGIN DRAWING THE PATH IN CAIRO ###
 
-        # Initialize starting point
-        zn = self.seq[init]
-
         # Temporarily modify cairo coordinates to coincide with
         # physical coordinates.
         morpho.pushPhysicalCoords(view, ctx)  # Contains a ctx.save()
@@ -1518,98 +1953,15 @@ class Path(BackgroundBoxFigure, AlignableFigure):
             ctx.rotate(self.rotation)
 
 
-        # X,Y = morpho.screenCoords(zn, view, ctx)
-        x,y = zn.real, zn.imag
         # Convert width from pixels to physical
         p_width = morpho.physicalWidth(abs(self.width), view, ctx)
         p_semiwidth = p_width / 2
-        p_semiwidth_i = 1j*p_semiwidth
-
-        ctx.move_to(x,y)
 
-        # Extract these objects so that we can save
-        # on repeated Figure tweenable accesses (which
-        # may be slow).
-        self_seq = self.seq
-        self_deadends = self.deadends
-        self_color = self.color
         if isinstance(self.color, morpho.color.Gradient):
-            pat = cairo.MeshPattern()
-            ortho_prev = 0
-            for n in range(init, final):
-                # Get next node
-                z = self_seq[n+1]
-                # Get xy coords of both nodes
-                xn, yn = zn.real, zn.imag
-                x, y = z.real, z.imag
-
-                # If previous node is a deadend, move to next node,
-                # else draw a line to the next node.
-                if n in self_deadends or isbadnum(z) or isbadnum(zn):
-                    ctx.move_to(x,y)
-                    ortho_prev = 0
-                else:
-                    ctx.line_to(x,y)
-
-                    # Create patch
-                    delta = z - zn
-                    if abs(delta) != 0:
-                        ortho = p_semiwidth_i * delta/abs(delta)
-
-                        # Get colors from gradient
-                        RGBA_zn = list(self_color.value(n/maxIndex))
-                        RGBA_z = list(self_color.value((n+1)/maxIndex))
-                        if RGBAmode:
-                            RGBA_zn[3] *= A
-                            RGBA_z[3] *= A
-                        else:
-                            RGBA_zn.append(A)
-                            RGBA_z.append(A)
-
-                        # Bowtie using previous ortho covers the
-                        # seam from connecting two legs.
-                        if ortho_prev != 0:
-                            c0 = zn + ortho_prev
-                            c1 = zn + ortho
-                            c2 = zn - ortho
-                            c3 = zn - ortho_prev
-
-                            pat.begin_patch()
-                            pat.move_to(c0.real, c0.imag)
-                            pat.line_to(c1.real, c1.imag)
-                            pat.line_to(c2.real, c2.imag)
-                            pat.line_to(c3.real, c3.imag)
-
-                            pat.set_corner_color_rgba(0, *RGBA_zn)
-                            pat.set_corner_color_rgba(1, *RGBA_zn)
-                            pat.set_corner_color_rgba(2, *RGBA_zn)
-                            pat.set_corner_color_rgba(3, *RGBA_zn)
-                            pat.end_patch()
-
-                        # Add new gradient patch for the next leg.
-                        c0 = zn + ortho
-                        c1 = zn - ortho
-                        c2 = z - ortho
-                        c3 = z + ortho
-
-                        pat.begin_patch()
-                        pat.move_to(c0.real, c0.imag)
-                        pat.line_to(c1.real, c1.imag)
-                        pat.line_to(c2.real, c2.imag)
-                        pat.line_to(c3.real, c3.imag)
-
-                        pat.set_corner_color_rgba(0, *RGBA_zn)
-                        pat.set_corner_color_rgba(1, *RGBA_zn)
-                        pat.set_corner_color_rgba(2, *RGBA_z)
-                        pat.set_corner_color_rgba(3, *RGBA_z)
-                        pat.end_patch()
-
-                        # Save copy of previous ortho
-                        ortho_prev = ortho
-
-
-                # Update zn to z
-                zn = z
+            # Initialize starting point
+            zn = self.seq[init]
+            ctx.move_to(zn.real, zn.imag)
+            pat = self._gradientMesh(ctx, init, final, maxIndex, p_semiwidth, A, RGBAmode)
 
             ctx.set_source(pat)
             ctx.stroke()
@@ -1625,38 +1977,7 @@ class Path(BackgroundBoxFigure, AlignableFigure):
                 # (checking for headSize and tailSize is technically unnecessary
                 # since splines don't have arrow support, BUT THEY MIGHT IN THE FUTURE,
                 # so that's why the checks are here)
-            latestDeadStart = zn if not isbadnum(zn) else nan
-
-            for n in range(init, final):
-
-                # Get next node
-                z = self_seq[n+1]
-                # X,Y = morpho.screenCoords(z, view, ctx)
-                x,y = z.real, z.imag
-
-                # If previous node is a deadend, move to next node,
-                # else draw a line to the next node.
-                # If previous node is a deadend, or current or previous
-                # nodes are bad, move to next node.
-                # Else, draw a curve to the next node.
-                if isbadnum(z) or isbadnum(zn):
-                    ctx.move_to(x,y)
-                    latestDeadStart = z if not isbadnum(z) else nan
-                elif n in self_deadends:
-                    if allowLoopClosures and zn == latestDeadStart:
-                        # Close the subpath if it ends where it began
-                        ctx.close_path()
-                    ctx.move_to(x,y)
-                    latestDeadStart = z
-                else:
-                    ctx.line_to(x,y)
-
-                # Update zn to z
-                zn = z
-
-            # Do final loop closure if it's allowed
-            if allowLoopClosures and z == latestDeadStart and not isbadnum(z):
-                ctx.close_path()
+            self._traceSegments(ctx, init, final, allowLoopClosures)
 
             # Stroke and fill the path
             if self.width < 0:
@@ -1700,6 +2021,237 @@ class Path(BackgroundBoxFigure, AlignableFigure):
         # assert self.seq == oldSeq
 
 
+    # Mainly for internal use by _drawStrokeBatch() and Instanced.
+    # Returns the node indices (init, final) spanning the whole path
+    # once its leading and trailing deadends are skipped, the same
+    # way draw() adjusts its index bounds, or None if no segments
+    # remain.
+    def _fullRange(self):
+        deadends = self.deadends
+        init = 0
+        while init in deadends:
+            init += 1
+        final = len(self.seq) - 1
+        while final-1 in deadends:
+            final -= 1
+        return (init, final) if init < final else None
+
+    # Mainly for internal use by draw() and _drawStrokeBatch().
+    # Adds the segments of the path between the node indices
+    # `init` and `final` to the cairo context's current path,
+    # starting with a move to node `init`.
+    # Segments next to deadends or bad nodes are skipped, and if
+    # `allowLoopClosures` is True, subpaths that end where they
+    # began are closed.
+    #
+    # The gaps are located with numpy so that only the cairo calls
+    # themselves are made per node, and the resulting cairo path is
+    # cached and replayed as long as the nodes, deadends, index
+    # bounds, and the context's transformation matrix haven't changed
+    # since the last draw.
+    def _traceSegments(self, ctx, init, final, allowLoopClosures):
+        matrix = ctx.get_matrix()
+        key = (init, final, allowLoopClosures, _matrixKey(matrix))
+        cache = self._pathCache
+        if cache is not None and cache[0] == key and cache[1] == self.seq \
+            and cache[2] == self.deadends:
+
+            ctx.append_path(cache[3])
+            return
+
+        Z = np.array(self.seq[init:final+1], dtype=complex)
+        bad = ~np.isfinite(Z)
+
+        # Segments touching a bad node are skipped by moving to their
+        # end, as are segments starting at a deadend.
+        skip = (bad[:-1] | bad[1:]).tolist()
+        bad = bad.tolist()
+        dead = np.isin(np.arange(init, final), list(self.deadends)).tolist()
+        nodes = Z.tolist()
+        xs = Z.real.tolist()
+        ys = Z.imag.tolist()
+
+        scratch = _scratchContext(matrix)
+        scratch.new_path()
+        move_to = scratch.move_to
+        line_to = scratch.line_to
+
+        latestDeadStart = nodes[0] if not bad[0] else nan
+        if not bad[0]:
+            move_to(xs[0], ys[0])
+        for k in range(1, len(nodes)):
+            if skip[k-1]:
+                if not bad[k]:
+                    move_to(xs[k], ys[k])
+                latestDeadStart = nodes[k] if not bad[k] else nan
+            elif dead[k-1]:
+                if allowLoopClosures and nodes[k-1] == latestDeadStart:
+                    # Close the subpath if it ends where it began
+                    scratch.close_path()
+                move_to(xs[k], ys[k])
+                latestDeadStart = nodes[k]
+            else:
+                line_to(xs[k], ys[k])
+
+        # Do final loop closure if it's allowed
+        if allowLoopClosures and nodes[-1] == latestDeadStart and not bad[-1]:
+            scratch.close_path()
+
+        path = scratch.copy_path()
+        scratch.new_path()
+        self._pathCache = (key, self.seq[:], self.deadends.copy(), path)
+        ctx.append_path(path)
+
+    # Mainly for internal use by Frame and Layer drawing.
+    # Returns a hashable key describing the stroke of the path if
+    # it can be drawn together with other paths having the same key
+    # as part of a single cairo stroke, or None otherwise.
+    #
+    # Only plain, fully opaque, solid colored, untransformed paths
+    # which are drawn in full with no fill, arrows, outline, or
+    # background box qualify, since for those, drawing each path
+    # in turn looks the same as stroking them all at once.
+    # The style comparison is similar to matchesStyle(), but also
+    # accounts for the attributes that affect how the path looks.
+    def _strokeBatchKey(self):
+        if type(self).draw is not Path.draw \
+            or isinstance(self.color, morpho.color.Gradient) \
+            or self.alpha*self.alphaEdge != 1 or self.alphaFill > 0 \
+            or self.start != 0 or self.end != 1 \
+            or self.headSize != 0 or self.tailSize != 0 \
+            or (self.outlineWidth > 0 and self.outlineAlpha > 0) \
+            or abs(self.width) < 0.5 or len(self.seq) < 2 \
+            or self.backAlpha > 0 or self.origin != 0 or self.rotation != 0 \
+            or not np.array_equal(self._transform, I2):
+            return None
+        return (tuple(self.color), abs(self.width), tuple(self.dash), self.dashOffset)
+
+    # Mainly for internal use by Frame and Layer drawing.
+    # Draws the given list of paths, all of which have the same
+    # (non-None) _strokeBatchKey(), as a single cairo path with
+    # a single stroke. Equivalent to drawing each path in turn.
+    @staticmethod
+    def _drawStrokeBatch(paths, camera, ctx):
+        morpho.pushPhysicalCoords(camera.view, ctx)  # Contains a ctx.save()
+        for path in paths:
+            bounds = path._fullRange()
+            if bounds is not None:
+                path._traceSegments(ctx, *bounds, True)
+        ctx.restore()
+
+        paths[0]._drawStroke(ctx, list(paths[0].color) + [1])
+        ctx.new_path()  # Reset cairo path
+
+    # Mainly for internal use by draw().
+    # Adds the segments of the path between the node indices
+    # `init` and `final` to the cairo context's current path
+    # and returns a cairo MeshPattern coloring each segment
+    # according to the color gradient.
+    #
+    # The segment normals, the "bowtie" patches covering the seams
+    # between connected segments, and the node colors are computed
+    # as numpy arrays so that only the cairo calls themselves are
+    # made per segment. The cairo path and mesh are cached and
+    # reused as long as the nodes, deadends, width, alpha, and
+    # gradient haven't changed since the last draw.
+    def _gradientMesh(self, ctx, init, final, maxIndex, p_semiwidth, A, RGBAmode):
+        seq = self.seq
+        gradient = self.color
+        key = (init, final, maxIndex, p_semiwidth, A, RGBAmode,
+            gradient, gradient._compile()[0])
+        cache = self._meshCache
+        if cache is not None and cache[0] == key and cache[1] == seq \
+            and cache[2] == self.deadends:
+
+            ctx.new_path()
+            ctx.append_path(cache[3])
+            return cache[4]
+
+        Z = np.array(seq[init:final+1], dtype=complex)
+        bad = np.isnan(Z) | np.isinf(Z)
+
+        # connected[i] is True iff segment i (from node init+i to
+        # node init+i+1) should be drawn.
+        connected = ~(bad[:-1] | bad[1:])
+        deadIndices = [n-init for n in self.deadends if init <= n < final]
+        connected[deadIndices] = False
+
+        # Add the segments to the cairo path
+        xs = Z.real.tolist()
+        ys = Z.imag.tolist()
+        move_to = ctx.move_to
+        line_to = ctx.line_to
+        for i, connect in enumerate(connected.tolist(), start=1):
+            if connect:
+                line_to(xs[i], ys[i])
+            else:
+                move_to(xs[i], ys[i])
+
+        # Compute orthogonal offsets for the segments that get patches
+        with np.errstate(invalid="ignore"):
+            delta = Z[1:] - Z[:-1]
+            length = np.abs(delta)
+            patched = np.nonzero(connected & (length != 0))[0]
+            ortho = p_semiwidth*1j * delta[patched]/length[patched]
+
+        # A bowtie patch covers the seam with the previous patched
+        # segment unless a disconnected segment lies between them.
+        breaks = np.cumsum(~connected)
+        bowtie = np.zeros(len(patched), dtype=bool)
+        if p_semiwidth != 0:
+            bowtie[1:] = breaks[patched[1:]] == breaks[patched[:-1]]
+
+        # Get colors from gradient
+        colors = np.array(gradient.value(np.arange(init, final+1)/maxIndex), dtype=float)
+        if RGBAmode:
+            colors[:,3] *= A
+        else:
+            colors = np.concatenate((colors, np.full((len(colors), 1), A)), axis=1)
+
+        zn = Z[patched]
+        z = Z[patched+1]
+        ortho_prev = np.roll(ortho, 1)
+        legs = np.stack((zn+ortho, zn-ortho, z-ortho, z+ortho), axis=1)
+        ties = np.stack((zn+ortho_prev, zn+ortho, zn-ortho, zn-ortho_prev), axis=1)
+        legs = np.stack((legs.real, legs.imag), axis=2).tolist()
+        ties = np.stack((ties.real, ties.imag), axis=2).tolist()
+        colors_zn = colors[patched].tolist()
+        colors_z = colors[patched+1].tolist()
+
+        # Assemble the mesh
+        pat = cairo.MeshPattern()
+        begin_patch = pat.begin_patch
+        end_patch = pat.end_patch
+        pat_move_to = pat.move_to
+        pat_line_to = pat.line_to
+        set_color = pat.set_corner_color_rgba
+        for leg, tie, hasTie, RGBA_zn, RGBA_z in zip(legs, ties, bowtie.tolist(), colors_zn, colors_z):
+            if hasTie:
+                begin_patch()
+                pat_move_to(*tie[0])
+                pat_line_to(*tie[1])
+                pat_line_to(*tie[2])
+                pat_line_to(*tie[3])
+                set_color(0, *RGBA_zn)
+                set_color(1, *RGBA_zn)
+                set_color(2, *RGBA_zn)
+                set_color(3, *RGBA_zn)
+                end_patch()
+
+            begin_patch()
+            pat_move_to(*leg[0])
+            pat_line_to(*leg[1])
+            pat_line_to(*leg[2])
+            pat_line_to(*leg[3])
+            set_color(0, *RGBA_zn)
+            set_color(1, *RGBA_zn)
+            set_color(2, *RGBA_z)
+            set_color(3, *RGBA_z)
+            end_patch()
+
+        self._meshCache = (key, list(seq), set(self.deadends), ctx.copy_path(), pat)
+        return pat
+
     # Concatenates other to self in place. Does not modify other.
     # self retains its original style parameters, though.
     # Supplying False to the parameter "connectEnds" causes the
@@ -2674,6 +3226,18 @@ class SpacePath(Path):
         # spacepath be split into?
         self.pchunks = 1
 
+        # Level of detail tolerance. If set, the spacepath may be drawn
+        # using a decimated subset of its nodes whenever the resulting
+        # deviation on screen is at most this fraction of the width of
+        # the camera's view. Not used for gradient colored, partially
+        # drawn, or arrow-tipped paths. Default: None (always draw every node)
+        self.lodTolerance = None
+        # Cache of the decimated levels of detail. See _lodIndices().
+        # Copies share it, but tweens never build their own since
+        # each tweened path is usually only drawn once.
+        self._lodCache = None
+        self._lodTransient = False
+
         # # If seq is a list of complex numbers, turn them into 3-vectors
         # seq0 = seq[0]
         # if type(seq0) in (int, float, complex):
@@ -2724,8 +3288,8 @@ class SpacePath(Path):
     # to the actual seq list itself and then
     # resets the transformation attribute.
     def commitTransforms(self):
-        newSeq = self.fimage(lambda v: v+self.origin).seq
-        self.seq = newSeq
+        if len(self.seq) > 0:
+            self.seq = list(np.array(self.seq, dtype=float).reshape(-1,3) + self.origin)
         self.origin = 0
         return self
 
@@ -2740,7 +3304,14 @@ class SpacePath(Path):
 
 
         new.pchunks = self.pchunks
+        new.lodTolerance = self.lodTolerance
+        new._lodCache = self._lodCache
+
+        return new
 
+    def tween(self, other, t, *args, **kwargs):
+        new = super().tween(other, t, *args, **kwargs)
+        new._lodTransient = True
         return new
 
     # box() method for SpacePath is currently unimplemented.
@@ -2756,93 +3327,48 @@ class SpacePath(Path):
             self.seq.append(self.seq[0].copy())
         return self
 
-    # Returns the physical length of the path
-    # NOTE: ignores deadends and pretends all nodes are connected!
-    # Also ignores the transform attribute.
-    def arclength(self):
-        return sum(np.linalg.norm(self.seq[n+1]-self.seq[n]) for n in range(len(self.seq)-1)).tolist()
-
-
-    # Returns the arclength so-far, where t is an index parameter between [0,1]
-    # More precisely, it returns the length of the path with start=0 and end=t.
-    # NOTE: ignores deadends and pretends all nodes are connected!
-    def s(self, t):
-        if not(0 <= t <= 1):
-            raise ValueError("Index parameter must be in the interval [0,1]")
-        T = t*(len(self.seq)-1)
-        index = int(T)
-
-        L = sum(np.linalg.norm(self.seq[n+1]-self.seq[n]) for n in range(index))
-        if index == len(self.seq)-1:
-            return L.tolist()
-
-        L += (T-index)*np.linalg.norm(self.seq[index] - self.seq[index+1])
-        return L.tolist()
-
-    # The inverse of the so-far arclength function.
-    # Takes an arclength s as input and returns the index parameter t
-    # that corresponds to that length.
-    # NOTE: ignores deadends and pretends all nodes are connected!
-    def s_inv(self, s):
-        if s < 0:
-            raise ValueError("Given length must be nonnegative!")
-
-        ell = 0
-        n = 0
-        while ell < s and n < len(self.seq)-1:
-            n += 1
-            ell += np.linalg.norm(self.seq[n] - self.seq[n-1])
-
-        if ell < s:
-            raise ValueError("Given length is longer than the path length!")
-        # if n == len(self.seq) - 1:
-        #     return 1
+    # Mainly for internal use.
+    # 3D version of Path._arclengthTable()
+    def _arclengthTable(self):
+        array = np.array(self.seq, dtype=float).reshape(-1,3)
+        cache = self._arcCache
+        if cache is not None and np.array_equal(cache[0], array):
+            return cache[1], cache[2]
 
-        # Segment that is split
-        segment = np.linalg.norm(self.seq[n] - self.seq[n-1])
-        T = n + (s-ell)/segment
-        return (T/(len(self.seq)-1)).tolist()
+        T, cum = _arclengthArrays(np.linalg.norm(np.diff(array, axis=0), axis=1))
+        self._arcCache = (array, T, cum)
+        return T, cum
 
     def toSpline(self):
         raise NotImplementedError("toSpline() is currently not implemented for SpacePath")
 
-    def primitives(self, camera): # orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
+    # Returns the array of 3D nodes that need to be projected,
+    # or None if the path is to be split into chunks.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
         # Path with fewer than 2 nodes is invisible, so return nothing.
         if self.alpha == 0 or len(self.seq) < 2:
-            return []
+            return np.empty((0,3))
 
-        # If we should split the primitive into chunks, do so by splitting
-        # the spacepath and collecting all of those primitives together.
+        # Chunked paths are handled by the fallback primitives()
         if self.pchunks > 1:
-            primlist = []
-            for subpath in self.split(self.pchunks):
-                subpath.pchunks = 1  # Reset pchunks to avoid infinite recursion!
-                primlist.extend(subpath.primitives(camera))
-            return primlist
-
-        orient = camera.orient
-        focus = camera.focus
-
-        # Transform spacepath seq using orient + focus:
-
-        # # Discard final row. This matrix will only compute the x,y coords
-        # # of the final vector and forget z.
-        # orient_flat = orient[:2,:]
-        focus = focus.flatten()  # Ensure single-dimensional so expand_dims() works as intended
-        if not np.allclose(focus, 0):
-            array = np.array(self.seq, dtype=float)
-            if not np.allclose(self.origin, 0):
-                array += self.origin
-            array -= focus  # Translate so focus point is at the origin.
-            array = orient @ array.T  # Apply orient rotation mat
-            # array = array[:2,:]  # Extract x and y coords and discard z
-            array = array + np.expand_dims(focus, axis=1)  # Translate back
-        else:  # Easy case when focus is zero.
-            array = np.array(self.seq, dtype=float)
-            if not np.allclose(self.origin, 0):
-                array += self.origin
-            array = orient @ array.T
-            # array = array[:2,:]  # Extract x and y coords and discard z
+            return None
+
+        array = np.array(self.seq, dtype=float)
+        if not np.allclose(self.origin, 0):
+            array += self.origin
+        return array
+
+    def _projectedPrimitives(self, camera, array):
+        if len(array) == 0:
+            return []
+
+        # Level of detail: possibly keep only a subset of the nodes
+        indices, deadends = self._lodIndices(camera)
+        if indices is not None:
+            array = array[indices]
+
+        array = array.T
 
         # Convert into complex numbers
         # seq = [(array[0,n] + 1j*array[1,n]).tolist() for n in range(array.shape[1])]
@@ -2851,6 +3377,8 @@ class SpacePath(Path):
         # Construct 2D path in the same style
         path = Path(seq)
         path._updateFrom(self, common=True, copy=False, ignore={"seq"}.union(morpho.METASETTINGS))
+        if indices is not None:
+            path.deadends = deadends
 
         # zdepth of the whole path is given by the mean visual zdepth.
         path.zdepth = np.mean(array[2,:]).tolist()
@@ -2864,6 +3392,48 @@ class SpacePath(Path):
 
         return [path]
 
+    # Mainly for internal use by _projectedPrimitives().
+    # Returns the node indices of the coarsest decimation of the path
+    # meeting the level of detail tolerance under the given camera,
+    # along with the correspondingly renumbered deadends. Returns
+    # (None, None) if every node should be drawn.
+    def _lodIndices(self, camera):
+        if self.lodTolerance is None or len(self.seq) < 3 \
+            or isinstance(self.color, morpho.color.Gradient) \
+            or self.start != 0 or self.end != 1 \
+            or self.headSize != 0 or self.tailSize != 0:
+            return None, None
+
+        # Decimations only depend on the node positions and deadends, so
+        # they are computed once and reused until either changes.
+        # Tweened paths whose nodes differ from their keyfigure's are
+        # drawn in full rather than paying to decimate one-off nodes.
+        array = np.array(self.seq, dtype=float)
+        deadends = set(self.deadends)
+        cache = self._lodCache
+        if cache is None or cache[1] != deadends or not np.array_equal(cache[0], array):
+            if self._lodTransient:
+                return None, None
+            cache = self._lodCache = (array, deadends, _pathLevels(array, deadends))
+        levels = cache[2]
+
+        indices = _selectLevel(levels, self.lodTolerance, _lodScale(camera))
+        if len(indices) == len(array):
+            return None, None
+        # Renumber deadends according to their positions among the kept nodes
+        positions = {n: k for k, n in enumerate(indices.tolist())}
+        return indices, set(positions[n] for n in deadends if n in positions)
+
+    @morpho.projectedPrimitives
+    def primitives(self, camera):
+        # If we should split the primitive into chunks, do so by splitting
+        # the spacepath and collecting all of those primitives together.
+        primlist = []
+        for subpath in self.split(self.pchunks):
+            subpath.pchunks = 1  # Reset pchunks to avoid infinite recursion!
+            primlist.extend(subpath.primitives(camera))
+        return primlist
+
 
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
         primlist = self.primitives(camera)
@@ -2991,9 +3561,9 @@ class SpaceTrack(SpacePath, Track):
         self.tickGap = tickGap
 
 
-    def primitives(self, camera):
+    def _projectedPrimitives(self, camera, array):
         # Compute primitive 2D path
-        primitives = SpacePath.primitives(self, camera)
+        primitives = SpacePath._projectedPrimitives(self, camera, array)
         if len(primitives) == 0: return []
         path = primitives[0]
         # Turn it into a 2D Track figure
@@ -3097,8 +3667,8 @@ class Axis(Track):
 # Mainly for internal use.
 # 3D version of the Axis class. See `Axis` for more info.
 class SpaceAxis(SpaceTrack):
-    def primitives(self, camera):
-        primitives = SpaceTrack.primitives(self, camera)
+    def _projectedPrimitives(self, camera, array):
+        primitives = SpaceTrack._projectedPrimitives(self, camera, array)
         if len(primitives) == 0: return []
         track = primitives[0]
         axis = Axis()
@@ -3873,9 +4443,12 @@ class Polygon(BackgroundBoxFigure, AlignableFigure):
     # resets the transformation attributes.
     def commitTransforms(self):
         rot = cmath.exp(self.rotation*1j)
-        mat = morpho.matrix.Mat(*self.transform.flatten().tolist())
-        newVertices = self.fimage(lambda s: (mat*(rot*s))+self.origin).vertices
-        self.vertices = newVertices
+        xx, xy, yx, yy = self.transform.flatten().tolist()
+        vector = rot*np.array(self.vertices, dtype=complex)
+        # Apply transformation, convert back to complex and add origin
+        newVertices = (xx*vector.real + xy*vector.imag) \
+            + 1j*(yx*vector.real + yy*vector.imag) + self.origin
+        self.vertices = newVertices.tolist()
         self.origin = 0
         self.rotation = 0
         self.transform = np.identity(2)
@@ -4051,6 +4624,11 @@ Polygon.action(wiggle)
 # 3D space.
 # Note that the transformation tweenables "rotation" and "transform"
 # are unsupported.
+#
+# OTHER ATTRIBUTES
+# cull = Set to "backface" to skip drawing the polygon whenever its
+#        vertices appear in clockwise order on screen, i.e. whenever
+#        the camera is looking at its back side. Default: None (no culling)
 class SpacePolygon(Polygon):
     def __init__(self, vertices=None, width=3, color=(1,1,1), alphaEdge=1,
         fill=(1,0,0), alphaFill=1,
@@ -4095,6 +4673,8 @@ class SpacePolygon(Polygon):
         self._state.pop("rotation")
         self._state.pop("_transform")
 
+        self.NonTweenable("cull", None)
+
     # Specifies which class to use in constructing the edge path.
     # Mainly useful under the hood with how SpacePolygon inherits from Polygon.
     _edgeType = SpacePath
@@ -4119,8 +4699,8 @@ class SpacePolygon(Polygon):
     # to the actual vertices list itself and then
     # resets the transformation attribute.
     def commitTransforms(self):
-        newVertices = self.fimage(lambda v: v+self.origin).vertices
-        self.vertices = newVertices
+        if len(self.vertices) > 0:
+            self.vertices = list(np.array(self.vertices, dtype=float).reshape(-1,3) + self.origin)
         self.origin = 0
         return self
 
@@ -4140,34 +4720,33 @@ class SpacePolygon(Polygon):
     def box(self, *args, **kwargs):
         raise NotImplementedError("box() method is currently unimplemented for SpacePolygon.")
 
+    # Returns the array of 3D vertices that need to be projected.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
+        if self.alpha == 0:
+            return np.empty((0,3))
+
+        array = np.array(self.vertices, dtype=float).reshape(-1,3)
+        if not np.allclose(self.origin, 0):
+            array += self.origin
+        return array
+
     # zdepth of the primitive polygon is taken to be the average of all
     # vertices of the space polygon.
-    def primitives(self, camera): # orient=np.identity(3), focus=np.zeros(3)):
+    def _projectedPrimitives(self, camera, array):
         if self.alpha == 0:
             return []
 
-        orient = camera.orient
-        focus = camera.focus
-
-        # Transform spacepolygon vertices using orient + focus:
-        # if not ((focus == 0).all()):
-        focus = focus.flatten()  # Ensure single-dimensional so expand_dims() works as intended
-        if not np.allclose(focus, 0):
-            array = np.array(self.vertices, dtype=float)
-            if not np.allclose(self.origin, 0):
-                array += self.origin
-            array -= focus
-            array = orient @ array.T
-            # array = orient @ (np.array(self.vertices, dtype=float).T - focusArray)
-            # array = array[:2,:]  # Extract x and y coords and discard z
-            # array = array + np.expand_dims(focus[:2], axis=1)
-            array = array + np.expand_dims(focus, axis=1)
-        else:  # Easy case when focus is zero.
-            array = np.array(self.vertices, dtype=float)
-            if not np.allclose(self.origin, 0):
-                array += self.origin
-            array = orient @ array.T
-            # array = array[:2,:]  # Extract x and y coords and discard z
+        # Backface culling: the z-component of the polygon's normal
+        # (computed with Newell's method) is negative exactly when the
+        # projected vertices wind clockwise.
+        if "backface" in _cullModes(self.cull) and len(array) > 2:
+            x = array[:,0]
+            y = array[:,1]
+            if np.sum(x*np.roll(y,-1) - np.roll(x,-1)*y) < 0:
+                return []
+
+        array = array.T
 
         # Convert into complex numbers
         # vertices = [(array[0,n] + 1j*array[1,n]).tolist() for n in range(array.shape[1])]
@@ -4191,6 +4770,8 @@ class SpacePolygon(Polygon):
 
         return [poly]
 
+    primitives = morpho.projectedPrimitives()
+
 
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.zeros(3)):
         primlist = self.primitives(camera)
@@ -4241,6 +4822,25 @@ Spacepolygon = SpacePolygon  # Synonym for camel-case haters
 #                  to the range [0,1].
 #                  So x=0 means i=0, and x=1 means i=i_max;
 #                  and y=0 means j=0, and y=1 means j=j_max.
+# cull = Optional culling of quads that cannot be seen. Can be a string
+#        or a tuple of strings from the following. Default: None (no culling)
+#   "backface" : Skip quads whose front side faces away from the camera.
+#                The front side is the one from which the i and j axes
+#                of the vertex array appear counter-clockwise. Reverse
+#                one of the axes of the array to cull the other side.
+#   "occlusion" : Skip quads completely hidden behind other quads of the
+#                 same mesh, as estimated by a coarse screen-space depth
+#                 buffer. Only takes effect while the mesh is fully opaque.
+# lodTolerance = Level of detail tolerance. If set, the quadmesh may be drawn
+#                using a coarser subgrid of its vertices whenever the resulting
+#                deviation on screen is at most this fraction of the width of
+#                the camera's view (e.g. 0.002 is about 1 pixel on a 500 pixel
+#                wide window). The deviation only measures the geometry,
+#                so this only applies while the mesh lines are hidden
+#                (width < 0.5 or alphaEdge == 0) and the fill is a plain
+#                color with no checkerboard pattern, since a colormap fill
+#                would lose its detail on a coarser subgrid.
+#                Default: None (always draw every quad)
 class Quadmesh(morpho.Figure):
     def __init__(self, array=None, width=3, color=(0,0,0), alphaEdge=1,
         fill=(1,0,0), alphaFill=1, alpha=1, fill2=None):
@@ -4289,6 +4889,14 @@ class Quadmesh(morpho.Figure):
         # Other attributes
         self.NonTweenable("shading", False)
         self.NonTweenable("colormapDomain", "physical")
+        self.NonTweenable("cull", None)
+        self.NonTweenable("lodTolerance", None)
+
+        # Cache of the decimated levels of detail. See _lodIndices().
+        # Copies share it, but tweens never build their own since
+        # each tweened mesh is usually only drawn once.
+        self._lodCache = None
+        self._lodTransient = False
 
     @property
     def array(self):
@@ -4298,26 +4906,44 @@ class Quadmesh(morpho.Figure):
     def array(self, value):
         self._array = morpho.matrix.array(value)
 
-    # Returns a list containing all of the polygons to display when the quadmesh
-    # is drawn with the given orient and focus. Packaging this list into
-    # a frame and drawing the frame will render the quadmesh to the screen
-    # as intended.
-    def primitives(self, camera): # orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
+    # Returns the array of 3D vertices that need to be projected
+    # flattened into an (N x 3) array.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
         # If the quadmesh is fully transparent, don't bother
-        # creating any primitives. Just return the empty list.
+        # creating any primitives.
         if self.alpha == 0:
-            return []
-
-        orient = camera.orient
-        focus = camera.focus
+            return np.empty((0,3))
+        return self.array.reshape(-1,3)
 
-        array = self.array
-        if not np.allclose(focus, 0):
-            array = array - focus
-            array = np.tensordot(array, orient, axes=((2),(1)))
-            array = array + focus
-        else:
-            array = np.tensordot(array, orient, axes=((2),(1)))
+    # Returns a list containing all of the polygons to display when the quadmesh
+    # is drawn with the given camera, given the projected vertex array.
+    # Packaging this list into a frame and drawing the frame will render
+    # the quadmesh to the screen as intended.
+    def _projectedPrimitives(self, camera, array):
+        if len(array) == 0:
+            return []
+        array = array.reshape(self.array.shape)
+
+        # Level of detail: possibly draw only a subgrid of the vertices
+        Nx, Ny = self.array.shape[:2]
+        rows, cols = self._lodIndices(camera)
+        decimated = len(rows) < Nx or len(cols) < Ny
+        if decimated:
+            array = array[np.ix_(rows, cols)]
+
+        # Compute the zdepth of every quad at once as the mean
+        # z-coordinate of its four vertices.
+        Z = array[:,:,2]
+        quadDepths = ((Z[:-1,:-1] + Z[:-1,1:] + Z[1:,:-1] + Z[1:,1:])/4).tolist()
+
+        # Normal vectors of every quad given by the cross product
+        # of its diagonals. Used for both culling and shading.
+        normals = np.cross(
+            array[:-1,:-1,:] - array[1:,1:,:],
+            array[1:,:-1,:] - array[:-1,1:,:]
+            )
+        keep = self._cullMask(array, normals).tolist()
 
         # Generate quads
 
@@ -4331,23 +4957,26 @@ class Quadmesh(morpho.Figure):
 
             # Create color array
             if self.colormapDomain == "physical":
-                colorArray = np.array(list(map(fillfunc, self.array.reshape(-1,3))), dtype=float)
-                colorArray.shape = self.array.shape
+                source = self.array[np.ix_(rows, cols)] if decimated else self.array
+                colorArray = np.array(list(map(fillfunc, source.reshape(-1,3))), dtype=float)
+                colorArray.shape = array.shape
             else:
-                indexArray = np.indices((W,H), dtype=float).transpose(1,2,0)
+                indexArray = np.stack(np.meshgrid(rows, cols, indexing="ij"), axis=-1).astype(float)
                 if self.colormapDomain == "parametric":
-                    indexArray[:,:,0] /= (W-1)
-                    indexArray[:,:,1] /= (H-1)
+                    indexArray[:,:,0] /= (Nx-1)
+                    indexArray[:,:,1] /= (Ny-1)
                 elif self.colormapDomain == "index":
                     pass
                 else:
                     raise ValueError(f'Unrecognized colormap domain "{self.colormapDomain}"')
                 colorArray = np.array(list(map(fillfunc, indexArray.reshape(-1,2))), dtype=float)
-                colorArray.shape = self.array.shape
+                colorArray.shape = array.shape
 
             quads = []
             for i in range(W-1):
                 for j in range(H-1):
+                    if not keep[i][j]:
+                        continue
                     quadblock = array[i:i+2, j:j+2, :]
                     vertices = (quadblock[:,:,0] + 1j*quadblock[:,:,1]).flatten().tolist()
                     vertices[2], vertices[3] = vertices[3], vertices[2]
@@ -4364,7 +4993,7 @@ class Quadmesh(morpho.Figure):
                         vertices[:], self.width, self.color, self.alphaEdge,
                         fill, self.alphaFill, self.alpha
                         )
-                    quad.zdepth = float(sum(quadblock[:,:,2].flatten())/4)
+                    quad.zdepth = quadDepths[i][j]
                     quads.append(quad)
         else:
             fill1 = self.fill
@@ -4374,6 +5003,8 @@ class Quadmesh(morpho.Figure):
             W,H,D = array.shape
             for i in range(W-1):
                 for j in range(H-1):
+                    if not keep[i][j]:
+                        continue
                     quadblock = array[i:i+2, j:j+2, :]
                     vertices = (quadblock[:,:,0] + 1j*quadblock[:,:,1]).flatten().tolist()
                     vertices[2], vertices[3] = vertices[3], vertices[2]
@@ -4382,35 +5013,34 @@ class Quadmesh(morpho.Figure):
                         vertices, self.width, self.color, self.alphaEdge,
                         fill, self.alphaFill, self.alpha
                         )
-                    quad.zdepth = float(sum(quadblock[:,:,2].flatten())/4)
+                    quad.zdepth = quadDepths[i][j]
                     quads.append(quad)
 
         if self.shading:
             # if isinstance(self.fill, function):
             #     raise TypeError("Shading with color function fills is not yet supported.")
-            k = np.array([0,0,1])
-            n = 0  # Quad index
             gamma = self.gamma
             gamma_inv = 1/gamma
+
+            # Compute absolute cosine of every normal with the
+            # camera line-of-sight vector, which is
+            # k = [0,0,1] in this case.
+            norms = np.linalg.norm(normals, axis=2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cosines = np.abs(normals[:,:,2]/norms)
+            norms = norms.tolist()
+            cosines = cosines.tolist()
+
+            n = 0  # Quad index
             for i in range(W-1):
                 for j in range(H-1):
-                    quadblock = array[i:i+2, j:j+2, :]
-                    # Get diagonal vectors
-                    d1 = (quadblock[0,0,:] - quadblock[1,1,:]).flatten()
-                    d2 = (quadblock[1,0,:] - quadblock[0,1,:]).flatten()
-
-                    # Get normal vector to the quad
-                    cross = np.cross(d1,d2)
-
-                    # Compute absolute cosine of this normal with the
-                    # camera line-of-sight vector, which is
-                    # k = [0,0,1] in this case.
-                    norm = np.linalg.norm(cross)
-                    if norm == 0:
+                    if not keep[i][j]:
+                        continue
+                    if norms[i][j] == 0:
                         n += 1
                         continue
 
-                    cos = abs(cross[2]/norm)
+                    cos = cosines[i][j]
 
                     # Modify fill of corresponding quad
                     # according to Lambert's cosine law
@@ -4454,6 +5084,57 @@ class Quadmesh(morpho.Figure):
 
         return quads
 
+    def copy(self, *args, **kwargs):
+        new = super().copy(*args, **kwargs)
+        new._lodCache = self._lodCache
+        return new
+
+    def tween(self, other, t, *args, **kwargs):
+        new = super().tween(other, t, *args, **kwargs)
+        new._lodTransient = True
+        return new
+
+    # Mainly for internal use by _projectedPrimitives().
+    # Returns the row and column indices of the subgrid of vertices
+    # to draw under the given camera according to the level of
+    # detail tolerance.
+    def _lodIndices(self, camera):
+        Nx, Ny = self.array.shape[:2]
+        # Coarser meshes would visibly change mesh lines, colormaps,
+        # and checkerboard patterns, so always draw everything then.
+        if self.lodTolerance is None \
+            or (self.width >= 0.5 and self.alphaEdge != 0) \
+            or callable(self.fill) or self.fill2 is not None:
+            return np.arange(Nx), np.arange(Ny)
+
+        # Decimations only depend on the vertex positions, so they are
+        # computed once and reused until the array changes. Tweened
+        # meshes whose array differs from their keyfigure's are drawn
+        # in full rather than paying to decimate a one-off array.
+        cache = self._lodCache
+        if cache is None or not np.array_equal(cache[0], self.array):
+            if self._lodTransient:
+                return np.arange(Nx), np.arange(Ny)
+            cache = self._lodCache = (self.array.copy(), _meshLevels(self.array))
+        return _selectLevel(cache[1], self.lodTolerance, _lodScale(camera))
+
+    # Returns a boolean array of shape (Nx-1, Ny-1) indicating which
+    # quads should be drawn according to the `cull` attribute, given
+    # the projected vertex array and the normal vectors of every quad.
+    def _cullMask(self, array, normals):
+        modes = _cullModes(self.cull)
+        keep = np.ones(normals.shape[:2], dtype=bool)
+        if "backface" in modes:
+            keep &= (normals[:,:,2] >= 0)
+        # Occlusion is only meaningful if the quads hide what's behind them
+        if "occlusion" in modes and self.alpha == 1 and self.alphaFill == 1:
+            keep &= ~_occludedQuads(array, keep)
+        return keep
+
+    # Returns a list containing all of the polygons to display when the quadmesh
+    # is drawn with the given camera.
+    primitives = morpho.projectedPrimitives()
+
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.array([0,0,0], dtype=float)):
         # Get list of polygons to draw
         quads = self.primitives(camera)
@@ -4463,7 +5144,9 @@ class Quadmesh(morpho.Figure):
         frame.draw(camera, ctx)
 
 
-    def fimage(self, func):
+    # Set vectorized=True to evaluate func on all the vertices at once.
+    # See morpho.vectorizedImage() for details.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
         newfig = self.copy()
 
         # Convert the array to float if needed
@@ -4471,6 +5154,11 @@ class Quadmesh(morpho.Figure):
             newfig.array = np.array(newfig.array, dtype=float)
 
         W,H,D = newfig.array.shape
+        if vectorized:
+            image = morpho.vectorizedImage(func, newfig.array.reshape(-1,D), chunksize)
+            newfig.array = np.array(image, dtype=float).reshape(W,H,-1)
+            return newfig
+
         for i in range(W):
             for j in range(H):
                 newfig.array[i,j,:] = func(newfig.array[i,j,:])
@@ -4750,6 +5438,257 @@ class SpaceArrow(SpacePath, Arrow):
 
 DEG2RAD = math.pi/180
 
+# Mainly for internal use.
+# Parses the `cull` attribute of a space figure into a set of
+# culling mode strings.
+def _cullModes(cull):
+    if cull is None:
+        return set()
+    modes = {cull} if isinstance(cull, str) else set(cull)
+    unknown = modes - {"backface", "occlusion"}
+    if len(unknown) > 0:
+        raise ValueError(f'Unrecognized cull mode(s): {", ".join(map(repr, unknown))}')
+    return modes
+
+# Mainly for internal use.
+# Returns a cairo context drawing on a tiny dummy surface whose
+# transformation matrix is set to `matrix`. Cairo paths built on it
+# can be cached and later replayed with append_path() on another
+# context having the same matrix.
+# Note that cairo stores path coordinates in device space rounded
+# to 1/256 of a pixel, so a path must be traced under the same
+# matrix it will be drawn with, otherwise it loses precision.
+_scratchCtx = None
+def _scratchContext(matrix):
+    global _scratchCtx
+    if _scratchCtx is None:
+        _scratchCtx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_A8, 1, 1))
+    _scratchCtx.set_matrix(matrix)
+    return _scratchCtx
+
+# Mainly for internal use.
+# Returns a hashable tuple of the entries of the given cairo matrix.
+def _matrixKey(matrix):
+    return (matrix.xx, matrix.yx, matrix.xy, matrix.yy, matrix.x0, matrix.y0)
+
+# Mainly for internal use by the arclength methods of Path and Spline.
+# Given the lengths of the consecutive pieces of a curve, returns the
+# pair (T, cum) where cum is the cumulative arclength at each piece
+# boundary and T is the evenly spaced index parameter (between 0 and 1)
+# of each boundary.
+def _arclengthArrays(lengths):
+    cum = np.zeros(len(lengths)+1)
+    np.cumsum(lengths, out=cum[1:])
+    T = np.linspace(0, 1, len(cum)) if len(cum) > 1 else np.zeros(1)
+    return T, cum
+
+# Mainly for internal use.
+# Returns the arclength at the index parameter t according to the
+# given arclength table. t can be a number or an np.array.
+def _arclengthAt(T, cum, t):
+    t = np.asarray(t, dtype=float)
+    if ((t < 0) | (t > 1)).any():
+        raise ValueError("Index parameter must be in the interval [0,1]")
+    return np.interp(t, T, cum).tolist() if t.ndim == 0 else np.interp(t, T, cum)
+
+# Mainly for internal use.
+# Inverse of _arclengthAt(). Returns the index parameter at which the
+# arclength s is reached by binary searching the arclength table.
+# s can be a number or an np.array.
+def _arclengthInverse(T, cum, s):
+    S = np.asarray(s, dtype=float)
+    if (S < 0).any():
+        raise ValueError("Given length must be nonnegative!")
+    if (S > cum[-1]).any():
+        raise ValueError("Given length is longer than the path length!")
+
+    if len(cum) < 2:
+        result = np.zeros_like(S)
+    else:
+        # n is the first table entry whose arclength is >= s
+        n = np.clip(np.searchsorted(cum, S, side="left"), 1, len(cum)-1)
+        seg = cum[n] - cum[n-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(seg > 0, (S - cum[n-1])/seg, 0)
+        result = T[n-1] + frac*(T[n] - T[n-1])
+    return np.asarray(result).tolist() if S.ndim == 0 else result
+
+# Mainly for internal use.
+# Returns the factor converting lengths in 3D space into fractions of
+# the width of the view of the given SpaceCamera. The largest singular
+# value of the orient matrix bounds how much the camera can stretch
+# a length as it is projected onto the screen.
+def _lodScale(camera):
+    view = camera.view
+    return (np.linalg.norm(camera.orient[:2,:], 2)/(view[1]-view[0])).tolist()
+
+# Mainly for internal use.
+# Given a list of levels of detail, each of which is a tuple whose final
+# entry is the level's error (in 3D units), returns everything but the
+# error of the coarsest level whose error on screen is within tolerance.
+# The first level should be the undecimated one with zero error.
+def _selectLevel(levels, tol, scale):
+    chosen = levels[0]
+    for level in levels[1:]:
+        if level[-1]*scale <= tol:
+            chosen = level
+    return chosen[:-1] if len(chosen) > 2 else chosen[0]
+
+# Mainly for internal use.
+# Returns every step-th index in range(N), always including the final one.
+def _strideIndices(N, step):
+    indices = np.arange(0, N, step)
+    if indices[-1] != N-1:
+        indices = np.append(indices, N-1)
+    return indices
+
+# Mainly for internal use by Quadmesh.
+# Precomputes the levels of detail of a quadmesh vertex array by taking
+# subgrids of every 2nd, 4th, 8th, ... row and column (always keeping the
+# boundary). Returns a list of tuples (rows, cols, error) where error is
+# the largest distance between an original vertex and the bilinear
+# interpolation of it from the surrounding quad of the subgrid.
+def _meshLevels(array):
+    W, H = array.shape[:2]
+    levels = [(np.arange(W), np.arange(H), 0.0)]
+    if W < 2 or H < 2 or not np.isfinite(array).all():
+        return levels
+
+    # Locates every original index within the intervals of the subgrid,
+    # returning the interval indices and the relative position within.
+    def locate(indices, N):
+        n = np.arange(N)
+        k = np.clip(np.searchsorted(indices, n, side="right")-1, 0, len(indices)-2)
+        return k, (n - indices[k])/(indices[k+1] - indices[k])
+
+    step = 2
+    while len(levels[-1][0]) > 2 or len(levels[-1][1]) > 2:
+        rows = _strideIndices(W, step)
+        cols = _strideIndices(H, step)
+        k, u = locate(rows, W)
+        l, v = locate(cols, H)
+        u = u[:,None,None]
+        v = v[None,:,None]
+        r0, r1 = rows[k][:,None], rows[k+1][:,None]
+        c0, c1 = cols[l][None,:], cols[l+1][None,:]
+        interp = (1-u)*(1-v)*array[r0,c0] + u*(1-v)*array[r1,c0] \
+            + (1-u)*v*array[r0,c1] + u*v*array[r1,c1]
+        error = np.linalg.norm(array - interp, axis=2).max().tolist()
+        levels.append((rows, cols, error))
+        step *= 2
+    return levels
+
+# Mainly for internal use by SpacePath.
+# Precomputes the levels of detail of a spacepath's (N x 3) node array
+# by keeping every 2nd, 4th, 8th, ... node (always keeping the endpoints
+# and the nodes on either side of a deadend). Returns a list of tuples
+# (indices, error) where error is the largest distance between an
+# original node and the segment of the decimated path replacing it.
+def _pathLevels(array, deadends):
+    N = len(array)
+    levels = [(np.arange(N), 0.0)]
+    if not np.isfinite(array).all():
+        return levels
+
+    required = set()
+    for n in deadends:
+        if 0 <= n < N-1:
+            required.update((n, n+1))
+    required = np.array(sorted(required), dtype=int)
+
+    step = 2
+    while len(levels[-1][0]) > 2 + len(required):
+        indices = np.union1d(_strideIndices(N, step), required)
+        n = np.arange(N)
+        k = np.clip(np.searchsorted(indices, n, side="right")-1, 0, len(indices)-2)
+        A = array[indices[k]]
+        B = array[indices[k+1]]
+        AB = B - A
+        lengthSq = np.sum(AB**2, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.clip(np.sum((array - A)*AB, axis=1)/lengthSq, 0, 1)
+        s[lengthSq == 0] = 0
+        error = np.linalg.norm(array - (A + s[:,None]*AB), axis=1).max().tolist()
+        levels.append((indices, error))
+        if len(indices) == len(levels[-2][0]):
+            break
+        step *= 2
+    return levels
+
+# Mainly for internal use by Quadmesh.
+# Coarse screen-space occlusion test. Given the projected (Nx, Ny, 3)
+# vertex array of a quadmesh and a boolean array marking which quads
+# are candidates for drawing, returns a boolean array of the same shape
+# marking the candidate quads which are completely hidden behind other
+# candidate quads.
+#
+# The quads are rasterized into a low resolution depth buffer sampled
+# on a grid spaced about half a (typical) quad apart, where every grid
+# point records the farthest depth of the nearest quad covering it.
+# A quad is deemed hidden if every grid point of its bounding box
+# (padded by one grid step) is covered entirely in front of it.
+# Quads spanning more than `maxSpan` grid steps are never rasterized
+# nor culled, which keeps the test cheap and conservative.
+def _occludedQuads(array, candidates, maxSpan=6, maxRes=1024):
+    hidden = np.zeros(candidates.shape, dtype=bool)
+
+    # Candidate quad vertices in drawing order (Q x 4 x 3)
+    verts = np.stack(
+        (array[:-1,:-1], array[:-1,1:], array[1:,1:], array[1:,:-1]),
+        axis=2)[candidates]
+    if len(verts) < 2:
+        return hidden
+    xy = verts[:,:,:2]
+    lo = xy.min(axis=1)
+    hi = xy.max(axis=1)
+    zmin = verts[:,:,2].min(axis=1)
+    zmax = verts[:,:,2].max(axis=1)
+
+    # Set up the depth buffer grid
+    step = np.median((hi - lo).min(axis=1))/2
+    if not (np.isfinite(step) and step > 0):
+        return hidden
+    origin = lo.min(axis=0)
+    span = hi.max(axis=0) - origin
+    if span.max()/step >= maxRes:
+        step = span.max()/(maxRes-1)
+    size = (np.floor(span/step) + 1).astype(int)
+    depth = np.full(size, -np.inf)
+
+    # Rasterize every quad into the grid points inside its bounding box
+    # using a convexity test on the quad's edges.
+    offsets = np.arange(maxSpan)
+    start = np.ceil((lo - origin)/step).astype(int)
+    gx = start[:,0,None,None] + offsets[None,:,None]
+    gy = start[:,1,None,None] + offsets[None,None,:]
+    px = origin[0] + gx*step
+    py = origin[1] + gy*step
+    edges = np.roll(xy, -1, axis=1) - xy
+    crosses = np.stack([
+        edges[:,k,0,None,None]*(py - xy[:,k,1,None,None])
+        - edges[:,k,1,None,None]*(px - xy[:,k,0,None,None])
+        for k in range(4)])
+    inside = (crosses >= 0).all(axis=0) | (crosses <= 0).all(axis=0)
+    inside &= (gx < size[0]) & (gy < size[1])
+    q, a, b = np.nonzero(inside)
+    np.maximum.at(depth, (gx[q,a,0], gy[q,0,b]), zmin[q])
+
+    # Test every quad against the grid points around it.
+    window = maxSpan + 3
+    offsets = np.arange(window)
+    first = np.floor((lo - origin)/step).astype(int) - 1
+    last = np.ceil((hi - origin)/step).astype(int) + 1
+    ox = first[:,0,None,None] + offsets[None,:,None]
+    oy = first[:,1,None,None] + offsets[None,None,:]
+    inGrid = (ox >= 0) & (ox < size[0]) & (oy >= 0) & (oy < size[1])
+    sampled = depth[np.clip(ox, 0, size[0]-1), np.clip(oy, 0, size[1]-1)]
+    sampled = np.where(inGrid, sampled, -np.inf)
+    covered = (sampled > zmax[:,None,None])
+    covered |= (ox > last[:,0,None,None]) | (oy > last[:,1,None,None])
+    tooBig = ((last - first + 1) > window).any(axis=1)
+    hidden[candidates] = covered.all(axis=(1,2)) & ~tooBig
+    return hidden
+
 # Mainly for internal use.
 # Calculates the bounding box of a numpy array of
 # complex number positional data.
@@ -4,10 +4,14 @@ Note that to use the functions in this module, you will
 need to have LaTeX installed on your system.
 '''
 
-import os, io, hashlib
+import os, io, hashlib, threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import morpholib as morpho
 import morpholib.tools.latex2svg as latex2svg
+from morpholib.tools.basics import sel, listselect
 
 # Import itself so that global names can be accessed
 # from a local scope that uses the same names.
@@ -24,6 +28,36 @@ cacheDir = None
 # Number of hex digits to use as part of the hash
 cacheHashLength = 32
 
+# Maximum number of parsed LaTeX expressions to keep in memory
+# so that repeated expressions can skip LaTeX compilation and
+# SVG parsing entirely. Set to 0 to disable the memory cache.
+memCacheSize = 256
+
+# Version number of the binary (.npz) cache file format.
+# Files with a different version number are ignored.
+binaryCacheVersion = 1
+
+# OrderedDict implementing the in-memory LRU cache.
+# Maps keys generated by _memKey() to pairs (splines, svgbbox)
+# as returned by MultiSpline._rawsvg()
+_memCache = OrderedDict()
+
+# Maximum number of LaTeX compilations that can run at once
+# when compiling concurrently via parseAsync() or prefetch().
+# If None, it is chosen based on the number of CPU cores.
+maxWorkers = None
+
+# Thread pool used for concurrent compilation. It is created
+# the first time it's needed.
+_executor = None
+
+# Dict mapping keys generated by _compileKey() to Future
+# objects resolving to the SVG code of TeX expressions that
+# were submitted for concurrent compilation but have not yet
+# been consumed by parse().
+_inflight = dict()
+_inflightLock = threading.Lock()
+
 # Takes a string as input and returns a string
 # which is the input string's SHA-256 hash expressed
 # in hexadecimal notation.
@@ -59,17 +93,219 @@ def _sanitizeTex(tex):
 # used to cache the SVG the TeX code was converted into.
 # The hash is generated from the given TeX code itself,
 # along with the current template and preamble.
-def hashTex(tex):
+#
+# Optionally a preamble can be given which will be used
+# in place of the current global preamble.
+def hashTex(tex, preamble=None):
+    if preamble is None:
+        preamble = morpho.latex.preamble
     texhash = hashlist([template, preamble, tex])[:cacheHashLength]
     return f"tex-{texhash}.svg"
 
+# Returns the filename of the binary cache file corresponding
+# to the given TeX code. It is the same as hashTex() except
+# with the extension ".npz" instead of ".svg".
+def hashTexBinary(tex, preamble=None):
+    return os.path.splitext(hashTex(tex, preamble))[0] + ".npz"
+
 # Returns boolean on whether the given TeX code is cached
 # in the current cache directory.
-def iscached(tex):
-    filename = hashTex(tex)
+def iscached(tex, preamble=None):
     if not os.path.isdir(cacheDir):
         return False
-    return filename in os.listdir(cacheDir)
+    return os.path.isfile(os.path.join(cacheDir, hashTex(tex, preamble))) \
+        or os.path.isfile(os.path.join(cacheDir, hashTexBinary(tex, preamble)))
+
+# Empties the in-memory cache of parsed LaTeX expressions.
+# Does not affect the cache directory.
+def clearMemCache():
+    _memCache.clear()
+
+# Mainly for internal use.
+# Returns a key identifying the SVG code the given TeX code
+# compiles into under the given preamble and current params.
+def _compileKey(tex, preamble):
+    # The LaTeX params (e.g. fontsize) are included since
+    # unlike the disk cache, the memory cache is active even
+    # when no cache directory is set.
+    paramstr = repr(sorted((key, str(value)) for key, value in params.items()))
+    return (hashTex(tex, preamble), paramstr)
+
+# Mainly for internal use.
+# Returns the key used by the in-memory cache for the given
+# TeX code and parsing parameters.
+def _memKey(tex, preamble, arcError, tightbox):
+    return _compileKey(tex, preamble) + (arcError, tightbox)
+
+# Mainly for internal use.
+# Saves a list of raw splines and their SVG bounding box
+# (as returned by MultiSpline._rawsvg()) to the given filepath
+# in the binary cache format.
+#
+# The node data of all the splines is concatenated into a
+# single array, as are their deadends, and the style
+# attributes are stored as parallel arrays.
+def _saveBinary(filepath, splines, svgbbox, arcError, tightbox):
+    if len(splines) == 0:
+        data = np.zeros((0,3), dtype=complex)
+        deadends = np.zeros(0, dtype=int)
+    else:
+        data = np.concatenate([spline._data for spline in splines])
+        deadends = np.array([d for spline in splines for d in sorted(spline.deadends)], dtype=int)
+    arrays = dict(
+        version=binaryCacheVersion,
+        arcError=arcError,
+        tightbox=tightbox,
+        svgbbox=np.array(svgbbox if svgbbox is not None else [], dtype=float),
+        data=data,
+        nodeCounts=np.array([spline.nodeCount() for spline in splines], dtype=int),
+        deadends=deadends,
+        deadendCounts=np.array([len(spline.deadends) for spline in splines], dtype=int),
+        width=np.array([spline.width for spline in splines], dtype=float),
+        color=np.array([spline.color for spline in splines], dtype=float).reshape(-1,3),
+        alphaEdge=np.array([spline.alphaEdge for spline in splines], dtype=float),
+        fill=np.array([spline.fill for spline in splines], dtype=float).reshape(-1,3),
+        alphaFill=np.array([spline.alphaFill for spline in splines], dtype=float),
+        alpha=np.array([spline.alpha for spline in splines], dtype=float),
+        )
+
+    # Write to a temporary file first and then move it into
+    # place so that a partially written file is never read.
+    tmppath = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmppath, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(tmppath, filepath)
+
+# Mainly for internal use.
+# Loads a list of raw splines and their SVG bounding box from
+# a binary cache file created by _saveBinary().
+# Returns None if the file does not exist, is unreadable, or
+# was created with different parsing parameters.
+def _loadBinary(filepath, arcError, tightbox):
+    if not os.path.isfile(filepath):
+        return None
+    try:
+        with np.load(filepath, allow_pickle=False) as npz:
+            if int(npz["version"]) != binaryCacheVersion \
+                or float(npz["arcError"]) != arcError \
+                or bool(npz["tightbox"]) != tightbox:
+                return None
+            svgbbox = npz["svgbbox"].tolist()
+            data = npz["data"]
+            nodeCounts = npz["nodeCounts"]
+            deadends = npz["deadends"].tolist()
+            deadendCounts = npz["deadendCounts"]
+            width = npz["width"].tolist()
+            color = npz["color"].tolist()
+            alphaEdge = npz["alphaEdge"].tolist()
+            fill = npz["fill"].tolist()
+            alphaFill = npz["alphaFill"].tolist()
+            alpha = npz["alpha"].tolist()
+    except (OSError, KeyError, ValueError):
+        return None
+
+    splines = []
+    nodeStarts = np.concatenate([[0], np.cumsum(nodeCounts)]).tolist()
+    deadendStarts = np.concatenate([[0], np.cumsum(deadendCounts)]).tolist()
+    for n in range(len(nodeCounts)):
+        spline = morpho.shapes.Spline(data[nodeStarts[n]:nodeStarts[n+1]])
+        spline.deadends = set(deadends[deadendStarts[n]:deadendStarts[n+1]])
+        spline.set(
+            width=width[n], color=tuple(color[n]), alphaEdge=alphaEdge[n],
+            fill=tuple(fill[n]), alphaFill=alphaFill[n], alpha=alpha[n]
+            )
+        splines.append(spline)
+
+    return splines, (svgbbox if len(svgbbox) > 0 else None)
+
+# Mainly for internal use.
+# Compiles the given (sanitized) TeX code into SVG code using
+# the given preamble and returns the SVG code as a string.
+# If `useCache` is True and a cache directory is set, the
+# SVG code is also saved in the cache directory.
+def _compile(tex, preamble, useCache=True):
+    params = morpho.latex.params.copy()
+    params["preamble"] = preamble
+
+    out = latex2svg.latex2svg(tex, params)
+    svgcode = out["svg"]
+
+    # If caching is enabled, save the output svg code
+    # as a file in the specified cache directory.
+    if useCache and cacheDir is not None:
+        if not os.path.isdir(cacheDir):
+            # Create cache directory if it doesn't currently exist.
+            os.makedirs(cacheDir, exist_ok=True)
+        filepath = os.path.join(cacheDir, hashTex(tex, preamble))
+        with open(filepath, "w") as file:
+            file.write(svgcode)
+
+    return svgcode
+
+# Mainly for internal use.
+# Returns the SVG code for the given (sanitized) TeX code,
+# reading it from the cache directory if possible, and
+# compiling it otherwise.
+def _svgcode(tex, preamble, useCache=True):
+    # Wait on the result of a concurrent compilation if
+    # one was started for this TeX code.
+    if len(_inflight) > 0:
+        with _inflightLock:
+            future = _inflight.pop(_compileKey(tex, preamble), None)
+        if future is not None:
+            return future.result()
+
+    if useCache and cacheDir is not None:
+        filepath = os.path.join(cacheDir, hashTex(tex, preamble))
+        if os.path.isfile(filepath):
+            with open(filepath, "r") as file:
+                return file.read()
+    return _compile(tex, preamble, useCache)
+
+# Mainly for internal use.
+# Returns a list of raw splines and their SVG bounding box
+# for the given (sanitized) TeX code in the form returned by
+# MultiSpline._rawsvg().
+#
+# Lookups are tried in order in the memory cache, the binary
+# cache file, and the cached SVG file, before finally falling
+# back on compiling the TeX code. Whatever levels were missed
+# are then filled in.
+#
+# The returned splines are owned by the memory cache, so they
+# should be copied before being modified.
+def _rawSplines(tex, preamble, arcError=0.1, tightbox=False, useCache=True):
+    useMemCache = useCache and memCacheSize > 0
+    if useMemCache:
+        key = _memKey(tex, preamble, arcError, tightbox)
+        try:
+            raw = _memCache[key]
+        except KeyError:
+            pass
+        else:
+            _memCache.move_to_end(key)
+            return raw
+
+    useDiskCache = useCache and cacheDir is not None
+    raw = None
+    if useDiskCache:
+        binpath = os.path.join(cacheDir, hashTexBinary(tex, preamble))
+        raw = _loadBinary(binpath, arcError, tightbox)
+    if raw is None:
+        with io.StringIO() as stream:
+            stream.write(_svgcode(tex, preamble, useCache))
+            stream.seek(0)
+            raw = morpho.shapes.MultiSpline._rawsvg(stream,
+                arcError=arcError, tightbox=tightbox)
+        if useDiskCache:
+            _saveBinary(binpath, *raw, arcError, tightbox)
+
+    if useMemCache:
+        _memCache[key] = raw
+        while len(_memCache) > memCacheSize:
+            _memCache.popitem(last=False)
+
+    return raw
 
 # Parses a string containing LaTeX code and returns a
 # MultiSpline figure representing it.
@@ -84,7 +320,8 @@ def iscached(tex):
 # taken from morpho.latex.preamble.
 #
 # If keyword argument `useCache` is set to False, the
-# TeX cache will be skipped if one was defined.
+# TeX caches (both the in-memory cache and the cache
+# directory) will be skipped.
 #
 # Any other args/kwargs will be passed into the MultiSpline
 # fromsvg() constructor (e.g. boxWidth)
@@ -93,40 +330,143 @@ def parse(tex, *args,
     **kwargs):
 
     tex = _sanitizeTex(tex)
+    if preamble is None:
+        # Referencing the global scope `preamble` variable via
+        # the module itself is required here since the local
+        # variable and global variable have the same name.
+        preamble = morpho.latex.preamble
 
-    # Check if the SVG for this TeX code is cached
-    if useCache and cacheDir is not None and iscached(tex):
-        filepath = cacheDir + os.sep + hashTex(tex)
-        spline = morpho.shapes.MultiSpline.fromsvg(filepath, *args, **kwargs)
-    else:  # Generate TeX Spline in house
-        if preamble is None:
-            # Referencing the global scope `preamble` variable via
-            # the module itself is required here since the local
-            # variable and global variable have the same name.
-            preamble = morpho.latex.preamble
-        params = morpho.latex.params.copy()
-        params["preamble"] = preamble
-
-        out = latex2svg.latex2svg(tex, params)
-        svgcode = out["svg"]
-
-        # If caching is enabled, save the output svg code
-        # as a file in the specified cache directory.
-        if useCache and cacheDir is not None:
-            if not os.path.isdir(cacheDir):
-                # Create cache directory if it doesn't currently exist.
-                os.makedirs(cacheDir)
-            filepath = cacheDir + os.sep + hashTex(tex)
-            with open(filepath, "w") as file:
-                file.write(svgcode)
-
+    index = kwargs.pop("index", sel[:])
+    if callable(index):
+        # Selection functions act on the SVG elements themselves,
+        # so the SVG code must be fully parsed in this case.
         with io.StringIO() as stream:
-            stream.write(svgcode)
+            stream.write(_svgcode(tex, preamble, useCache))
             stream.seek(0)
-            spline = morpho.shapes.MultiSpline.fromsvg(stream, *args, **kwargs)
+            spline = morpho.shapes.MultiSpline.fromsvg(stream, *args, index=index, **kwargs)
+    else:
+        arcError = kwargs.pop("arcError", 0.1)
+        tightbox = kwargs.pop("tightbox", False)
+        splines, svgbbox = _rawSplines(tex, preamble, arcError, tightbox, useCache)
+        if len(splines) == 0:
+            spline = morpho.shapes.MultiSpline()
+        else:
+            # Copy the selected raw splines since the originals
+            # belong to the cache.
+            splines = [subspline.copy() for subspline in listselect(splines, index).values()]
+            spline = morpho.shapes.MultiSpline._fromRawSplines(
+                splines, svgbbox, *args, **kwargs
+                )
     spline.origin = pos
     return spline
 
+# Mainly for internal use.
+# Returns the thread pool used for concurrent compilation,
+# creating it if it doesn't exist yet.
+def _getExecutor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=maxWorkers,
+            thread_name_prefix="morpho-latex")
+    return _executor
+
+# Mainly for internal use.
+# Submits the given (sanitized) TeX code for compilation on the
+# thread pool unless it is already cached or already submitted.
+def _submit(tex, preamble, useCache=True):
+    if useCache and (_memKey(tex, preamble, 0.1, False) in _memCache
+        or (cacheDir is not None and iscached(tex, preamble))):
+        return
+
+    key = _compileKey(tex, preamble)
+    with _inflightLock:
+        if key not in _inflight:
+            _inflight[key] = _getExecutor().submit(_compile, tex, preamble, useCache)
+
+# Starts compiling the given LaTeX expressions concurrently in
+# the background and returns immediately. Later calls to
+# parse() on any of these expressions will wait for (and use)
+# the result of the background compilation instead of
+# compiling the expression again. Duplicate expressions and
+# expressions that are already cached are only compiled once
+# (or not at all).
+#
+# This is mainly useful at the top of a scene script that
+# parses lots of LaTeX on a cold cache, since each compilation
+# spends most of its time in the external `latex` and
+# `dvisvgm` processes, which can run in parallel:
+#   morpho.latex.prefetch(r"e^{\pi i} = -1", r"\int_0^1 x\,dx")
+#
+# Optionally a `preamble` can be given like in parse().
+# Setting `useCache=False` compiles the expressions even if
+# they are already cached.
+#
+# The number of expressions that compile at once can be
+# controlled by setting `morpho.latex.maxWorkers` before the
+# first concurrent compilation.
+def prefetch(*tex, preamble=None, useCache=True):
+    # If given a single list as input, extract it.
+    if len(tex) == 1 and isinstance(tex[0], (list, tuple)):
+        tex = tex[0]
+
+    if preamble is None:
+        preamble = morpho.latex.preamble
+    for expr in tex:
+        _submit(_sanitizeTex(expr), preamble, useCache)
+
+# Returned by parseAsync(). Represents a LaTeX MultiSpline
+# that is being compiled in the background. The MultiSpline
+# itself is constructed (waiting on the compilation if needed)
+# the first time result() is called, and the same MultiSpline
+# is returned by all later calls to result().
+class TexFuture(object):
+    def __init__(self, tex, args, kwargs):
+        self.tex = tex
+        self._args = args
+        self._kwargs = kwargs
+        self._result = None
+
+    # Returns boolean on whether the MultiSpline can be obtained
+    # without waiting on the background compilation.
+    def done(self):
+        if self._result is not None:
+            return True
+        preamble = self._kwargs.get("preamble", None)
+        if preamble is None:
+            preamble = morpho.latex.preamble
+        future = _inflight.get(_compileKey(self.tex, preamble), None)
+        return future is None or future.done()
+
+    # Returns the MultiSpline, waiting for the background
+    # compilation to finish if necessary.
+    def result(self):
+        if self._result is None:
+            self._result = parse(self.tex, *self._args, **self._kwargs)
+        return self._result
+
+# Same as parse(), except the LaTeX compilation happens
+# concurrently in the background, and a TexFuture object is
+# returned immediately instead of a MultiSpline. Call its
+# result() method to get the MultiSpline when it's needed:
+#   futures = [morpho.latex.parseAsync(tex, boxHeight=1) for tex in texlist]
+#   splines = [future.result() for future in futures]
+#
+# Identical TeX code submitted multiple times is only compiled
+# once. Takes the same arguments as parse().
+def parseAsync(tex, *args, preamble=None, useCache=True, **kwargs):
+    tex = _sanitizeTex(tex)
+    _submit(tex, preamble if preamble is not None else morpho.latex.preamble, useCache)
+    return TexFuture(tex, args, dict(kwargs, preamble=preamble, useCache=useCache))
+
+# Shuts down the thread pool used for concurrent compilation
+# after waiting for any ongoing compilations to finish.
+# A new pool will be created if it's needed again.
+def shutdownWorkers():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
 # Identical to parse(), except the return value is a MultiSpline3D
 # figure. See parse() for more info.
 #
@@ -26,7 +26,7 @@ import cairo
 cr = cairo
 
 import svgelements as se
-import io
+import io, itertools
 
 import math, cmath
 import numpy as np
@@ -148,6 +148,10 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
     headSize = 0
     tailSize = 0
 
+    # Number of samples taken along each segment when approximating
+    # arclengths. See arclength().
+    arclengthSteps = 32
+
     def __init__(self, data=None, width=3, color=(1,1,1), alpha=1):
         if data is None:
             # data = np.array([
@@ -195,6 +199,11 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
         # # Should strokes occur behind fills?
         # self.NonTweenable("backstroke", False)
 
+        # Cache of the cumulative arclength table. See _arclengthTable().
+        self._arcCache = None
+
+        # Cache of the cairo path traced by draw(). See _tracePath().
+        self._pathCache = None
 
     @property
     def data(self):
@@ -386,6 +395,123 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
 
         return svgbbox
 
+    # Segment codes used by _svgpathData(). The dict is ordered
+    # by the precedence used to classify subclasses of these types.
+    _svgSegmentCodes = {
+        se.CubicBezier: 0,
+        se.Line: 1,
+        se.Move: 2,
+        se.Close: 3,
+        se.QuadraticBezier: 4
+        }
+
+    # Mainly for internal use by fromsvg().
+    # Converts the segments of an svgelements Path object into
+    # a Spline data array and deadends set, returning the pair
+    # (data, deadends). Returns (None, None) if the path is empty.
+    #
+    # The segment data is extracted in a single pass, quadratic
+    # Bezier segments are converted into cubics all at once, and
+    # the rows of the data array are accumulated as python lists
+    # before being converted into an array at the very end.
+    # The result is identical to building the spline up one
+    # node at a time with newNode(), but much faster for paths
+    # with lots of segments.
+    @staticmethod
+    def _svgpathData(svgpath):
+        try:
+            # Extract initial point
+            initpt = complex(next(svgpath.as_points()))
+        except StopIteration:
+            return None, None
+
+        CUBIC, LINE, MOVE, CLOSE, QUAD = 0, 1, 2, 3, 4
+        segmentCodes = Spline._svgSegmentCodes
+
+        # Extract the raw segment data
+        codes = []
+        starts = []
+        controls1 = []
+        controls2 = []
+        ends = []
+        for segment in svgpath.segments():
+            code = segmentCodes.get(type(segment), None)
+            if code is None:
+                # Handle subclasses of the known segment types
+                for segtype, segcode in segmentCodes.items():
+                    if isinstance(segment, segtype):
+                        code = segcode
+                        break
+                else:
+                    raise ValueError(f'Cannot parse SVG path element "{type(segment)}"')
+            codes.append(code)
+
+            if code == CUBIC:
+                starts.append(0)
+                controls1.append(complex(segment.control1))
+                controls2.append(complex(segment.control2))
+                ends.append(complex(segment.end))
+            elif code == QUAD:
+                starts.append(complex(segment.start))
+                controls1.append(complex(segment.control))
+                controls2.append(0)
+                ends.append(complex(segment.end))
+            else:
+                starts.append(0)
+                controls1.append(0)
+                controls2.append(0)
+                ends.append(complex(segment.end) if code != CLOSE else 0)
+
+        controls1 = np.array(controls1, dtype=complex)
+        controls2 = np.array(controls2, dtype=complex)
+        # Convert all quadratic segments into cubics at once
+        isquad = (np.array(codes, dtype=int) == QUAD)
+        if np.any(isquad):
+            _, controls1[isquad], controls2[isquad], _ = morpho.bezier.quad2cubic(
+                np.array(starts, dtype=complex)[isquad],
+                controls1[isquad], np.array(ends, dtype=complex)[isquad]
+                )
+        # Sanitize non-finite handle values
+        for controls in (controls1, controls2):
+            controls[np.isnan(controls) | np.isinf(controls)] = oo
+        controls1 = controls1.tolist()
+        controls2 = controls2.tolist()
+
+        # Assemble the rows of the data array
+        nodes = [initpt]
+        inhandles = [initpt + oo]
+        outhandles = [initpt + oo]
+        deadends = set()
+        for n, code in enumerate(codes):
+            if code == CUBIC or code == QUAD:
+                outhandles[-1] = controls1[n]
+                nodes.append(ends[n])
+                inhandles.append(controls2[n])
+                outhandles.append(oo)
+            elif code == LINE:
+                outhandles[-1] = nodes[-1]
+                nodes.append(ends[n])
+                inhandles.append(ends[n])
+                outhandles.append(oo)
+            elif code == MOVE:
+                if n == 0: continue
+                deadends.add(len(nodes)-1)
+                nodes.append(ends[n])
+                inhandles.append(oo)
+                outhandles.append(oo)
+            else:  # CLOSE
+                # Equivalent to spline.close(local=True)
+                if len(nodes) < 2 or nodes[0] == nodes[-1]:
+                    continue
+                startIndex = max(deadends) + 1 if len(deadends) > 0 else 0
+                outhandles[-1] = nodes[-1]
+                nodes.append(nodes[startIndex])
+                inhandles.append(nodes[startIndex])
+                outhandles.append(outhandles[startIndex])
+
+        data = np.array([nodes, inhandles, outhandles], dtype=complex).T.copy()
+        return data, deadends
+
     # Generates a Spine figure by parsing an SVG file/stream
     # and taking the first SVG path element found.
     #
@@ -464,8 +590,15 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
             svgpath = source
         else:
             svg = parseSVG(source)
-            elems = list(svg.elements(lambda elem: isinstance(elem, se.Shape)))
-            svgpath = elems[index]
+            elems = svg.elements(lambda elem: isinstance(elem, se.Shape))
+            if isinstance(index, int) and index >= 0:
+                # Skip over the preceding elements without
+                # collecting them into a list.
+                svgpath = next(itertools.islice(elems, index, None), None)
+                if svgpath is None:
+                    raise IndexError("SVG element index out of range")
+            else:
+                svgpath = list(elems)[index]
 
         spline = cls()
 
@@ -499,35 +632,11 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
                 )
             spline.alphaFill = svgpath.fill.opacity
 
-        try:
-            # Extract initial point
-            initpt = next(svgpath.as_points())
-        except StopIteration:
+        data, deadends = Spline._svgpathData(svgpath)
+        if data is None:
             return spline  # Return empty spline if path is empty
-        spline.newNode(complex(initpt))
-        # prevpt = initpt
-        for n,segment in enumerate(svgpath.segments()):
-            if isinstance(segment, se.CubicBezier):
-                spline.outhandle(-1, complex(segment.control1))
-                spline.newNode(complex(segment.end), complex(segment.control2), relHandles=False)
-            elif isinstance(segment, se.Line):
-                spline.outhandleRel(-1, 0)
-                spline.newNode(complex(segment.end), 0)
-            elif isinstance(segment, se.Move):
-                if n == 0: continue
-                spline.deadends.add(spline.nodeCount()-1)
-                spline.newNode(complex(segment.end), relHandles=False)
-            elif isinstance(segment, se.Close):
-                spline.close(local=True)
-            elif isinstance(segment, se.QuadraticBezier):
-                q0 = complex(segment.start)
-                q1 = complex(segment.control)
-                q2 = complex(segment.end)
-                p0,p1,p2,p3 = morpho.bezier.quad2cubic(q0, q1, q2)
-                spline.outhandle(-1, p1)
-                spline.newNode(p3, p2, relHandles=False)
-            else:
-                raise ValueError(f'Cannot parse SVG path element "{type(segment)}"')
+        spline._data = data
+        spline.deadends = deadends
 
         if tightbox:
             svgbbox = Spline._tightbbox(svgpath)
@@ -983,6 +1092,67 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
         p3 = self.node(index+1)
         return morpho.bezierInterp(p0, p1, p2, p3, param)
 
+    # Mainly for internal use.
+    # Returns the pair (T, cum) of np.arrays where cum[k] is the
+    # arclength of the spline up to the index parameter T[k]. Each
+    # segment is approximated by `arclengthSteps` line segments.
+    # The table is computed lazily and reused until the data array
+    # changes.
+    # NOTE: ignores deadends and pretends all nodes are connected!
+    def _arclengthTable(self):
+        data = self._data
+        cache = self._arcCache
+        if cache is not None and np.array_equal(cache[0], data):
+            return cache[1], cache[2]
+
+        if data.shape[0] < 2:
+            lengths = np.zeros(0)
+        else:
+            p, pin, pout = resolveInfHandles(data)
+
+            # Sample every segment at once. Rows are samples, columns are segments.
+            u = np.linspace(0, 1, self.arclengthSteps+1).reshape((-1,) + (1,)*p.ndim)
+            curve = (1-u)**3*p[:-1] + 3*(1-u)**2*u*pout[:-1] \
+                + 3*(1-u)*u**2*pin[1:] + u**3*p[1:]
+            diffs = np.diff(curve, axis=0)
+            lengths = np.abs(diffs) if data.ndim == 2 else np.linalg.norm(diffs, axis=-1)
+            lengths = lengths.T.reshape(-1)
+
+        T, cum = morpho.grid._arclengthArrays(lengths)
+        self._arcCache = (data.copy(), T, cum)
+        return T, cum
+
+    # Returns the physical length of the spline, approximated by
+    # sampling each segment `arclengthSteps` times.
+    # NOTE: ignores deadends and pretends all nodes are connected!
+    # Also ignores the transformation tweenables.
+    def arclength(self):
+        return self._arclengthTable()[1][-1].tolist()
+
+    # Returns the arclength so-far, where t is an index parameter between [0,1]
+    # More precisely, it returns the length of the spline with start=0 and end=t.
+    # t can also be an np.array of index parameters.
+    # NOTE: ignores deadends and pretends all nodes are connected!
+    def s(self, t):
+        return morpho.grid._arclengthAt(*self._arclengthTable(), t)
+
+    # The inverse of the so-far arclength function.
+    # Takes an arclength s as input and returns the index parameter t
+    # that corresponds to that length. s can also be an np.array
+    # of lengths.
+    # NOTE: ignores deadends and pretends all nodes are connected!
+    def s_inv(self, s):
+        return morpho.grid._arclengthInverse(*self._arclengthTable(), s)
+
+    # Returns a transition function such that
+    # tweening from start=0, end=0 to start=0, end=1
+    # results in a constant speed drawing of the spline.
+    # See Path.constantSpeedTransition().
+    def constantSpeedTransition(self):
+        T, cum = self._arclengthTable()
+        L = cum[-1]
+        return lambda t: morpho.grid._arclengthInverse(T, cum, L*t)
+
     # Splits the spline at the parameter t (ranging from 0 to 1)
     # by inserting a new node at whatever point t corresponds to,
     # and auto-adjusting the handles of the adjacent nodes so that
@@ -1388,45 +1558,31 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
         if start >= end:
             return
 
-        # If we have non-integer starting and ending indices,
-        # we will need to split the spline at at least one point.
-        needSplits = (start != int_start or end != int_end)
-
-        if needSplits:
-            # Save a copy of the original data array because
-            # we will temporarily replace it.
-            # This technique should probably be re-implemented better
-            # in the future because it's expensive to copy an entire
-            # np.array every single frame draw, though I expect it's
-            # not too bad for a spline without a huge number of nodes.
-            oldData = self._data
-            self._data = oldData.copy()
-
-            # Non-integer starting index
-            if start != int_start:
-                self.splitAtIndex(start)
-
-                # Shift all relevant indices up one
-                # to compensate for new node inserted early
-                start += 1
-                int_start += 1
-
-                end += 1
-                int_end += 1
-
-            # Non-integer ending index
-            if end != int_end:
-                if int_start == int_end and start != int_start:
-                    # Adjust end index value because it is now
-                    # with respect to the newly added node instead
-                    # of the original node.
-                    end = int_end + (end-start)/(int_end+1-start)
-                self.splitAtIndex(end)
-
         # Compute true initial and true final indices
         init = math.floor(start)
         final = math.ceil(end)
 
+        # If we have non-integer starting and ending indices, the
+        # first and/or last segments are only partially drawn.
+        # Compute the control points of those partial segments by
+        # splitting their Bezier curves directly so that the data
+        # array never needs to be copied or modified.
+        partials = {}
+        if start != init or end != final:
+            for n in {init, final-1}:
+                a = max(start-n, 0)
+                b = min(end-n, 1)
+                if a == 0 and b == 1:
+                    continue
+                p0, _, p1 = self.nodeData(n)
+                p3, p2, _ = self.nodeData(n+1)
+                curve = (p0, p1, p2, p3)
+                if b < 1:
+                    curve = morpho.bezier.splitBezier(*curve, b)[0]
+                if a > 0:
+                    curve = morpho.bezier.splitBezier(*curve, a/b)[1]
+                partials[n] = curve
+
         # Calculate physical distance corresponding to half a pixel.
         # If a handle and its corresponding node are within this
         # distance, the handle will be snapped to the node.
@@ -1444,9 +1600,6 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
             # Handle possible other transformations
             morpho.applyTransforms(ctx, self.origin, self.rotation, self.transform)
 
-            # Initialize starting point
-            zprev, inprev, outprev = self.data[init,:].tolist()
-            inprev, outprev = replaceInfHandles(zprev, inprev, outprev)
             # If True, intermediate loops between deadends in the path will
             # be auto-closed to make the loops appear more seamless. This requires
             # the path to be full-length AND be arrowless.
@@ -1455,59 +1608,8 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
                 # (checking for headSize and tailSize is technically unnecessary
                 # since splines don't have arrow support, BUT THEY MIGHT IN THE FUTURE,
                 # so that's why the checks are here)
-            latestDeadStart = zprev if not isbadnum(zprev) else nan
-
-
-            # Move to starting point
-            x,y = zprev.real, zprev.imag
-            ctx.move_to(x,y)
-
-            # Extract these objects so that we can save
-            # on repeated Figure tweenable accesses (which
-            # may be slow).
-            self_data = self.data
-            self_deadends = self.deadends
-            # Draw each curve
-            # for n in range(self.data.shape[0]-1):
-            for n in range(init, final):
-                # Get next node, inhandle, and outhandle
-                z, inhandle, outhandle = self_data[n+1,:].tolist()
-                # Update handles based on possible inf values
-                inhandle, outhandle = replaceInfHandles(z, inhandle, outhandle)
-
-                x,y = z.real, z.imag
-
-                # If previous node is a deadend, or current or previous
-                # nodes are bad, move to next node.
-                # Else, draw a curve to the next node.
-                if isbadnum(z) or isbadnum(zprev):
-                    ctx.move_to(x,y)
-                    latestDeadStart = z if not isbadnum(z) else nan
-                elif n in self_deadends:
-                    if allowLoopClosures and zprev == latestDeadStart:
-                        # Close the subpath if it ends where it began
-                        ctx.close_path()
-                    ctx.move_to(x,y)
-                    latestDeadStart = z
-                else:
-                    # Snap handles to nodes if they are within
-                    # half a pixel of each other.
-                    if abs(outprev-zprev) < pixel_tol:
-                        outprev = zprev
-                    if abs(inhandle - z) < pixel_tol:
-                        inhandle = z
-                    x1,y1 = outprev.real, outprev.imag
-                    x2,y2 = inhandle.real, inhandle.imag
-                    ctx.curve_to(x1,y1, x2,y2, x,y)
-
-                # Update previous values to current values
-                zprev = z
-                # inprev = inhandle
-                outprev = outhandle
 
-        # Do final loop closure if it's allowed
-        if allowLoopClosures and z == latestDeadStart and not isbadnum(z):
-            ctx.close_path()
+            self._tracePath(ctx, init, final, partials, allowLoopClosures, pixel_tol)
 
         # Stroke and fill the path
         rgba = list(self.color) + [self.alpha*self.alphaEdge]
@@ -1523,13 +1625,92 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
             self._drawStroke(ctx, rgba)
         ctx.new_path()  # Reset cairo path
 
-        # Restore original data array if splits occurred
-        if needSplits:
-            self._data = oldData
-
         if self.showTangents:
             self.drawTangents(camera, ctx)
 
+    # Mainly for internal use by draw().
+    # Adds the curves of the spline between the node indices `init`
+    # and `final` to the cairo context's current path, starting with
+    # a move to the initial node. `partials` maps segment indices to
+    # the control points of partially drawn segments, and handles
+    # within `pixel_tol` of their nodes are snapped to them.
+    #
+    # The handles, snapping, and the gaps at deadends and bad nodes
+    # are computed as numpy arrays so that only the cairo calls
+    # themselves are made per segment. The resulting cairo path is
+    # cached and replayed as long as the data array, deadends, the
+    # context's transformation matrix, and the other inputs haven't
+    # changed since the last draw.
+    def _tracePath(self, ctx, init, final, partials, allowLoopClosures, pixel_tol):
+        matrix = ctx.get_matrix()
+        key = (init, final, allowLoopClosures, pixel_tol,
+            tuple(sorted(partials.items())), morpho.grid._matrixKey(matrix))
+        cache = self._pathCache
+        if cache is not None and cache[0] == key and cache[2] == self.deadends \
+            and np.array_equal(cache[1], self._data):
+
+            ctx.append_path(cache[3])
+            return
+
+        # Control points of every segment
+        p, pin, pout = resolveInfHandles(self._data[init:final+1])
+        P0, P1, P2, P3 = p[:-1].copy(), pout[:-1].copy(), pin[1:].copy(), p[1:].copy()
+        for n, curve in partials.items():
+            P0[n-init], P1[n-init], P2[n-init], P3[n-init] = curve
+
+        # Snap handles to nodes if they are within
+        # half a pixel of each other.
+        with np.errstate(invalid="ignore"):
+            P1 = np.where(np.abs(P1-P0) < pixel_tol, P0, P1)
+            P2 = np.where(np.abs(P2-P3) < pixel_tol, P3, P2)
+
+        # Segments touching a bad node are skipped by moving to their
+        # end, as are segments starting at a deadend.
+        bad0 = ~np.isfinite(P0)
+        bad3 = ~np.isfinite(P3)
+        skip = (bad0 | bad3).tolist()
+        bad3 = bad3.tolist()
+        dead = np.isin(np.arange(init, final), list(self.deadends)).tolist()
+        coords = np.column_stack(
+            [P1.real, P1.imag, P2.real, P2.imag, P3.real, P3.imag]
+            ).tolist()
+        starts = P0.tolist()
+        ends = P3.tolist()
+
+        scratch = morpho.grid._scratchContext(matrix)
+        scratch.new_path()
+        move_to = scratch.move_to
+        curve_to = scratch.curve_to
+
+        z = starts[0]
+        latestDeadStart = z if not isbadnum(z) else nan
+        if not isbadnum(z):
+            move_to(z.real, z.imag)
+        for k in range(final-init):
+            x1,y1, x2,y2, x,y = coords[k]
+            if skip[k]:
+                if not bad3[k]:
+                    move_to(x,y)
+                latestDeadStart = ends[k] if not bad3[k] else nan
+            elif dead[k]:
+                if allowLoopClosures and starts[k] == latestDeadStart:
+                    # Close the subpath if it ends where it began
+                    scratch.close_path()
+                move_to(x,y)
+                latestDeadStart = ends[k]
+            else:
+                curve_to(x1,y1, x2,y2, x,y)
+
+        # Do final loop closure if it's allowed
+        z = ends[-1]
+        if allowLoopClosures and z == latestDeadStart and not isbadnum(z):
+            scratch.close_path()
+
+        path = scratch.copy_path()
+        scratch.new_path()
+        self._pathCache = (key, self._data.copy(), self.deadends.copy(), path)
+        ctx.append_path(path)
+
     def drawTangents(self, camera, ctx):
         # Need at least two nodes to draw
         if self.data.shape[0] < 2:
@@ -1630,7 +1811,9 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
     # Note: This applies to ALL control points: both nodes AND
     # handles. This function will skip any control points that are
     # inf or nan.
-    def fimage(self, func):
+    # Set vectorized=True to evaluate func on all the control points
+    # at once. See morpho.vectorizedImage() for details.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
         newfig = self.copy()
 
         # Convert to a single-dimensional array2d
@@ -1639,10 +1822,14 @@ class Spline(BackgroundBoxFigure, AlignableFigure):
         finite = np.logical_not(np.logical_or(np.isinf(seq), np.isnan(seq)))
 
         # Evaluate function on all finite values
-        fseq = []
-        for z in seq[finite].tolist():
-            fseq.append(func(z))
-        seq[finite] = fseq
+        if vectorized:
+            if finite.any():
+                seq[finite] = morpho.vectorizedImage(func, seq[finite], chunksize)
+        else:
+            fseq = []
+            for z in seq[finite].tolist():
+                fseq.append(func(z))
+            seq[finite] = fseq
         newfig._data = seq.reshape(newfig._data.shape)
 
         return newfig
@@ -1840,6 +2027,10 @@ class MultiSplineBase(morpho.grid.MultiPathBase):
     # found within the source, but this can be changed by passing
     # in an index, a tuple of indices, a slice, or a tuple of slices
     # into the `index` keyword.
+    # Selection by a single non-negative index, a slice with
+    # non-negative bounds, or a choice function is done in a
+    # single streaming pass over the SVG elements where the
+    # unselected elements are never converted into Splines.
     # Any additional keyword arguments not explicitly listed here
     # are set as attributes of the returned figure or its subfigures.
     @classmethod
@@ -1849,20 +2040,62 @@ class MultiSplineBase(morpho.grid.MultiPathBase):
         **kwargs):
 
         svg = parseSVG(source)
-        svgpaths = list(svg.elements(lambda elem: isinstance(elem, se.Shape)))
+        elements = svg.elements(lambda elem: isinstance(elem, se.Shape))
+
+        isSelected = _streamSelector(index)
+        if isSelected is None:
+            # Selector can only be evaluated on the full list
+            # of elements.
+            svgpaths = list(elements)
+
+            # Return empty MultiSpline if SVG source has no paths.
+            if len(svgpaths) == 0:
+                return cls()
+
+            # Generate raw Spline figures
+            splines = []
+            for svgpath in listselect(svgpaths, index).values():
+                spline = Spline.fromsvg(svgpath,
+                    svgOrigin=0, flip=False, arcError=arcError, tightbox=tightbox)
+                splines.append(spline)
+
+            # Compute overall bounding box
+            svgbbox = cls._svgbbox(svgpaths, tightbox)
+        else:
+            # Stream thru the elements in a single pass, only
+            # converting the selected ones into raw Spline figures
+            # while every element contributes to the bounding box.
+            splines = []
+            count = 0
+            def streamElements():
+                nonlocal count
+                for n, svgpath in enumerate(elements):
+                    count += 1
+                    if isSelected(n, svgpath):
+                        spline = Spline.fromsvg(svgpath,
+                            svgOrigin=0, flip=False, arcError=arcError, tightbox=tightbox)
+                        splines.append(spline)
+                    yield svgpath
 
-        # Return empty MultiSpline if SVG source has no paths.
-        if len(svgpaths) == 0:
-            return cls()
+            try:
+                svgbbox = cls._svgbbox(streamElements(), tightbox)
+            except TypeError:
+                # Return empty MultiSpline if SVG source has no paths.
+                if count == 0:
+                    return cls()
+                raise
 
-        # Generate raw Spline figures
-        splines = []
-        for svgpath in listselect(svgpaths, index).values():
-            spline = Spline.fromsvg(svgpath,
-                svgOrigin=0, flip=False, arcError=arcError, tightbox=tightbox)
-            splines.append(spline)
+        return cls._fromRawSplines(splines, svgbbox,
+            view=view, windowShape=windowShape, svgOrigin=svgOrigin,
+            align=align, boxWidth=boxWidth, boxHeight=boxHeight,
+            flip=flip, **kwargs
+            )
 
-        # Compute overall bounding box
+    # Mainly for internal use by fromsvg().
+    # Computes the overall bounding box of a list of SVG shape
+    # elements. See Spline.fromsvg() for the meaning of `tightbox`.
+    @staticmethod
+    def _svgbbox(svgpaths, tightbox=False):
         XMIN, YMIN, XMAX, YMAX = oo, oo, -oo, -oo
         for svgpath in svgpaths:
             try:
@@ -1878,6 +2111,45 @@ class MultiSplineBase(morpho.grid.MultiPathBase):
         if oo in svgbbox or -oo in svgbbox:
             raise TypeError("Given SVG has no well-defined bounding box.")
 
+        return svgbbox
+
+    # Mainly for internal use by fromsvg() and the LaTeX cache.
+    # Parses an SVG source into a list of raw Spline figures, one
+    # for every SVG shape element in the source, expressed in
+    # unflipped SVG coordinates. Returns the list along with the
+    # overall SVG bounding box of all the elements (which is
+    # None if the source contains no shapes).
+    #
+    # The output can be passed to _fromRawSplines() to reproduce
+    # the result of fromsvg() without parsing the SVG again.
+    @classmethod
+    def _rawsvg(cls, source, *, arcError=0.1, tightbox=False):
+        svg = parseSVG(source)
+        svgpaths = list(svg.elements(lambda elem: isinstance(elem, se.Shape)))
+        if len(svgpaths) == 0:
+            return [], None
+
+        splines = [
+            Spline.fromsvg(svgpath,
+                svgOrigin=0, flip=False, arcError=arcError, tightbox=tightbox)
+            for svgpath in svgpaths
+            ]
+        return splines, cls._svgbbox(svgpaths, tightbox)
+
+    # Mainly for internal use by fromsvg() and the LaTeX cache.
+    # Constructs the final MultiSpline out of a list of raw
+    # splines and the SVG bounding box they live in by applying
+    # the alignment, box sizing, and flip described in
+    # Spline.fromsvg().
+    #
+    # Note the given splines are modified IN PLACE and become the
+    # subfigures of the returned MultiSpline, so pass in copies if
+    # the originals need to be preserved.
+    @classmethod
+    def _fromRawSplines(cls, splines, svgbbox, *, view=None, windowShape=None,
+        svgOrigin=None, align=(0,0), boxWidth=None, boxHeight=None,
+        flip=True, **kwargs):
+
         for spline in splines:
             spline._transformForSVG(
                 svgbbox, boxWidth, boxHeight, svgOrigin, align, flip,
@@ -2166,17 +2438,24 @@ class SpaceSpline(Spline):
     def transform(self, value):
         raise AttributeError
 
-    def fimage(self, func):
+    # Set vectorized=True to evaluate func on all the control points
+    # at once. See morpho.vectorizedImage() for details.
+    def fimage(self, func, *, vectorized=False, chunksize=None):
         newfig = self.copy()
 
         # Convert to a list of 3-vectors
         seq = newfig._data.reshape(-1, 3)
 
         # Evaluate function on all finite vectors
-        for n,v in enumerate(seq):
-            if isbadarray(v):
-                continue
-            seq[n] = func(v)
+        if vectorized:
+            finite = np.isfinite(seq).all(axis=1)
+            if finite.any():
+                seq[finite] = morpho.vectorizedImage(func, seq[finite], chunksize)
+        else:
+            for n,v in enumerate(seq):
+                if isbadarray(v):
+                    continue
+                seq[n] = func(v)
         newfig._data = seq.reshape(newfig._data.shape)
 
         return newfig
@@ -2522,6 +2801,25 @@ def replaceInfHandles(point, inhandle, outhandle):
     return inhandle, outhandle
 
 
+# Vectorized version of replaceInfHandles().
+# Given a spline data array (or a slice of one), returns the
+# arrays of nodes, inhandles, and outhandles with every inf handle
+# replaced by the position it corresponds to.
+# The data array itself is unmodified.
+def resolveInfHandles(data):
+    p, pin, pout = data[:,0], data[:,1], data[:,2]
+    inbad = ~np.isfinite(pin)
+    outbad = ~np.isfinite(pout)
+    if data.ndim == 3:
+        inbad = inbad.any(axis=1, keepdims=True)
+        outbad = outbad.any(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore"):
+        pin, pout = (
+            np.where(inbad, np.where(outbad, p, reflect(pout, about=p)), pin),
+            np.where(outbad, np.where(inbad, p, reflect(pin, about=p)), pout)
+            )
+    return p, pin, pout
+
 # Given spline data array,
 # replaces any inf handles with the current positions they
 # would correspond to.
@@ -3085,6 +3383,32 @@ class Pie(EllipticalArc):
 
 ### HELPERS ###
 
+# Mainly for internal use by MultiSpline.fromsvg().
+# Converts a listselect() index selector into a function
+# f(n, item) that returns whether the nth item of a sequence
+# is selected, if it's possible to do so without knowing the
+# length of the sequence. This is the case for choice
+# functions, non-negative ints, and slices with non-negative
+# bounds and positive step. Returns None for any other kind
+# of selector.
+def _streamSelector(index):
+    if callable(index):
+        return lambda n, item: index(item)
+    elif isinstance(index, int):
+        if index < 0:
+            return None
+        return lambda n, item: n == index
+    elif isinstance(index, slice):
+        start = 0 if index.start is None else index.start
+        stop = index.stop
+        step = 1 if index.step is None else index.step
+        if start < 0 or step <= 0 or (stop is not None and stop < 0):
+            return None
+        return lambda n, item: n >= start and (stop is None or n < stop) \
+            and (n - start) % step == 0
+    else:
+        return None
+
 # Parses a string of SVG data using svgelements.SVG.parse()
 # and returns the resulting SVG object.
 def parseSVGstring(svgstring):
@@ -1124,18 +1124,19 @@ class SpaceText(Text):
         return txt
 
 
-    def primitives(self, camera): # orient=np.identity(3), focus=np.zeros(3)):
+    # Returns the 3D position that needs to be projected.
+    # See morpho.projectedPrimitives()
+    def _spaceVertices(self):
         if self.alpha == 0:
+            return np.empty((0,3))
+        return self.pos.reshape(1,3)
+
+    def _projectedPrimitives(self, camera, array):
+        if len(array) == 0:
             return []
 
         orient = camera.orient
-        focus = camera.focus
-
-        if np.allclose(focus, 0):
-            pos3d = orient @ self.pos
-        else:
-            pos3d = orient @ (self.pos - focus) + focus
-        pos3d = pos3d.tolist()
+        pos3d = array[0].tolist()
 
         txt = self._baseFigure()
         txt.text = self.text
@@ -1165,6 +1166,8 @@ class SpaceText(Text):
 
         return [txt]
 
+    primitives = morpho.projectedPrimitives()
+
 
     def draw(self, camera, ctx): #, orient=np.identity(3), focus=np.zeros(3)):
         primlist = self.primitives(camera)